@@ -1,2 +1,2 @@
 #!/bin/bash
-python3 src/main.py "/ssg/"
\ No newline at end of file
+python3 src/main.py "/ssg/" --site-url https://bthomas218.github.io
\ No newline at end of file
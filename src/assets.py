@@ -0,0 +1,145 @@
+import os
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from manifest import hash_file
+from optimize import COMPRESSED_SUFFIXES
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, reflinks are then never attempted
+    fcntl = None
+
+LINK_MODES = ("copy", "hardlink", "reflink")
+FICLONE = 0x40049409  # Linux ioctl that shares a file's extents (btrfs, xfs, ...)
+
+
+@dataclass
+class SyncResult:
+    """What sync_files did.
+    @files: Every file now mirrored, relative to the destination, as posix paths
+    @copied: Files that were new or changed and got copied or linked
+    @removed: Files that were removed because they left the source
+    @unchanged: Number of files that were already up to date
+    """
+    files: list[str] = field(default_factory=list)
+    copied: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    unchanged: int = 0
+
+
+def remove_file(root: Path, path: Path):
+    """Deletes a file, its precompressed siblings, and any directories it leaves empty inside root.
+    @root: Directory that is never removed
+    @path: File to delete
+    """
+    path.unlink(missing_ok=True)
+    for suffix in COMPRESSED_SUFFIXES:
+        path.with_name(path.name + suffix).unlink(missing_ok=True)
+    parent = path.parent
+    while parent != root and parent.exists() and not any(parent.iterdir()):
+        parent.rmdir()
+        parent = parent.parent
+
+
+def reflink(src: Path, dest: Path):
+    """Makes dest a copy-on-write clone of src. Raises OSError where that isn't supported.
+    @src: File to clone
+    @dest: Path of the clone
+    """
+    if fcntl is None:
+        raise OSError("reflinks are not supported on this platform")
+    with src.open("rb") as s, dest.open("wb") as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+
+def place_file(src: Path, dest: Path, link: str = "copy"):
+    """Puts a copy of src at dest, replacing whatever is there.
+    Hardlinks and reflinks fall back to a plain copy when src and dest are on
+    different filesystems or the filesystem can't do them.
+    @src: File to copy
+    @dest: Destination path
+    @link: One of LINK_MODES
+    """
+    tmp = dest.with_name(dest.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        if link == "hardlink":
+            os.link(src, tmp)
+        elif link == "reflink":
+            reflink(src, tmp)
+            shutil.copystat(src, tmp)
+        else:
+            shutil.copy2(src, tmp)
+    except OSError:
+        if link == "copy":
+            raise
+        tmp.unlink(missing_ok=True)
+        shutil.copy2(src, tmp)
+    tmp.replace(dest)
+
+
+def is_unchanged(src: Path, dest: Path, src_stat: os.stat_result, checksum: bool, size: int | None = None) -> bool:
+    """Checks whether dest is already an up to date copy of src.
+    Size and mtime decide, unless checksum is set, in which case files of the same
+    size but different mtime are compared by content.
+    @src: Source file
+    @dest: Destination file
+    @src_stat: Stat of src
+    @checksum: Compare contents when the mtime differs
+    @size: Size dest was left with when it was rewritten after placing (e.g. minified), None if it wasn't
+    """
+    try:
+        dest_stat = dest.stat()
+    except FileNotFoundError:
+        return False
+    if dest_stat.st_size != (src_stat.st_size if size is None else size):
+        return False
+    if dest_stat.st_mtime_ns == src_stat.st_mtime_ns:
+        return True
+    if size is None and checksum and hash_file(src) == hash_file(dest):
+        # Same content: take over the mtime so the next sync doesn't hash it again
+        os.utime(dest, ns=(dest_stat.st_atime_ns, src_stat.st_mtime_ns))
+        return True
+    return False
+
+
+def sync_files(src: Path, dest: Path, previous: list[str] = (), checksum: bool = False,
+               link: str = "copy", sizes: dict[str, int] | None = None) -> SyncResult:
+    """Mirrors the files under src into dest, only copying what is new or changed.
+    Files listed in previous that no longer exist in src are removed from dest;
+    anything else already in dest (e.g. generated pages) is left alone.
+    @src: Source directory
+    @dest: Destination directory
+    @previous: Files mirrored by the last sync, relative to dest
+    @checksum: Compare contents of files whose mtime changed but size didn't
+    @link: How to place files, one of LINK_MODES
+    @sizes: Sizes of files rewritten in dest after they were placed, which kept their source's mtime
+    """
+    if link not in LINK_MODES:
+        raise ValueError(f"Unknown link mode: {link}")
+    result = SyncResult()
+    dest.mkdir(parents=True, exist_ok=True)
+    for dirpath, dirnames, filenames in os.walk(src):
+        dirnames.sort()
+        directory = Path(dirpath)
+        relative_dir = directory.relative_to(src)
+        (dest / relative_dir).mkdir(exist_ok=True)
+        for name in sorted(filenames):
+            item = directory / name
+            target = dest / relative_dir / name
+            relative = (relative_dir / name).as_posix()
+            result.files.append(relative)
+            if is_unchanged(item, target, item.stat(), checksum, sizes.get(relative) if sizes else None):
+                result.unchanged += 1
+                continue
+            print(f"Copying: {item} -> {target}")
+            place_file(item, target, link)
+            result.copied.append(relative)
+    current = set(result.files)
+    for relative in previous:
+        if relative not in current:
+            print(f"Removing stale file: {dest / relative}")
+            remove_file(dest, dest / relative)
+            result.removed.append(relative)
+    return result
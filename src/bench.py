@@ -0,0 +1,392 @@
+import argparse
+import json
+import platform
+import random
+import re
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field, asdict
+from html import escape
+from pathlib import Path
+from htmlnode import escape_text
+from markdown_to_html import (markdown_to_blocks, block_to_block_type, markdown_to_html_node, markdown_to_page,
+                              scan_blocks, first_line_block_type, is_fence, BlockType)
+from extract_markdown import extract_markdown_images, extract_markdown_links
+from textnode import text_to_textnodes
+from template import Template
+
+STAGES = ("read", "blocks", "classify", "inline", "parse", "to_html", "template", "write")
+
+WORDS = (
+    "ring", "shire", "elf", "dwarf", "wizard", "mountain", "river", "forest", "tower", "sword",
+    "journey", "shadow", "light", "council", "king", "road", "song", "star", "stone", "fire",
+    "the", "of", "and", "a", "to", "in", "with", "under", "over", "beyond",
+)
+
+DEFAULT_BLOCK_MIX = {
+    BlockType.PARAGRAPH: 6,
+    BlockType.HEADING: 2,
+    BlockType.UNORDERED_LIST: 2,
+    BlockType.ORDERED_LIST: 1,
+    BlockType.QUOTE: 1,
+    BlockType.CODE: 1,
+}
+
+
+@dataclass
+class CorpusConfig:
+    """Shape of a synthetic content/ tree.
+    @pages: Number of markdown pages to generate
+    @blocks: Blocks per page, after the title
+    @block_mix: Relative weight of each BlockType
+    @inline_density: Chance (0-1) that a word starts an inline element
+    @nesting_depth: How many bold/italic spans may nest inside each other
+    @pages_per_dir: Pages per generated directory
+    @seed: Seed for the random generator, so corpora are reproducible
+    """
+    pages: int = 200
+    blocks: int = 40
+    block_mix: dict[BlockType, int] = field(default_factory=lambda: dict(DEFAULT_BLOCK_MIX))
+    inline_density: float = 0.1
+    nesting_depth: int = 1
+    pages_per_dir: int = 100
+    seed: int = 0
+
+
+def random_inline(rng: random.Random, config: CorpusConfig, words: int, depth: int = 0) -> str:
+    """Builds a line of text with inline markup at the configured density.
+    @rng: Random generator
+    @config: Corpus shape
+    @words: Number of words in the line
+    @depth: Current emphasis nesting depth
+    """
+    out = []
+    for _ in range(words):
+        word = rng.choice(WORDS)
+        if rng.random() >= config.inline_density:
+            out.append(word)
+            continue
+        kind = rng.randrange(5)
+        if kind < 2 and depth < config.nesting_depth:
+            delimiter = "**" if (kind + depth) % 2 == 0 else "_"
+            inner = random_inline(rng, config, 3, depth + 1)
+            out.append(f"{delimiter}{inner}{delimiter}")
+        elif kind == 2:
+            out.append(f"`{word}()`")
+        elif kind == 3:
+            out.append(f"[{word}](/{word}/{rng.randrange(1000)})")
+        else:
+            out.append(f"![{word}](/images/{word}.png)")
+    return " ".join(out)
+
+
+def random_block(rng: random.Random, config: CorpusConfig, block_type: BlockType) -> str:
+    """Builds one markdown block of the given type.
+    @rng: Random generator
+    @config: Corpus shape
+    @block_type: The BlockType to build
+    """
+    match block_type:
+        case BlockType.HEADING:
+            return "#" * rng.randint(2, 6) + " " + random_inline(rng, config, 5)
+        case BlockType.CODE:
+            lines = [f"    {rng.choice(WORDS)} = {rng.randrange(100)}" for _ in range(rng.randint(2, 10))]
+            return "```py\ndef f():\n" + "\n".join(lines) + "\n```"
+        case BlockType.QUOTE:
+            return "\n".join("> " + random_inline(rng, config, 12) for _ in range(rng.randint(1, 4)))
+        case BlockType.UNORDERED_LIST:
+            return "\n".join("- " + random_inline(rng, config, 8) for _ in range(rng.randint(2, 8)))
+        case BlockType.ORDERED_LIST:
+            return "\n".join(f"{i + 1}. " + random_inline(rng, config, 8) for i in range(rng.randint(2, 8)))
+        case _:
+            return "\n".join(random_inline(rng, config, 14) for _ in range(rng.randint(1, 5)))
+
+
+def generate_corpus(dest: Path, config: CorpusConfig) -> list[Path]:
+    """Writes a synthetic content/ tree and returns the generated markdown paths.
+    @dest: Directory to generate into
+    @config: Corpus shape
+    """
+    rng = random.Random(config.seed)
+    types = list(config.block_mix)
+    weights = [config.block_mix[t] for t in types]
+    paths = []
+    for page in range(config.pages):
+        blocks = [f"# Page {page}"]
+        blocks.extend(random_block(rng, config, t) for t in rng.choices(types, weights, k=config.blocks))
+        path = dest / f"section{page // config.pages_per_dir}" / f"page{page}" / "index.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n\n".join(blocks) + "\n", encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def run_benchmark(sources: list[Path], template: Template, out_dir: Path, repeat: int = 3) -> dict:
+    """Times every build stage separately over the given sources.
+    Each stage keeps its best total over the repeats.
+    @sources: Markdown files to build
+    @template: Compiled page template
+    @out_dir: Directory the pages are written to
+    @repeat: Number of timed runs
+    """
+    best = {stage: float("inf") for stage in STAGES}
+    total_bytes = 0
+    for _ in range(repeat):
+        times = dict.fromkeys(STAGES, 0)
+        total_bytes = 0
+        for i, src in enumerate(sources):
+            t0 = time.perf_counter_ns()
+            markdown = src.read_text(encoding="utf-8")
+            t1 = time.perf_counter_ns()
+            blocks = markdown_to_blocks(markdown)
+            t2 = time.perf_counter_ns()
+            for block in blocks:
+                block_to_block_type(block)
+            t3 = time.perf_counter_ns()
+            inline_texts = [" ".join(block.lines) for block in scan_blocks(markdown) if block.block_type != BlockType.CODE]
+            t4 = time.perf_counter_ns()
+            for text in inline_texts:
+                text_to_textnodes(text)
+            t5 = time.perf_counter_ns()
+            parsed = markdown_to_page(markdown)
+            t6 = time.perf_counter_ns()
+            html = parsed.root.to_html()
+            t7 = time.perf_counter_ns()
+            page = template.render(Content=html, Title=escape_text(parsed.title))
+            t8 = time.perf_counter_ns()
+            (out_dir / f"{i}.html").write_text(page, encoding="utf-8")
+            t9 = time.perf_counter_ns()
+            times["read"] += t1 - t0
+            times["blocks"] += t2 - t1
+            times["classify"] += t3 - t2
+            times["inline"] += t5 - t4  # Collecting the inline texts isn't part of the stage
+            times["parse"] += t6 - t5
+            times["to_html"] += t7 - t6
+            times["template"] += t8 - t7
+            times["write"] += t9 - t8
+            total_bytes += len(markdown)
+        for stage, ns in times.items():
+            best[stage] = min(best[stage], ns / 1e9)
+    return {
+        "pages": len(sources),
+        "bytes": total_bytes,
+        "stages": {
+            stage: {"seconds": seconds, "us_per_page": seconds * 1e6 / max(len(sources), 1)}
+            for stage, seconds in best.items()
+        },
+        "total_seconds": sum(best.values()),
+    }
+
+
+HEADING_PREFIXES = ("# ", "## ", "### ", "#### ", "##### ", "###### ")
+
+
+def startswith_block_type(line: str) -> BlockType:
+    """The startswith chain first_line_block_type used before its dispatch table, as a baseline.
+    @line: The stripped first line of a block
+    """
+    if line.startswith(HEADING_PREFIXES):
+        return BlockType.HEADING
+    if is_fence(line):
+        return BlockType.CODE
+    if line.startswith(">"):
+        return BlockType.QUOTE
+    if line.startswith("- "):
+        return BlockType.UNORDERED_LIST
+    if line.startswith("1. "):
+        return BlockType.ORDERED_LIST
+    return BlockType.PARAGRAPH
+
+
+def raw_pattern_extract(text: str) -> tuple[list, list]:
+    """Extracts images and links with pattern strings passed to re.findall, as a baseline.
+    @text: Inline markdown text
+    """
+    return (re.findall(r"!\[([^\]]*)\]\(([^)]+)\)", text),
+            re.findall(r"(?<!!)\[([^\]]+)\]\(([^)]+)\)", text))
+
+
+def compiled_extract(text: str) -> tuple[list, list]:
+    """Extracts images and links with the precompiled patterns of extract_markdown.
+    @text: Inline markdown text
+    """
+    return extract_markdown_images(text), extract_markdown_links(text)
+
+
+def stdlib_escape_text(text: str) -> str:
+    """Escapes text with html.escape on every call, as a baseline.
+    @text: Text of a block
+    """
+    return escape(text, quote=False)
+
+
+# Microbenchmark -> implementation -> function, the first implementation being the baseline
+MICROBENCHMARKS = {
+    "classify": {"startswith": startswith_block_type, "dispatch": first_line_block_type},
+    "extract": {"raw_pattern": raw_pattern_extract, "compiled": compiled_extract},
+    "escape": {"stdlib": stdlib_escape_text, "fast_path": escape_text},
+}
+
+
+def run_microbenchmarks(sources: list[Path], repeat: int = 3) -> dict:
+    """Times alternative implementations of the hot block and inline helpers on the same inputs.
+    Classification runs on the first line of every block, extraction on every non-code block's text
+    and escaping on every block's text.
+    Raises ValueError if two implementations disagree, since a faster wrong answer isn't a result.
+    @sources: Markdown files to take the inputs from
+    @repeat: Number of timed runs; the best is kept
+    """
+    inputs = {"classify": [], "extract": [], "escape": []}
+    for src in sources:
+        for block in scan_blocks(src.read_text(encoding="utf-8")):
+            inputs["classify"].append(block.lines[0])
+            inputs["escape"].append("\n".join(block.lines))
+            if block.block_type != BlockType.CODE:
+                inputs["extract"].append(" ".join(block.lines))
+    results = {}
+    for name, implementations in MICROBENCHMARKS.items():
+        items = inputs[name]
+        expected = None
+        results[name] = {}
+        for label, function in implementations.items():
+            outputs = [function(item) for item in items]
+            if expected is None:
+                expected = outputs
+            elif outputs != expected:
+                raise ValueError(f"{name}: {label} disagrees with {next(iter(implementations))}")
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter_ns()
+                for item in items:
+                    function(item)
+                best = min(best, time.perf_counter_ns() - start)
+            results[name][label] = {"items": len(items), "ns_per_item": best / max(len(items), 1)}
+    return results
+
+
+def measure_memory(markdown: str) -> dict:
+    """Measures the memory and allocations of the HtmlNode tree built for one document.
+    @markdown: The document to parse
+    """
+    tracemalloc.start()
+    try:
+        root = markdown_to_html_node(markdown)
+        retained, peak = tracemalloc.get_traced_memory()
+        allocations = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    finally:
+        tracemalloc.stop()
+    del root
+    return {"bytes": len(markdown), "retained_bytes": retained, "peak_bytes": peak, "live_allocations": allocations}
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> list[str]:
+    """Lists the stages that got slower than baseline by more than threshold (a fraction).
+    @result: Output of run_benchmark
+    @baseline: An earlier output of run_benchmark, e.g. loaded from JSON
+    @threshold: Allowed slowdown, e.g. 0.1 for 10%
+    """
+    regressions = []
+    for stage, timing in result["stages"].items():
+        old = baseline.get("stages", {}).get(stage)
+        if not old or old["us_per_page"] <= 0:
+            continue
+        change = timing["us_per_page"] / old["us_per_page"] - 1
+        if change > threshold:
+            regressions.append(f"{stage}: {old['us_per_page']:.1f}us -> {timing['us_per_page']:.1f}us per page (+{change:.0%})")
+    return regressions
+
+
+def git_revision() -> str | None:
+    """Returns the short hash of the checked out commit, or None outside a git checkout."""
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parses the benchmark's command line options.
+    @argv: Arguments to parse, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(description="Benchmark each stage of the build on a synthetic corpus")
+    parser.add_argument("--pages", type=int, default=200, help="Number of pages to generate")
+    parser.add_argument("--blocks", type=int, default=40, help="Blocks per page")
+    parser.add_argument("--inline-density", type=float, default=0.1, help="Chance that a word starts inline markup")
+    parser.add_argument("--nesting-depth", type=int, default=1, help="How deep bold/italic spans nest")
+    parser.add_argument("--mix", default=None,
+                        help="Block weights, e.g. paragraph=6,heading=2,code=1 (unlisted types are not generated)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage; the best is kept")
+    parser.add_argument("--memory", action="store_true",
+                        help="Also measure the memory of the tree built for the largest page")
+    parser.add_argument("--micro", action="store_true",
+                        help="Also compare block classification, link extraction and escaping against their previous implementations")
+    parser.add_argument("--content", type=Path, default=None, help="Benchmark an existing content directory instead")
+    parser.add_argument("--template", type=Path, default=Path("template.html"), help="Template to render with")
+    parser.add_argument("--output", type=Path, default=None, help="Write the results as JSON to this file")
+    parser.add_argument("--compare", type=Path, default=None, help="Earlier JSON results to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Allowed slowdown per stage before failing")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None):
+    args = parse_args(argv)
+    config = CorpusConfig(args.pages, args.blocks, inline_density=args.inline_density,
+                          nesting_depth=args.nesting_depth, seed=args.seed)
+    if args.mix:
+        config.block_mix = {}
+        for item in args.mix.split(","):
+            name, weight = item.split("=")
+            config.block_mix[BlockType(name.strip())] = int(weight)
+    template = Template.load(args.template)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if args.content is not None:
+            sources = sorted(args.content.rglob("*.md"))
+        else:
+            sources = generate_corpus(tmp / "content", config)
+        out_dir = tmp / "docs"
+        out_dir.mkdir()
+        result = run_benchmark(sources, template, out_dir, args.repeat)
+        if args.memory:
+            largest = max(sources, key=lambda path: path.stat().st_size)
+            result["memory"] = measure_memory(largest.read_text(encoding="utf-8"))
+        if args.micro:
+            result["micro"] = run_microbenchmarks(sources, args.repeat)
+    config_json = asdict(config)
+    config_json["block_mix"] = {t.value: w for t, w in config.block_mix.items()}
+    result = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "config": config_json if args.content is None else {"content": str(args.content)},
+        **result,
+    }
+    for stage, timing in result["stages"].items():
+        print(f"{stage:>10}: {timing['seconds']:9.4f}s {timing['us_per_page']:10.1f}us/page")
+    print(f"{'total':>10}: {result['total_seconds']:9.4f}s for {result['pages']} pages, {result['bytes']} bytes")
+    if "memory" in result:
+        memory = result["memory"]
+        print(f"{'memory':>10}: {memory['retained_bytes'] / 1e6:.1f}MB retained, {memory['peak_bytes'] / 1e6:.1f}MB peak, "
+              f"{memory['live_allocations']} allocations for a {memory['bytes']} byte page")
+    for name, implementations in result.get("micro", {}).items():
+        baseline = next(iter(implementations.values()))["ns_per_item"]
+        for label, timing in implementations.items():
+            speedup = baseline / timing["ns_per_item"] if timing["ns_per_item"] else 0.0
+            print(f"{name:>10}: {label:<12} {timing['ns_per_item']:8.1f}ns/item ({speedup:.2f}x) "
+                  f"over {timing['items']} items")
+    if args.output is not None:
+        with args.output.open("w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    if args.compare is not None:
+        with args.compare.open("r", encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"Regression: {line}")
+        if regressions:
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
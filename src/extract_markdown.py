@@ -1,31 +1,30 @@
 import re
 
+IMAGE_PATTERN = re.compile(r"!\[([^\]]*)\]\(([^)]+)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\]]+)\]\(([^)]+)\)")
+TITLE_PATTERN = re.compile(r"^(#+)\s*(.+)$")
+
 def extract_markdown_images(text):
     """Extracts markdown image links from the given text.
     @text: The input text containing markdown image links.
     Returns a list of tuples (alt_text, url).
     """
-    pattern = r"!\[([^\]]*)\]\(([^)]+)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return IMAGE_PATTERN.findall(text)
 
 def extract_markdown_links(text):
     """Extracts markdown links from the given text.
     @text: The input text containing markdown links.
     Returns a list of tuples (link_text, url).
     """
-    pattern = r"(?<!!)\[([^\]]+)\]\(([^)]+)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return LINK_PATTERN.findall(text)
 
 def extract_title(text):
     """Extracts the first markdown header 1 (#) from the given text.
     @text: The input text in markdown syntax
     Returns the title text without markdown syntax, or raises an error if none is found
     """
-    pattern = r"^(#+)\s*(.+)$"
     for line in text.splitlines():
-        match = re.match(pattern, line.strip())
+        match = TITLE_PATTERN.match(line.strip())
         if match:
             return match.group(2).strip()
     raise ValueError("No header 1 found in the provided markdown text.")
\ No newline at end of file
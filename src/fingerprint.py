@@ -0,0 +1,99 @@
+import hashlib
+import json
+from pathlib import Path, PurePosixPath
+from assets import place_file, remove_file
+from manifest import AssetEntry, hash_file
+from optimize import MINIFIERS
+
+ASSET_MAP_NAME = "assets.json"
+# Files pages link to that are worth caching forever; everything else keeps only its plain name
+FINGERPRINT_SUFFIXES = frozenset((
+    ".css", ".js", ".mjs", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg", ".ico",
+    ".woff", ".woff2", ".ttf", ".otf",
+))
+FINGERPRINT_LENGTH = 10
+
+
+def fingerprint_name(relative: str, fingerprint: str) -> str:
+    """Puts a fingerprint between a file's stem and suffix, e.g. index.css -> index.3f2a9c0b1d.css.
+    @relative: Path of the file, as a posix path
+    @fingerprint: Hex digest of the file's contents
+    """
+    path = PurePosixPath(relative)
+    return path.with_name(f"{path.stem}.{fingerprint[:FINGERPRINT_LENGTH]}{path.suffix}").as_posix()
+
+
+def asset_urls(entries: dict[str, AssetEntry]) -> dict[str, str]:
+    """Returns the root relative URL -> fingerprinted URL map of the fingerprinted files.
+    @entries: Map of static file path to its AssetEntry
+    """
+    return {f"/{relative}": f"/{entry.name}" for relative, entry in sorted(entries.items())}
+
+
+def write_asset_map(dest: Path, urls: dict[str, str]):
+    """Writes the asset map to dest for deploy tooling, only when it changed, and removes it when it is empty.
+    @dest: Destination directory
+    @urls: Root relative URL -> fingerprinted URL
+    """
+    path = dest / ASSET_MAP_NAME
+    if not urls:
+        path.unlink(missing_ok=True)
+        return
+    text = json.dumps(urls, indent=1) + "\n"
+    try:
+        if path.read_text(encoding="utf-8") == text:
+            return
+    except FileNotFoundError:
+        pass
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    tmp.replace(path)
+
+
+def fingerprint_assets(static: Path, dest: Path, files: list[str], previous: dict[str, AssetEntry],
+                       salt: str = "", link: str = "copy") -> tuple[dict[str, AssetEntry], list[str]]:
+    """Publishes a content addressed copy of every static file pages link to, next to its plain name.
+    Sources are only hashed when their size or mtime changed. A copy whose name already exists
+    is current by construction and left alone; copies no longer named by any file are removed.
+    Plain names stay, so references this build doesn't rewrite (e.g. url() in stylesheets) keep working.
+    The asset map is written to dest/assets.json.
+    Returns the new entries and the copies placed, relative to dest.
+    @static: Directory of static files
+    @dest: Destination directory the static files were synced to
+    @files: Synced files relative to dest, as posix paths; empty to remove every fingerprinted copy
+    @previous: Entries of the last build
+    @salt: Mixed into the fingerprints of files minification rewrites, so their names change when it is turned on or off
+    @link: How the static files were synced to dest, one of LINK_MODES
+    """
+    # A copy shares the published file's inode unless that file is a hardlink into static/ itself,
+    # where an in place edit of any one of the three paths would change all of them
+    mode = "reflink" if link == "hardlink" else "hardlink"
+    entries, placed = {}, []
+    for relative in files:
+        if PurePosixPath(relative).suffix.lower() not in FINGERPRINT_SUFFIXES:
+            continue
+        stat = (static / relative).stat()
+        old = previous.get(relative)
+        if old is not None and old.size == stat.st_size and old.mtime_ns == stat.st_mtime_ns:
+            digest = old.digest
+        else:
+            digest = hash_file(static / relative)
+        if salt and PurePosixPath(relative).suffix in MINIFIERS:
+            fingerprint = hashlib.sha256(f"{digest}\0{salt}".encode()).hexdigest()
+        else:
+            fingerprint = digest
+        entry = entries[relative] = AssetEntry(digest, stat.st_size, stat.st_mtime_ns,
+                                               fingerprint_name(relative, fingerprint))
+        target = dest / entry.name
+        # Copies an earlier build hardlinked into static/ are placed again
+        if not target.exists() or (link == "hardlink" and target.samefile(static / relative)):
+            print(f"Fingerprinting: {dest / relative} -> {target}")
+            place_file(dest / relative, target, mode)
+            placed.append(entry.name)
+    names = {entry.name for entry in entries.values()}
+    for entry in previous.values():
+        if entry.name not in names:
+            print(f"Removing stale fingerprinted file: {dest / entry.name}")
+            remove_file(dest, dest / entry.name)
+    write_asset_map(dest, asset_urls(entries))
+    return entries, placed
@@ -0,0 +1,105 @@
+import io
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable
+
+FENCE = "---"
+TRUE_VALUES = ("true", "yes", "1")
+FALSE_VALUES = ("false", "no", "0", "")
+
+
+def unquote(value: str) -> str:
+    """Strips one pair of matching quotes from a front matter value."""
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+@dataclass
+class FrontMatter:
+    """The fields a page declares in its front matter.
+    @title: Page title, used instead of the first heading
+    @date: Publication date, e.g. 2024-05-01 or 2024-05-01T09:30
+    @tags: Tags, written as `a, b` or `[a, b]`
+    @template: Name of the template in the templates directory to render the page with
+    @draft: Whether the page is unfinished
+    @fields: Every field as written, keyed by lower case name
+    """
+    title: str | None = None
+    date: datetime | None = None
+    tags: list[str] = field(default_factory=list)
+    template: str | None = None
+    draft: bool = False
+    fields: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_fields(cls, fields: dict[str, str]) -> "FrontMatter":
+        """Interprets the known fields. Raises ValueError for a malformed date or draft flag.
+        @fields: Raw fields from parse_front_matter
+        """
+        date = fields.get("date")
+        if date:
+            try:
+                date = datetime.fromisoformat(date)
+            except ValueError:
+                raise ValueError(f"Invalid date in front matter: {date}") from None
+        tags = fields.get("tags", "")
+        if tags.startswith("[") and tags.endswith("]"):
+            tags = tags[1:-1]
+        draft = fields.get("draft", "").lower()
+        if draft not in TRUE_VALUES + FALSE_VALUES:
+            raise ValueError(f"Invalid draft flag in front matter: {draft}")
+        return cls(
+            title=fields.get("title") or None,
+            date=date or None,
+            tags=[unquote(tag.strip()) for tag in tags.split(",") if tag.strip()],
+            template=fields.get("template") or None,
+            draft=draft in TRUE_VALUES,
+            fields=fields,
+        )
+
+
+def parse_front_matter(lines: Iterable[str]) -> tuple[dict[str, str], int]:
+    """Reads a block of `key: value` lines fenced by --- lines from the start of a document.
+    Stops at the closing fence, so the rest of the document is never looked at.
+    Returns the fields and the number of lines they took up, or ({}, 0) without front matter.
+    @lines: The document's lines, with or without their line endings
+    """
+    lines = iter(lines)
+    if next(lines, "").rstrip() != FENCE:
+        return {}, 0
+    fields = {}
+    for count, line in enumerate(lines, start=2):
+        stripped = line.strip()
+        if stripped == FENCE:
+            return fields, count
+        if not stripped or stripped.startswith("#"):
+            continue
+        key, separator, value = stripped.partition(":")
+        if not separator:
+            raise ValueError(f"Invalid front matter line: {stripped}")
+        fields[key.strip().lower()] = unquote(value.strip())
+    raise ValueError(f"Front matter is not closed with {FENCE}")
+
+
+def split_front_matter(markdown: str) -> tuple[dict[str, str], str]:
+    """Separates the front matter from a markdown document.
+    Returns the fields and the markdown that follows them.
+    @markdown: The whole document
+    """
+    fields, count = parse_front_matter(io.StringIO(markdown))
+    end = 0
+    for _ in range(count):
+        end = markdown.find("\n", end) + 1 or len(markdown)
+    return fields, markdown[end:]
+
+
+def read_front_matter(path: Path) -> FrontMatter:
+    """Returns the front matter of a markdown file, reading no further than its closing fence.
+    Site-wide passes (templates, listings) use this to skip the bodies of pages.
+    @path: The markdown file
+    """
+    # Lines are decoded one by one: a text mode file would decode a whole buffer past the header
+    with path.open("rb") as f:
+        return FrontMatter.from_fields(parse_front_matter(line.decode("utf-8") for line in f)[0])
@@ -0,0 +1,76 @@
+import hashlib
+from collections import OrderedDict
+
+try:
+    from pygments import highlight as pygments_highlight
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name
+    from pygments.util import ClassNotFound
+except ImportError:  # Optional, fenced code is left unhighlighted without it
+    get_lexer_by_name = None
+
+
+def fence_language(fence: str) -> str | None:
+    """Returns the language a fence's info string names, e.g. py for ```py title="x", None if it names none.
+    @fence: The stripped opening fence line
+    """
+    info = fence[3:].split(maxsplit=1)
+    return info[0].lower() if info else None
+
+
+class Highlighter:
+    """Highlights code into Pygments' <span class="..."> tokens.
+    Lexers are loaded the first time their language is seen and kept, and highlighted
+    snippets are kept in a bounded LRU keyed by (language, sha256 of the code), since
+    highlighting is the most expensive part of a page and snippets repeat across pages.
+    @maxsize: Number of highlighted snippets to keep
+    """
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.lexers = {}
+        self.snippets: OrderedDict[tuple[str, bytes], str] = OrderedDict()
+        self.formatter = HtmlFormatter(nowrap=True) if get_lexer_by_name is not None else None
+        self.hits = 0
+        self.misses = 0
+
+    def lexer(self, language: str):
+        """Returns the lexer of a language, loading it on first use, None if there is no such lexer.
+        @language: Language name or alias, e.g. py
+        """
+        try:
+            return self.lexers[language]
+        except KeyError:
+            pass
+        lexer = None
+        if get_lexer_by_name is not None:
+            try:
+                # Keep the code's leading and trailing newlines, the page shows exactly what was written
+                lexer = get_lexer_by_name(language, stripnl=False, ensurenl=False)
+            except ClassNotFound:
+                pass
+        self.lexers[language] = lexer
+        return lexer
+
+    def highlight(self, language: str, code: str) -> str | None:
+        """Returns code as escaped HTML with its tokens in spans, None if the language has no lexer.
+        @language: Language name or alias, e.g. py
+        @code: The code to highlight
+        """
+        lexer = self.lexer(language)
+        if lexer is None:
+            return None
+        key = (language, hashlib.sha256(code.encode("utf-8")).digest())
+        html = self.snippets.get(key)
+        if html is not None:
+            self.snippets.move_to_end(key)
+            self.hits += 1
+            return html
+        self.misses += 1
+        html = self.snippets[key] = pygments_highlight(code, lexer, self.formatter)
+        if len(self.snippets) > self.maxsize:
+            self.snippets.popitem(last=False)
+        return html
+
+
+# Shared by every page a process renders
+HIGHLIGHTER = Highlighter()
@@ -1,4 +1,27 @@
 from dataclasses import dataclass, field
+from functools import lru_cache
+from html import escape
+from typing import Iterator, TextIO
+
+
+# Escapes text for use between tags. Most text has nothing to escape, and three
+# substring checks cost far less than escape's replace passes.
+def escape_text(text: str) -> str:
+    if "&" in text or "<" in text or ">" in text:
+        return escape(text, quote=False)
+    return text
+
+# Escapes an attribute value for use between double quotes
+def escape_attribute(value: str) -> str:
+    if "&" in value or "<" in value or ">" in value or '"' in value or "'" in value:
+        return escape(value)
+    return value
+
+# Serializes (name, value) pairs as HTML attributes. Nodes share few distinct
+# attribute dicts (the same links, the same alignments), so each is built once.
+@lru_cache(maxsize=4096)
+def serialize_props(items: tuple[tuple[str, str], ...]) -> str:
+    return " ".join([f'{k}="{escape_attribute(v)}"' for k, v in items])
 
 """Representation of a node in an HTML document tree
 @tag: The HTML tag (e.g., 'div', 'p', etc.).
@@ -6,7 +29,7 @@ from dataclasses import dataclass, field
 @children: List of child HtmlNode objects.
 @props: Dictionary of HTML properties/attributes for the tag.
 """
-@dataclass
+@dataclass(slots=True)
 class HtmlNode:
     tag: str | None = None
     value: str | None = None
@@ -14,15 +37,23 @@ class HtmlNode:
     props: dict[str, str] | None = None
 
     
-    # Child classes will overwrite this method to render themselves as HTML
-    def to_html(self):
+    # Child classes will overwrite this method to yield their HTML in pieces
+    def iter_html(self) -> Iterator[str]:
         raise NotImplementedError("Must be overwritten in subclass")
+
+    # Render the node as a single HTML string
+    def to_html(self) -> str:
+        return "".join(self.iter_html())
+
+    # Stream the node's HTML into a file-like object without building the whole string
+    def write_html(self, stream: TextIO):
+        stream.writelines(self.iter_html())
     
-    # Return HTML attributes as a string
+    # Return HTML attributes as a string, with their values escaped
     def props_to_html(self) -> str:
         if not self.props:
             return ""
-        return " ".join([f'{k}="{v}"' for k, v in self.props.items()])
+        return serialize_props(tuple(self.props.items()))
     
     def __repr__(self):
         return f"HtmlNode(tag={self.tag!r}, value={self.value!r}, children={self.children!r}, props={self.props!r})"
@@ -33,21 +64,40 @@ class HtmlNode:
 @children: Cannot have children (always None).
 @props: Dictionary of HTML properties/attributes for the tag.
 """
-@dataclass
+@dataclass(slots=True)
 class LeafNode(HtmlNode):
     value: str = None
     tag: str = None
     children: None = None
 
-    # Renders the leaf node as HTML
+    # Renders the leaf node as HTML, escaping its text.
+    # escape_text and props_to_html are inlined, leaves being the bulk of every page.
     def to_html(self):
-        props_str = self.props_to_html()
-        if props_str:
-            return f"<{self.tag} {props_str}>{self.value}</{self.tag}>"
+        value = self.value
+        if "&" in value or "<" in value or ">" in value:
+            value = escape(value, quote=False)
+        if self.props:
+            return f"<{self.tag} {serialize_props(tuple(self.props.items()))}>{value}</{self.tag}>"
         elif self.tag:
-            return f"<{self.tag}>{self.value}</{self.tag}>"
+            return f"<{self.tag}>{value}</{self.tag}>"
         else:
-            return self.value
+            return value
+
+    # A leaf is small enough to render in one piece
+    def iter_html(self) -> Iterator[str]:
+        yield self.to_html()
+
+"""Representation of HTML that is already rendered, e.g. a cached inline fragment
+@tag: Cannot have a tag (always None).
+@value: The HTML text, written out as is.
+@children: Cannot have children (always None).
+@props: Cannot have props (always None).
+"""
+@dataclass(slots=True)
+class RawNode(LeafNode):
+    # The value is HTML already, escaping it again would show its tags as text
+    def to_html(self):
+        return self.value
 
 """Representation of a Parent Node in an HTML document tree
 @tag: Required HTML tag (e.g., 'div', 'p', etc.).
@@ -55,21 +105,47 @@ class LeafNode(HtmlNode):
 @children: Required List of child HtmlNode objects.
 @props: Dictionary of HTML properties/attributes for the tag.
 """  
-@dataclass
+@dataclass(slots=True)
 class ParentNode(HtmlNode):
-    children: list["HtmlNode"]
-    tag: str
+    # Defaults mirror what the un-slotted dataclass inherited from HtmlNode,
+    # a missing tag or children is reported by to_html
+    children: list["HtmlNode"] = None
+    tag: str = None
     value: None = None
 
-    # Renders the parent node and its children as HTML
-    def to_html(self):
+    # Returns the opening tag, checking the node can be rendered
+    def open_tag(self) -> str:
         if self.tag is None:
             raise ValueError("ParentNode must have a tag to render HTML")
         if not self.children:
             raise ValueError("ParentNode must have children to render HTML")
         props_str = self.props_to_html()
-        children_html = "".join([child.to_html() for child in self.children])
         if props_str:
-            return f"<{self.tag} {props_str}>{children_html}</{self.tag}>"
-        else:
-            return f"<{self.tag}>{children_html}</{self.tag}>"
+            return f"<{self.tag} {props_str}>"
+        return f"<{self.tag}>"
+
+    # Renders the parent node and its children as HTML, joining each subtree once it closes.
+    # Walks the tree with an explicit stack so deep documents don't hit the recursion limit.
+    def to_html(self) -> str:
+        stack = [(self, iter(self.children), [self.open_tag()])]
+        while True:
+            node, children, parts = stack[-1]
+            for child in children:
+                if isinstance(child, ParentNode):
+                    stack.append((child, iter(child.children), [child.open_tag()]))
+                    break
+                parts.append(child.to_html())
+            else:
+                parts.append(f"</{node.tag}>")
+                html = "".join(parts)
+                stack.pop()
+                if not stack:
+                    return html
+                stack[-1][2].append(html)
+
+    # Yields the node's HTML one child at a time, so streaming holds at most one block in memory
+    def iter_html(self) -> Iterator[str]:
+        yield self.open_tag()
+        for child in self.children:
+            yield child.to_html()
+        yield f"</{self.tag}>"
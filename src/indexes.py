@@ -0,0 +1,232 @@
+import hashlib
+import json
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from pathlib import Path
+from assets import remove_file
+from htmlnode import HtmlNode, LeafNode, ParentNode, escape_attribute, escape_text
+from manifest import BuildManifest, PageEntry
+from template import Template, rebase_urls
+
+BLOG_DIR = "blog"
+TAGS_DIR = "tags"
+SITEMAP_NAME = "sitemap.xml"
+RSS_NAME = "rss.xml"
+ATOM_NAME = "atom.xml"
+
+
+def page_url(output: str) -> str:
+    """Returns the root relative URL of a generated file, dropping a trailing index.html.
+    @output: Path of the file relative to the destination directory
+    """
+    if output == "index.html" or output.endswith("/index.html"):
+        output = output[:-len("index.html")]
+    return "/" + output
+
+
+def tag_slug(tag: str) -> str:
+    """Turns a tag into the directory name of its page, e.g. "Middle Earth" -> "middle-earth".
+    @tag: The tag as written in front matter
+    """
+    slug = "".join(c if c.isalnum() else "-" for c in tag.lower())
+    return "-".join(part for part in slug.split("-") if part) or "tag"
+
+
+@dataclass
+class IndexPage:
+    """What the indexes need to know about one page.
+    @url: Root relative URL of the page
+    @title: The page's title
+    @updated: ISO timestamp of the page's date, or of its source's mtime when it has none
+    @date: The front matter date, None if the page has none
+    @tags: The page's tags
+    """
+    url: str
+    title: str
+    updated: str
+    date: str | None = None
+    tags: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_entry(cls, entry: PageEntry) -> "IndexPage":
+        """Takes a page's details from its manifest entry, without reading the page.
+        @entry: The page's entry in the manifest
+        """
+        if entry.date:
+            updated = datetime.fromisoformat(entry.date)
+        else:
+            updated = datetime.fromtimestamp(entry.mtime_ns / 1e9, timezone.utc)
+        if updated.tzinfo is None:
+            updated = updated.replace(tzinfo=timezone.utc)
+        return cls(page_url(entry.output), entry.title or entry.output, updated.isoformat(timespec="seconds"),
+                   entry.date, list(entry.tags))
+
+
+@dataclass
+class SiteIndex:
+    """The pages the generated indexes list, built from the manifest so no source is read again.
+    Drafts are left out everywhere.
+    @title: The site's title, taken from the home page
+    @pages: Every published page, for the sitemap
+    @posts: Published pages under the blog directory, newest first
+    """
+    title: str
+    pages: list[IndexPage]
+    posts: list[IndexPage]
+
+    @classmethod
+    def collect(cls, manifest: BuildManifest, blog_dir: str = BLOG_DIR) -> "SiteIndex":
+        """Gathers the published pages recorded in a manifest.
+        @manifest: State of the build, with every rendered page's metadata
+        @blog_dir: Directory of content/ whose pages are posts
+        """
+        published = {key: entry for key, entry in sorted(manifest.pages.items()) if not entry.draft}
+        posts = [IndexPage.from_entry(entry) for key, entry in published.items()
+                 if key.startswith(blog_dir + "/") and key != f"{blog_dir}/index.md"]
+        # Newest first, and alphabetical among posts from the same moment
+        posts.sort(key=lambda post: post.title)
+        posts.sort(key=lambda post: post.updated, reverse=True)
+        home = manifest.pages.get("index.md")
+        title = home.title if home is not None and home.title else "Home"
+        return cls(title, [IndexPage.from_entry(entry) for entry in published.values()], posts)
+
+    def tags(self) -> dict[str, list[IndexPage]]:
+        """Returns the posts of each tag, tags sorted by name and posts newest first."""
+        tags = {}
+        for post in self.posts:
+            for tag in post.tags:
+                tags.setdefault(tag, []).append(post)
+        return dict(sorted(tags.items(), key=lambda item: item[0].lower()))
+
+
+def post_list(posts: list[IndexPage]) -> HtmlNode:
+    """Builds a list of links to posts, with their dates.
+    @posts: The posts to list
+    """
+    items = []
+    for post in posts:
+        children = [LeafNode(tag="a", value=post.title, props={"href": post.url})]
+        if post.date:
+            children.append(LeafNode(tag=None, value=" "))
+            children.append(LeafNode(tag="time", value=post.date[:10], props={"datetime": post.date}))
+        items.append(ParentNode(tag="li", children=children))
+    return ParentNode(tag="ul", children=items)
+
+
+def render_listing(template: Template, title: str, body: HtmlNode) -> str:
+    """Renders a generated page through the site template.
+    @template: The default page template
+    @title: Title of the page
+    @body: Content below the page's heading
+    """
+    root = ParentNode(tag="div", children=[LeafNode(tag="h1", value=title), body])
+    rebase_urls(root, template.basepath, template.assets)
+    return template.render(Content=root.to_html(), Title=escape_text(title))
+
+
+def render_feeds(index: SiteIndex, site_url: str, basepath: str) -> dict[str, str]:
+    """Renders the RSS and Atom feeds of the posts and the sitemap of every page.
+    @index: The pages to list
+    @site_url: Scheme and host the site is served from, e.g. https://example.com
+    @basepath: Base path the site is served from
+    """
+    # Used in both attributes and text, so escaped for attributes
+    def absolute(url: str) -> str:
+        return escape_attribute(site_url.rstrip("/") + basepath.rstrip("/") + url)
+
+    home = absolute("/")
+    title = escape_text(index.title)
+    rss_items, atom_entries = [], []
+    for post in index.posts:
+        link = absolute(post.url)
+        categories = "".join(f"<category>{escape_text(tag)}</category>" for tag in post.tags)
+        rss_items.append(f"<item><title>{escape_text(post.title)}</title><link>{link}</link><guid>{link}</guid>"
+                         f"<pubDate>{format_datetime(datetime.fromisoformat(post.updated))}</pubDate>{categories}</item>")
+        terms = "".join(f'<category term="{escape_attribute(tag)}"/>' for tag in post.tags)
+        atom_entries.append(f'<entry><title>{escape_text(post.title)}</title><link href="{link}"/><id>{link}</id>'
+                            f"<updated>{post.updated}</updated>{terms}</entry>")
+    updated = index.posts[0].updated if index.posts else datetime.fromtimestamp(0, timezone.utc).isoformat()
+    urls = "".join(f"<url><loc>{absolute(page.url)}</loc><lastmod>{page.updated[:10]}</lastmod></url>"
+                   for page in index.pages)
+    header = '<?xml version="1.0" encoding="utf-8"?>\n'
+    return {
+        RSS_NAME: f'{header}<rss version="2.0"><channel><title>{title}</title><link>{home}</link>'
+                  f"<description>{title}</description>{''.join(rss_items)}</channel></rss>\n",
+        ATOM_NAME: f'{header}<feed xmlns="http://www.w3.org/2005/Atom"><title>{title}</title><link href="{home}"/>'
+                   f'<link rel="self" href="{absolute("/" + ATOM_NAME)}"/><id>{home}</id><updated>{updated}</updated>'
+                   f"{''.join(atom_entries)}</feed>\n",
+        SITEMAP_NAME: f'{header}<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>\n',
+    }
+
+
+def render_indexes(index: SiteIndex, template: Template, site_url: str | None = None,
+                   blog_dir: str = BLOG_DIR) -> dict[str, str]:
+    """Renders every generated file.
+    Returns each file's text by its path relative to the destination directory.
+    @index: The pages to list
+    @template: The default page template
+    @site_url: Scheme and host for the feeds and sitemap, which are skipped without it
+    @blog_dir: Directory the blog listing is written to
+    """
+    outputs = {}
+    if index.posts:
+        outputs[f"{blog_dir}/index.html"] = render_listing(template, "Blog", post_list(index.posts))
+        tags = index.tags()
+        if tags:
+            links = [ParentNode(tag="li", children=[
+                LeafNode(tag="a", value=tag, props={"href": f"/{TAGS_DIR}/{tag_slug(tag)}/"}),
+                LeafNode(tag=None, value=f" ({len(posts)})"),
+            ]) for tag, posts in tags.items()]
+            outputs[f"{TAGS_DIR}/index.html"] = render_listing(template, "Tags", ParentNode(tag="ul", children=links))
+            for tag, posts in tags.items():
+                outputs[f"{TAGS_DIR}/{tag_slug(tag)}/index.html"] = render_listing(
+                    template, f"Posts tagged {tag}", post_list(posts))
+    if site_url:
+        outputs.update(render_feeds(index, site_url, template.basepath))
+    return outputs
+
+
+def generate_indexes(dest: Path, manifest: BuildManifest, template: Template, site_url: str | None = None,
+                     blog_dir: str = BLOG_DIR) -> list[str]:
+    """Writes the blog listing, tag pages, feeds and sitemap when what they are built from changed.
+    Everything comes from the page metadata in the manifest, so this never reads a source. The
+    inputs are hashed and nothing is rendered or written when they match the last build's; page
+    mtimes are only hashed with site_url, since only the feeds and sitemap show them.
+    Files generated last time that are no longer needed are removed, and a content page with
+    the same output as a generated file takes precedence over it.
+    Returns the files written, relative to dest.
+    @dest: Destination directory
+    @manifest: State of the build, whose index_digest and index_outputs are updated
+    @template: The default page template
+    @site_url: Scheme and host for the feeds and sitemap, which are skipped without it
+    @blog_dir: Directory of content/ whose pages are posts
+    """
+    index = SiteIndex.collect(manifest, blog_dir)
+    taken = sorted(entry.output for entry in manifest.pages.values())
+    if site_url:
+        rendered = asdict(index)
+    else:
+        # Only the listings are written, which show no mtimes: an undated post's mtime only places it in the order
+        rendered = [[post.url, post.title, post.date, post.tags] for post in index.posts]
+    inputs = json.dumps([rendered, template.parts, site_url, blog_dir, taken])
+    digest = hashlib.sha256(inputs.encode("utf-8")).hexdigest()
+    if digest == manifest.index_digest and all((dest / path).exists() for path in manifest.index_outputs):
+        return []
+    outputs = {path: text for path, text in render_indexes(index, template, site_url, blog_dir).items()
+               if path not in taken}
+    for path in manifest.index_outputs:
+        if path not in outputs and path not in taken:
+            print(f"Removing stale index: {dest / path}")
+            remove_file(dest, dest / path)
+    for path, text in outputs.items():
+        print(f"Generating index {dest / path}")
+        target = dest / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            f.write(text)
+        tmp.replace(target)
+    manifest.index_digest = digest
+    manifest.index_outputs = sorted(outputs)
+    return sorted(outputs)
@@ -1,10 +1,48 @@
+import argparse
+import os
 import shutil
 import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
-from markdown_to_html import markdown_to_html_node
-from extract_markdown import extract_title
+from typing import Callable, TextIO
+from markdown_to_html import InlineCache, markdown_to_page, page_title, require_title
+from htmlnode import escape_text
+from assets import LINK_MODES, SyncResult, place_file, remove_file, sync_files
+from manifest import BuildManifest, MANIFEST_NAME
+from template import Template, TemplateLoader, rebase_urls
+from front_matter import FrontMatter, read_front_matter
+from indexes import generate_indexes
+from render_cache import RenderCache
+from profiling import BuildStats, PageTiming, StageTimer, start_profile, stop_profile
+from watch import TreeWatcher, file_state, serve
+from pipeline import pipelined
+from optimize import COMPRESSIBLE, optimize_files, postprocess_options
+from fingerprint import asset_urls, fingerprint_assets
+from service import RenderService, make_server, serve_stdio
 
-def rm_cp_files(src: Path, dest: Path):
+# Per-process render caches, set up by setup_worker
+INLINE_CACHE: InlineCache | None = None
+RENDER_CACHE: RenderCache | None = None
+WORKER_SETTINGS = (0, "/", None, None)
+
+def setup_worker(inline_cache_size: int = 0, basepath: str = "/", render_cache_dir: Path | None = None,
+                 assets: dict[str, str] | None = None):
+    """Sets up the per-process render state. Runs in the main process and as the pool initializer.
+    Args:
+        inline_cache_size (int): Number of inline fragments to cache, 0 disables the cache.
+        basepath (str): Base path the cached fragments are rendered with.
+        render_cache_dir (Path | None): Directory of the on-disk render cache, None disables it.
+        assets (dict[str, str] | None): Fingerprinted asset URLs the cached fragments are rendered with.
+    """
+    global INLINE_CACHE, RENDER_CACHE, WORKER_SETTINGS
+    WORKER_SETTINGS = (inline_cache_size, basepath, render_cache_dir, assets)
+    INLINE_CACHE = InlineCache(inline_cache_size, basepath, assets) if inline_cache_size > 0 else None
+    RENDER_CACHE = RenderCache(render_cache_dir) if render_cache_dir is not None else None
+
+def rm_cp_files(src: Path, dest: Path) -> SyncResult:
     """Removes files at dest and copies files from src to dest.
     Args:
         src (Path): Source directory path.
@@ -12,20 +50,7 @@ def rm_cp_files(src: Path, dest: Path):
     """
     if dest.exists():
         shutil.rmtree(dest)
-    dest.mkdir(parents=True)
-
-    # Doing without copytree for practice 
-    def recurse_copy(s: Path, d: Path):
-        for item in s.iterdir():
-            target = d / item.name
-            if item.is_file():
-                print(f"Copying: {item} -> {target}")
-                shutil.copy(item, target)
-            elif item.is_dir():
-                target.mkdir()
-                recurse_copy(item, target)
-                
-    recurse_copy(src, dest)
+    return sync_files(src, dest)
 
 def generate_page(src: Path, template_path: Path, dest: Path, basepath: str = "/"):
     """Generates an HTML page from a markdown source and an HTML template.
@@ -36,46 +61,684 @@ def generate_page(src: Path, template_path: Path, dest: Path, basepath: str = "/
         basepath (str): Base path for adjusting relative links in the HTML.
     """
     print(f"Generating page from {src} using template {template_path} to {dest}")
-    markdown, template = None, None
-    with src.open("r", encoding="utf-8") as f:
-        markdown = f.read()
-    with template_path.open("r", encoding="utf-8") as f:
-        template = f.read()
-    if markdown is None or template is None:
-        raise ValueError("Markdown or template content is None")
-    root = markdown_to_html_node(markdown)
-    html_content = root.to_html()
-    title = extract_title(markdown)
-    final_html = template.replace("{{ Content }}", html_content).replace("{{ Title }}", title)
-    final_html = final_html.replace('href="/', f'href="{basepath}').replace('src="/', f'src="{basepath}')
-    with dest.open("w", encoding="utf-8") as f:
-        f.write(final_html)
-
-def generate_page_recursive(src: Path, template_path: Path, dest: Path, basepath: str = "/"):
+    render_page(src, Template.load(template_path, basepath), dest)
+
+def inline_cache_for(template: Template) -> InlineCache | None:
+    """Returns this process's inline cache if it was set up for the template's base path and assets."""
+    if INLINE_CACHE is not None and INLINE_CACHE.basepath == template.basepath and INLINE_CACHE.assets == template.assets:
+        return INLINE_CACHE
+    return None
+
+def render_page(src: Path, template: Template, dest: Path, timed: bool = False,
+                profile_path: Path | None = None) -> tuple[str, PageTiming | None, tuple[int, int]]:
+    """Does the work of generate_page without logging, so it can run in a worker process.
+    The page is written to a temporary file first so a failure never leaves a partial page at dest.
+    Args:
+        src (Path): Path to the markdown source file.
+        template (Template): The compiled HTML template, which carries the base path.
+        dest (Path): Path to the output HTML file.
+        timed (bool): Time each stage. The page is then rendered to a string and
+            written in one go instead of being streamed, so the stages can be told apart.
+        profile_path (Path | None): Run the page under cProfile and write the profile here.
+    Returns:
+        tuple[str, PageTiming | None, tuple[int, int]]: The page's title, the stage timings when
+            timed is set, and the inline cache hits and misses of the page in this process.
+    """
+    cache = inline_cache_for(template)
+    counts = (0, 0)
+    profiler = start_profile(profile_path)
+    timer = StageTimer(src) if timed or profiler is not None else None
+    try:
+        with src.open("r", encoding="utf-8") as f:
+            markdown = f.read()
+        if timer is not None:
+            timer.lap("read")
+        # The article is either streamed from the tree, or held as a string when it
+        # comes from or goes to the render cache, or when the stages are timed
+        article = RENDER_CACHE.get(markdown, template.url_key) if RENDER_CACHE is not None else None
+        if article is None:
+            hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+            # Front matter, blocks and title all come out of one pass over the lines
+            page = markdown_to_page(markdown, cache)
+            root, title = page.root, require_title(page.title)
+            if cache is not None:
+                counts = (cache.hits - hits, cache.misses - misses)
+                if timer is not None:
+                    timer.timing.cache_hits, timer.timing.cache_misses = counts
+            rebase_urls(root, template.basepath, template.assets)
+        else:
+            title = require_title(page_title(markdown))
+        if timer is not None:
+            timer.lap("parse")
+        if article is None and (timer is not None or RENDER_CACHE is not None):
+            article = root.to_html()
+            if RENDER_CACHE is not None:
+                RENDER_CACHE.put(markdown, template.url_key, article)
+        if timer is None:
+            # Streamed, so the page can still fail to render after the temporary file is opened
+            write_atomically(dest, lambda f: template.write(f, Content=article if article is not None else root,
+                                                            Title=escape_text(title)))
+        else:
+            timer.lap("render")
+            final_html = template.render(Content=article, Title=escape_text(title))
+            timer.lap("template")
+            write_atomically(dest, lambda f: f.write(final_html))
+        if timer is not None:
+            timer.lap("write")
+    finally:
+        stop_profile(profiler, profile_path)
+    return title, (timer.timing if timer is not None else None), counts
+
+def write_atomically(dest: Path, write: Callable[[TextIO], object]):
+    """Writes a file through a temporary file next to it, which is removed if writing fails.
+    Args:
+        dest (Path): Path of the file to write.
+        write (Callable[[TextIO], object]): Writes the contents to the open temporary file.
+    """
+    tmp = dest.with_name(dest.name + ".tmp")
+    try:
+        with tmp.open("w", encoding="utf-8") as f:
+            write(f)
+        tmp.replace(dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+def read_source(task: tuple) -> str:
+    """Reads the markdown of a (source, template, output path) task, for the I/O pipeline."""
+    with task[0].open("r", encoding="utf-8") as f:
+        return f.read()
+
+def render_source(task: tuple, markdown: str) -> tuple[str, str, tuple[int, int]]:
+    """Renders the markdown of a (source, template, output path) task to the final page HTML.
+    The pipelined counterpart of render_page: reading and writing are left to the I/O threads.
+    Args:
+        task (tuple): The source, the compiled template and the output path.
+        markdown (str): The source's markdown, as returned by read_source.
+    Returns:
+        tuple[str, str, tuple[int, int]]: The complete page, its title, and the inline cache
+            hits and misses of the page in this process.
+    """
+    template = task[1]
+    cache = inline_cache_for(template)
+    counts = (0, 0)
+    article = RENDER_CACHE.get(markdown, template.url_key) if RENDER_CACHE is not None else None
+    if article is None:
+        hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+        page = markdown_to_page(markdown, cache)
+        if cache is not None:
+            counts = (cache.hits - hits, cache.misses - misses)
+        title = require_title(page.title)
+        rebase_urls(page.root, template.basepath, template.assets)
+        article = page.root.to_html()
+        if RENDER_CACHE is not None:
+            RENDER_CACHE.put(markdown, template.url_key, article)
+    else:
+        title = require_title(page_title(markdown))
+    return template.render(Content=article, Title=escape_text(title)), title, counts
+
+def write_page(task: tuple, rendered: tuple[str, str, tuple[int, int]]) -> tuple[str, None, tuple[int, int]]:
+    """Writes a page from render_source to the output path of its task, through a temporary file.
+    The page is rendered in full before the file is opened, so only I/O errors can interrupt the write.
+    Returns the page's title and inline cache counts in the shape render_page returns them.
+    """
+    html, title, counts = rendered
+    write_atomically(task[2], lambda f: f.write(html))
+    return title, None, counts
+
+def generate_page_recursive(src: Path, template_path: Path, dest: Path, basepath: str = "/",
+                            manifest: BuildManifest | None = None, jobs: int = 1,
+                            stats: BuildStats | None = None, io_threads: int = 0,
+                            templates: Path = Path("templates"), site_url: str | None = None,
+                            written: list[Path] | None = None,
+                            assets: dict[str, str] | None = None,
+                            cache_counts: Counter | None = None) -> list[tuple[Path, Exception]]:
     """Generates HTML pages for all markdown files in src directory recursively.
+    With a manifest, the blog listing, tag pages, feeds and sitemap are then generated from it.
     Args:
         src (Path): Source directory containing markdown files.
-        template_path (Path): Path to the HTML template file.
+        template_path (Path): Path to the default HTML template file.
         dest (Path): Destination directory for output HTML files.
         basepath (str): Base path for adjusting relative links in the HTML.
+        manifest (BuildManifest | None): State of the previous build. When given, only
+            pages whose source changed are rendered and outputs of deleted sources are removed.
+        jobs (int): Number of worker processes to render pages with.
+        stats (BuildStats | None): When given, every page is timed (and profiled if it
+            matches stats.profile) and its timings are added to stats.
+        io_threads (int): Threads that read sources ahead and write pages behind the
+            rendering, 0 reads and writes each page as it is rendered.
+        templates (Path): Directory of the templates pages can pick in their front matter, and of partials.
+        site_url (str | None): Scheme and host the site is served from, for the feeds and sitemap.
+        written (list[Path] | None): When given, every page and index written is appended to it.
+        assets (dict[str, str] | None): Fingerprinted URL of each asset, by its root relative URL.
+        cache_counts (Counter | None): When given, the inline cache "hits" and "misses" of every
+            page rendered, in whichever process, are added to it.
+    Returns:
+        list[tuple[Path, Exception]]: The sources that failed to render and their errors.
+    """
+    if manifest is not None:
+        if manifest.check_settings(basepath, assets):
+            print("Base path or fingerprinted assets changed, rebuilding every page")
+        for path in manifest.check_dependencies():
+            print(f"{path} changed, rebuilding the pages that use it")
+    seen = set()
+    pending = []
+    for key, stat in find_sources(src):
+        seen.add(key)
+        page = plan_page(src, key, dest, manifest, stat)
+        if page is not None:
+            pending.append(page)
+    loader = TemplateLoader(template_path, templates, basepath, assets)
+    failures = build_pages(pending, loader, jobs, manifest, stats, io_threads, written, cache_counts)
+    if manifest is not None:
+        for output in manifest.prune(seen):
+            remove_output(dest, dest / output)
+        failures += build_indexes(dest, manifest, loader, site_url, written)
+    return failures
+
+def build_indexes(dest: Path, manifest: BuildManifest, loader: TemplateLoader, site_url: str | None = None,
+                  written: list[Path] | None = None) -> list[tuple[Path, Exception]]:
+    """Runs generate_indexes with the default template, reporting a failure like a page's.
+    Args:
+        dest (Path): Destination directory.
+        manifest (BuildManifest): State of the build, with every page's metadata.
+        loader (TemplateLoader): Templates of this build.
+        site_url (str | None): Scheme and host the site is served from, for the feeds and sitemap.
+        written (list[Path] | None): When given, the files generated are appended to it.
+    Returns:
+        list[tuple[Path, Exception]]: The default template and the error, if generating failed.
+    """
+    try:
+        outputs = generate_indexes(dest, manifest, loader.get(), site_url)
+    except (OSError, ValueError) as e:
+        print(f"Failed to generate indexes: {e!r}")
+        return [(loader.path(), e)]
+    if written is not None:
+        written.extend(dest / output for output in outputs)
+    return []
+
+def find_sources(src: Path) -> list[tuple[str, os.stat_result]]:
+    """Lists the markdown files under src in the order of sorted(src.rglob("*.md")).
+    Uses os.scandir, so each file costs one stat call and no Path is built.
+    Args:
+        src (Path): Source directory containing markdown files.
+    Returns:
+        list[tuple[str, os.stat_result]]: Each file's posix path relative to src, and its stat.
+    """
+    def listing(directory: str) -> list[os.DirEntry]:
+        with os.scandir(directory) as entries:
+            return sorted(entries, key=lambda entry: entry.name)
+
+    try:
+        stack = [(iter(listing(os.fspath(src))), "")]
+    except FileNotFoundError:
+        return []
+    found = []
+    while stack:
+        entries, prefix = stack[-1]
+        for entry in entries:
+            if entry.is_dir():
+                # Descending in place keeps each directory's files between its siblings, as sorted paths are
+                if not entry.is_symlink():
+                    stack.append((iter(listing(entry.path)), prefix + entry.name + "/"))
+                    break
+            elif entry.name.endswith(".md"):
+                found.append((prefix + entry.name, entry.stat()))
+        else:
+            stack.pop()
+    return found
+
+def plan_page(src: Path, key: str, dest: Path, manifest: BuildManifest | None = None,
+              stat: os.stat_result | None = None) -> tuple | None:
+    """Decides whether a markdown source needs rendering.
+    Up to date pages are checked with plain strings, Paths are only built for pages to render.
+    Args:
+        src (Path): Source directory containing markdown files.
+        key (str): Path of the markdown file relative to src.
+        dest (Path): Destination directory for output HTML files.
+        manifest (BuildManifest | None): State of the previous build, if any.
+        stat (os.stat_result | None): The source's stat if find_sources already took it.
+    Returns:
+        tuple | None: (source, output path, key, manifest entry) for build_pages, or None
+            if the manifest says the page is up to date.
+    """
+    output = key.removesuffix(".md") + ".html"
+    entry = None
+    if manifest is not None:
+        entry = manifest.stale_entry(key, os.path.join(src, key), output, stat)
+        if entry is None and os.path.exists(os.path.join(dest, output)):
+            return None
+        if entry is None:  # Output was deleted by hand, render it again
+            entry = manifest.pages[key]
+    return src / key, dest / output, key, entry
+
+def select_template(loader: TemplateLoader, md_file: Path) -> tuple[Path, Template | Exception, FrontMatter | None]:
+    """Picks the template named in a page's front matter, reading only the front matter.
+    Args:
+        loader (TemplateLoader): Templates of this build.
+        md_file (Path): Path to the markdown source file.
+    Returns:
+        tuple[Path, Template | Exception, FrontMatter | None]: The template's path, the template or
+            the error loading it, and the page's front matter if it could be read.
     """
-    for md_file in src.rglob("*.md"):
-        relative_path = md_file.relative_to(src).with_suffix(".html")
-        output_path = dest / relative_path
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        generate_page(md_file, template_path, output_path, basepath=basepath)
+    front_matter = None
+    try:
+        front_matter = read_front_matter(md_file)
+        return loader.path(front_matter.template), loader.get(front_matter.template), front_matter
+    except (OSError, ValueError) as e:
+        return loader.path(front_matter.template if front_matter else None), e, front_matter
 
-def main():
-    basepath = "/"
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
+def build_pages(pending: list[tuple], loader: TemplateLoader, jobs: int = 1,
+                manifest: BuildManifest | None = None, stats: BuildStats | None = None,
+                io_threads: int = 0, written: list[Path] | None = None,
+                cache_counts: Counter | None = None) -> list[tuple[Path, Exception]]:
+    """Renders the pages planned by plan_page, logging them in order.
+    Output directories are created up front, once each, rather than once per page.
+    Args:
+        pending (list[tuple]): Pages returned by plan_page.
+        loader (TemplateLoader): Templates of this build, picked per page by select_template.
+        jobs (int): Number of worker processes to render pages with.
+        manifest (BuildManifest | None): Rendered pages are recorded here.
+        stats (BuildStats | None): Timings of rendered pages are added here.
+        io_threads (int): Threads for the I/O pipeline, see render_pages.
+        written (list[Path] | None): When given, the pages written are appended to it.
+        cache_counts (Counter | None): When given, the pages' inline cache "hits" and "misses" are added to it.
+    Returns:
+        list[tuple[Path, Exception]]: The sources that failed to render and their errors.
+    """
+    for directory in sorted({output_path.parent for _, output_path, _, _ in pending}):
+        directory.mkdir(parents=True, exist_ok=True)
+    selected = [select_template(loader, md_file) for md_file, _, _, _ in pending]
+    tasks = []
+    for (md_file, output_path, key, _), (_, template, _) in zip(pending, selected):
+        if isinstance(template, Exception):
+            continue
+        if stats is None:
+            tasks.append((md_file, template, output_path))
+        else:
+            tasks.append((md_file, template, output_path, True, stats.profile_path(key)))
+    results = render_pages(tasks, jobs, io_threads)
+    failures = []
+    for (md_file, output_path, key, entry), (template_path, template, front_matter) in zip(pending, selected):
+        print(f"Generating page from {md_file} using template {template_path} to {output_path}")
+        result, error = (None, template) if isinstance(template, Exception) else next(results)
+        if error is not None:
+            print(f"Failed to generate {output_path}: {error!r}")
+            failures.append((md_file, error))
+            continue
+        title, timing, (hits, misses) = result
+        if cache_counts is not None:
+            cache_counts["hits"] += hits
+            cache_counts["misses"] += misses
+        if written is not None:
+            written.append(output_path)
+        if manifest is not None:
+            # Kept for the indexes, so listings never have to read unchanged pages again
+            entry.title, entry.tags, entry.draft = title, front_matter.tags, front_matter.draft
+            entry.date = front_matter.date.isoformat() if front_matter.date else None
+            manifest.record(key, entry, template.dependencies)
+        if timing is not None:
+            stats.add(timing)
+    results.close()  # Shuts the process pool down now rather than whenever the generator is collected
+    return failures
+
+def render_pages(tasks: list[tuple], jobs: int, io_threads: int = 0):
+    """Runs render_page for every task in order, spreading them over a process pool when jobs > 1.
+    Yields one (result, error) pair per task in the order given; error is None on success.
+    With io_threads, untimed tasks go through the I/O pipeline instead: sources are read ahead
+    and pages written behind by threads of this process, so slow storage doesn't stall rendering.
+    Args:
+        tasks (list[tuple]): Positional arguments for each render_page call.
+        jobs (int): Number of worker processes.
+        io_threads (int): Threads for reading and as many for writing, 0 disables the pipeline.
+    """
+    if io_threads > 0 and all(len(task) == 3 for task in tasks):
+        use_pool = jobs > 1 and len(tasks) > 1
+        with (ProcessPoolExecutor(max_workers=min(jobs, len(tasks)), initializer=setup_worker,
+                                  initargs=WORKER_SETTINGS) if use_pool else nullcontext()) as pool:
+            yield from pipelined(tasks, read_source, render_source, write_page, io_threads, render_pool=pool)
+        return
+    if jobs <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            try:
+                yield render_page(*task), None
+            except Exception as e:
+                yield None, e
+        return
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks)), initializer=setup_worker,
+                             initargs=WORKER_SETTINGS) as pool:
+        futures = [pool.submit(render_page, *task) for task in tasks]
+        for future in futures:
+            error = future.exception()
+            yield (future.result() if error is None else None), error
+
+def optimize_outputs(paths: list[Path], minify: bool, compress: bool,
+                     jobs: int = 1) -> tuple[dict[Path, int], list[tuple[Path, Exception]]]:
+    """Minifies and precompresses the outputs written by this build across the process pool.
+    Files that are neither minified nor compressed are skipped.
+    Args:
+        paths (list[Path]): Outputs that changed.
+        minify (bool): Minify HTML and CSS.
+        compress (bool): Write .gz siblings, and .br ones when brotli is installed.
+        jobs (int): Number of worker processes.
+    Returns:
+        tuple[dict[Path, int], list[tuple[Path, Exception]]]: The size each output was left
+            with, and the outputs that couldn't be processed with their errors.
+    """
+    paths = [path for path in paths if path.suffix in COMPRESSIBLE]
+    if paths:
+        print(f"Post-processing {len(paths)} output(s)")
+    sizes, failures = {}, []
+    for path, size, error in optimize_files(paths, minify, compress, jobs):
+        if error is None:
+            sizes[path] = size
+        else:
+            print(f"Failed to post-process {path}: {error!r}")
+            failures.append((path, error))
+    return sizes, failures
+
+def remove_output(dest: Path, output_path: Path):
+    """Deletes a generated page and any directories it leaves empty inside dest.
+    Args:
+        dest (Path): Destination directory the page was generated into.
+        output_path (Path): Path to the generated HTML file.
+    """
+    print(f"Removing stale page: {output_path}")
+    remove_file(dest, output_path)
+
+class SiteWatcher:
+    """Keeps a built site up to date with its sources, one poll at a time.
+    An edited markdown file re-renders just that page, an edited static file is copied on
+    its own, and a template or partial edit re-renders the pages that use it across the process pool.
+    The trees are watched with TreeWatcher, so a poll with nothing changed stats nothing on Linux.
+    Call close() when done.
+    Args:
+        src (Path): Source directory containing markdown files.
+        static (Path): Directory of static files.
+        template_path (Path): Path to the default HTML template file.
+        dest (Path): Destination directory, already built.
+        basepath (str): Base path for adjusting relative links in the HTML.
+        manifest (BuildManifest): State of the build in dest, saved after every change.
+        jobs (int): Number of worker processes for full re-renders.
+        link (str): How static files are placed, one of LINK_MODES.
+        io_threads (int): Threads for the I/O pipeline of full re-renders.
+        templates (Path): Directory of selectable templates and partials.
+        site_url (str | None): Scheme and host the site is served from, for the feeds and sitemap.
+    """
+    def __init__(self, src: Path, static: Path, template_path: Path, dest: Path, basepath: str,
+                 manifest: BuildManifest, jobs: int = 1, link: str = "copy", io_threads: int = 0,
+                 templates: Path = Path("templates"), site_url: str | None = None):
+        self.src, self.static, self.template_path, self.dest = src, static, template_path, dest
+        self.manifest, self.jobs, self.link, self.io_threads = manifest, jobs, link, io_threads
+        self.site_url = site_url
+        self.pages, self.files = TreeWatcher(src, ".md"), TreeWatcher(static)
+        self.layouts, self.template_state = TreeWatcher(templates), file_state(template_path)
+        self.loader = TemplateLoader(template_path, templates, basepath)
+
+    def close(self):
+        """Stops watching the source trees."""
+        for tree in (self.pages, self.files, self.layouts):
+            tree.close()
+
+    def step(self) -> bool:
+        """Rebuilds whatever changed since the last step.
+        Returns:
+            bool: Whether anything was rebuilt, in which case the manifest was saved.
+        """
+        src, dest, manifest = self.src, self.dest, self.manifest
+        rebuilt = False
+
+        template_state = file_state(self.template_path)
+        if any(self.layouts.poll()) or template_state != self.template_state:
+            self.template_state = template_state
+            self.loader.clear()
+            changed = manifest.check_dependencies()
+            for path in changed:
+                print(f"{path} changed, rebuilding the pages that use it")
+            if changed:
+                # Pages that used a changed file were dropped from the manifest, so they are stale again
+                pending = [plan_page(src, key, dest, manifest) for key in sorted(self.pages.files)]
+                build_pages([page for page in pending if page], self.loader, self.jobs, manifest,
+                            io_threads=self.io_threads)
+                rebuilt = True
+
+        changed, removed = self.pages.poll()
+        pending = [plan_page(src, key, dest, manifest) for key in changed]
+        build_pages([page for page in pending if page], self.loader, self.jobs, manifest)
+        # Dropping the templates only deleted pages used keeps their edits from re-rendering anything
+        for output in manifest.remove(removed):
+            remove_output(dest, dest / output)
+        rebuilt = rebuilt or bool(changed or removed)
+
+        changed, removed = self.files.poll()
+        for relative in changed:
+            print(f"Copying: {self.static / relative} -> {dest / relative}")
+            (dest / relative).parent.mkdir(parents=True, exist_ok=True)
+            try:
+                place_file(self.static / relative, dest / relative, self.link)
+            except FileNotFoundError:
+                # Deleted since the poll, e.g. an editor's temporary file; the next poll reports it removed
+                continue
+        for relative in removed:
+            print(f"Removing stale file: {dest / relative}")
+            remove_file(dest, dest / relative)
+        if changed or removed:
+            manifest.assets = sorted(self.files.files)
+            rebuilt = True
+
+        if rebuilt:
+            build_indexes(dest, manifest, self.loader, self.site_url)
+            manifest.save(dest / MANIFEST_NAME)
+        return rebuilt
+
+def watch_site(src: Path, static: Path, template_path: Path, dest: Path, basepath: str, manifest: BuildManifest,
+               jobs: int = 1, port: int = 8888, interval: float = 0.05, link: str = "copy", io_threads: int = 0,
+               templates: Path = Path("templates"), site_url: str | None = None):
+    """Serves dest over HTTP and keeps it up to date with a SiteWatcher until interrupted.
+    Args:
+        src (Path): Source directory containing markdown files.
+        static (Path): Directory of static files.
+        template_path (Path): Path to the default HTML template file.
+        dest (Path): Destination directory, already built.
+        basepath (str): Base path for adjusting relative links in the HTML.
+        manifest (BuildManifest): State of the build in dest, saved after every change.
+        jobs (int): Number of worker processes for full re-renders.
+        port (int): Port for the development server.
+        interval (float): Seconds between polls for changes.
+        link (str): How static files are placed, one of LINK_MODES.
+        io_threads (int): Threads for the I/O pipeline of full re-renders.
+        templates (Path): Directory of selectable templates and partials.
+        site_url (str | None): Scheme and host the site is served from, for the feeds and sitemap.
+    """
+    server = serve(dest, port)
+    print(f"Serving {dest} at http://localhost:{port}{basepath} and watching for changes, press Ctrl+C to stop")
+    watcher = SiteWatcher(src, static, template_path, dest, basepath, manifest, jobs, link, io_threads,
+                          templates, site_url)
+    try:
+        while True:
+            time.sleep(interval)
+            started = time.perf_counter()
+            try:
+                rebuilt = watcher.step()
+            except OSError as e:
+                # A failed step shouldn't take the server down; the next edit rebuilds again
+                print(f"Rebuild failed: {e}")
+                continue
+            if rebuilt:
+                print(f"Rebuilt in {(time.perf_counter() - started) * 1000:.0f}ms")
+    except KeyboardInterrupt:
+        print("Stopping server")
+    finally:
+        watcher.close()
+        server.shutdown()
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parses the command line options for a build.
+    Args:
+        argv (list[str] | None): Arguments to parse, defaults to sys.argv.
+    """
+    parser = argparse.ArgumentParser(description="Build the static site from content/ into docs/")
+    parser.add_argument("basepath", nargs="?", default="/", help="Base path prepended to root relative links")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Keep docs/ and only re-render pages whose sources changed since the last build")
+    parser.add_argument("--checksum", action="store_true",
+                        help="With --incremental, compare static files by content when their mtime changed")
+    parser.add_argument("--link", choices=LINK_MODES, default="copy",
+                        help="With --incremental, hardlink or reflink static files instead of copying them "
+                             "(falls back to copying across filesystems)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Number of processes used to render pages (default: number of CPUs)")
+    parser.add_argument("--io-threads", type=int, default=0, metavar="N",
+                        help="Read sources ahead and write pages in the background with N threads each, "
+                             "for slow or network storage (0 disables; ignored with --stats)")
+    parser.add_argument("--inline-cache", type=int, default=0, metavar="N",
+                        help="Cache up to N rendered inline fragments per process (0 disables the cache)")
+    parser.add_argument("--cache-dir", type=Path, default=None,
+                        help="Directory of a render cache shared between builds and machines (disabled by default)")
+    parser.add_argument("--cache-size", type=int, default=1024, metavar="MB",
+                        help="Size limit of --cache-dir; least recently used entries are evicted after the build")
+    parser.add_argument("--site-url", default=None, metavar="URL",
+                        help="Scheme and host the site is served from, e.g. https://example.com; "
+                             "the RSS and Atom feeds and sitemap.xml are only generated with it")
+    parser.add_argument("--minify", action="store_true",
+                        help="Minify the HTML and CSS written, leaving pre, code, textarea and script contents alone")
+    parser.add_argument("--compress", action="store_true",
+                        help="Write a .gz (and, with brotli installed, .br) sibling next to every text output")
+    parser.add_argument("--fingerprint", action="store_true",
+                        help="Also publish linkable static files under content hashed names and point pages at them")
+    parser.add_argument("--watch", action="store_true",
+                        help="After building, serve docs/ and rebuild whatever changes in content/, static/ or the template")
+    parser.add_argument("--serve", choices=("stdio", "http"), default=None,
+                        help="Skip the build and run a render service for previews, answering JSON requests "
+                             "line by line on stdin/stdout or over HTTP on --port")
+    parser.add_argument("--port", type=int, default=8888, help="Port for the --watch development server and --serve http")
+    parser.add_argument("--interval", type=float, default=0.05, help="Seconds between --watch polls")
+    parser.add_argument("--stats", action="store_true",
+                        help="Time every stage of every page and print a summary of the slowest pages")
+    parser.add_argument("--stats-json", type=Path, default=None,
+                        help="Also write the per-page and aggregate timings to this JSON file (implies --stats)")
+    parser.add_argument("--profile", action="append", default=[], metavar="GLOB",
+                        help="Run pages matching GLOB (relative to content/) under cProfile (implies --stats)")
+    parser.add_argument("--profile-dir", type=Path, default=Path("profiles"),
+                        help="Directory for the .prof files written by --profile")
+    args = parser.parse_args(argv)
+    if args.watch and (args.minify or args.compress or args.fingerprint):
+        parser.error("--minify, --compress and --fingerprint are for deployable builds and can't be combined with --watch")
+    if args.serve and args.watch:
+        parser.error("--serve and --watch can't be combined")
+    return args
+
+def run_service(mode: str, basepath: str = "/", port: int = 8888, inline_cache_size: int = 0):
+    """Runs the preview render service until stdin closes or it is interrupted, then prints its latencies.
+    Logs go to stderr, since stdout carries the responses in stdio mode.
+    Args:
+        mode (str): "stdio" for line-delimited JSON on stdin/stdout, "http" for a local HTTP endpoint.
+        basepath (str): Base path for adjusting relative links in the HTML.
+        port (int): Port of the HTTP endpoint.
+        inline_cache_size (int): Number of inline fragments to cache across requests.
+    """
+    service = RenderService(Path("template.html"), Path("templates"), basepath, inline_cache_size)
+    try:
+        if mode == "stdio":
+            print("Render service reading JSON requests from stdin", file=sys.stderr)
+            serve_stdio(service)
+        else:
+            server = make_server(service, port)
+            print(f"Render service listening at http://localhost:{server.server_port}/, press Ctrl+C to stop",
+                  file=sys.stderr)
+            with server:
+                server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(service.stats.report(), file=sys.stderr)
+
+def main(argv: list[str] | None = None):
+    args = parse_args(argv)
+    basepath = args.basepath
+    if args.serve:
+        run_service(args.serve, basepath, args.port, args.inline_cache)
+        return
+    if basepath != "/":
         print(f"Using base path from command line: {basepath}")
-    rm_cp_files(Path("static"), Path("docs"))
-    generate_page_recursive(
+    static, dest = Path("static"), Path("docs")
+    if args.incremental:
+        manifest = BuildManifest.load(dest / MANIFEST_NAME)
+        # Different options mean every output is processed again, not just the changed ones
+        reprocess = manifest.check_postprocess(postprocess_options(args.minify, args.compress))
+        if reprocess:
+            print("Post-processing changed, rebuilding every page")
+        synced = sync_files(static, dest, manifest.assets, checksum=args.checksum, link=args.link,
+                            sizes=manifest.optimized)
+        print(f"Static files: {len(synced.copied)} copied, {synced.unchanged} unchanged, {len(synced.removed)} removed")
+    else:
+        synced = rm_cp_files(static, dest)
+        # A full build still records its state so the next build can be incremental
+        manifest = BuildManifest()
+        reprocess = manifest.check_postprocess(postprocess_options(args.minify, args.compress))
+    manifest.assets = synced.files
+    # Without --fingerprint this removes the copies an earlier build published
+    manifest.fingerprints, fingerprinted = fingerprint_assets(static, dest, synced.files if args.fingerprint else [],
+                                                              manifest.fingerprints, "minify" if args.minify else "",
+                                                              args.link if args.incremental else "copy")
+    assets = asset_urls(manifest.fingerprints)
+    setup_worker(args.inline_cache, basepath, args.cache_dir, assets)
+    stats = None
+    if args.stats or args.stats_json or args.profile:
+        stats = BuildStats(args.profile, args.profile_dir)
+    written = []
+    cache_counts = Counter()
+    failures = generate_page_recursive(
         src=Path("content"),
         template_path=Path("template.html"),
-        dest=Path("docs"),
+        dest=dest,
         basepath=basepath,
+        manifest=manifest,
+        jobs=args.jobs,
+        stats=stats,
+        io_threads=args.io_threads,
+        templates=Path("templates"),
+        site_url=args.site_url,
+        written=written,
+        assets=assets,
+        cache_counts=cache_counts,
     )
+    if reprocess or manifest.postprocess:
+        copied = synced.files if reprocess else synced.copied
+        if reprocess:
+            fingerprinted = [entry.name for entry in manifest.fingerprints.values()]
+        sizes, optimize_failures = optimize_outputs(written + [dest / relative for relative in copied + fingerprinted],
+                                                    args.minify, args.compress, args.jobs)
+        failures += optimize_failures
+        # Rewritten static files keep their source's mtime; their sizes tell the next sync they are current
+        current = set(synced.files)
+        manifest.optimized = {relative: size for relative, size in manifest.optimized.items()
+                              if relative in current and relative not in copied}
+        manifest.optimized.update((relative, sizes[dest / relative]) for relative in copied if dest / relative in sizes)
+    # Failed pages are left out of the manifest so the next build retries them
+    manifest.save(dest / MANIFEST_NAME)
+    if RENDER_CACHE is not None:
+        # Evicting only here, while no worker is running, keeps readers and writers simple
+        evicted = RENDER_CACHE.evict(args.cache_size * 1024 * 1024)
+        if evicted:
+            print(f"Evicted {evicted} render cache entries")
+    if stats is not None:
+        print(stats.report())
+        if args.stats_json is not None:
+            stats.save(args.stats_json)
+    elif cache_counts["hits"] + cache_counts["misses"]:
+        # Added up from every page, so workers' lookups count too
+        hits, misses = cache_counts["hits"], cache_counts["misses"]
+        print(f"inline cache: {hits} hits, {misses} misses ({hits / (hits + misses):.1%} hit rate)")
+    if failures:
+        print(f"{len(failures)} page(s) failed to generate:")
+        for md_file, error in failures:
+            print(f"  {md_file}: {error}")
+        if not args.watch:
+            sys.exit(1)
+    if args.watch:
+        watch_site(Path("content"), static, Path("template.html"), dest, basepath, manifest,
+                   jobs=args.jobs, port=args.port, interval=args.interval, link=args.link,
+                   io_threads=args.io_threads, templates=Path("templates"), site_url=args.site_url)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
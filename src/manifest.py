@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+MANIFEST_NAME = ".manifest.json"
+MANIFEST_VERSION = 6
+
+
+def hash_file(path: Path | str) -> str:
+    """Returns the sha256 hex digest of a file's contents.
+    @path: Path of the file to hash
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class PageEntry:
+    """Record of a rendered page as of the last build.
+    @digest: sha256 of the markdown source
+    @size: Size in bytes of the source when it was hashed
+    @mtime_ns: Modification time of the source when it was hashed
+    @output: Output path relative to the destination directory
+    @dependencies: Templates and partials the page was rendered with
+    @title: The page's title, for listings and feeds
+    @date: The front matter date in ISO format, if any
+    @tags: The front matter tags
+    @draft: Whether the front matter marks the page as a draft
+    """
+    digest: str
+    size: int
+    mtime_ns: int
+    output: str
+    dependencies: list[str] = field(default_factory=list)
+    title: str | None = None
+    date: str | None = None
+    tags: list[str] = field(default_factory=list)
+    draft: bool = False
+
+
+@dataclass
+class AssetEntry:
+    """Record of a fingerprinted static file as of the last build.
+    @digest: sha256 of the source file
+    @size: Size in bytes of the source when it was hashed
+    @mtime_ns: Modification time of the source when it was hashed
+    @name: The fingerprinted copy, relative to the destination directory
+    """
+    digest: str
+    size: int
+    mtime_ns: int
+    name: str
+
+
+@dataclass
+class BuildManifest:
+    """Build state stored in the output directory between incremental builds.
+    Together with PageEntry.dependencies this is the dependency graph: each template or
+    partial maps to the digest it had when the pages that list it were rendered.
+    @basepath: Base path the pages were rendered with
+    @pages: Map of source path (relative to the content directory) to PageEntry
+    @assets: Static files copied into the output directory, relative to it
+    @dependencies: Map of template or partial path to its sha256
+    @index_digest: sha256 of everything the generated indexes were built from
+    @index_outputs: Files written by the index generator, relative to the destination directory
+    @postprocess: Post-processing applied to the outputs, e.g. ["minify", "gzip"]
+    @optimized: Static files rewritten by post-processing, relative path -> size afterwards
+    @asset_urls: Root relative URL -> fingerprinted URL, as the pages were rendered with
+    @fingerprints: Map of static file path (relative to the static directory) to AssetEntry
+    @dirty: Whether pages or dependencies changed since the manifest was loaded or saved
+    @saved: The other fields as last loaded or saved, None if the manifest isn't on disk yet
+    """
+    basepath: str | None = None
+    pages: dict[str, PageEntry] = field(default_factory=dict)
+    assets: list[str] = field(default_factory=list)
+    dependencies: dict[str, str] = field(default_factory=dict)
+    index_digest: str | None = None
+    index_outputs: list[str] = field(default_factory=list)
+    postprocess: list[str] = field(default_factory=list)
+    optimized: dict[str, int] = field(default_factory=dict)
+    asset_urls: dict[str, str] = field(default_factory=dict)
+    fingerprints: dict[str, AssetEntry] = field(default_factory=dict)
+    dirty: bool = field(default=False, compare=False, repr=False)
+    saved: str | None = field(default=None, compare=False, repr=False)
+
+    @classmethod
+    def load(cls, path: Path) -> "BuildManifest":
+        """Loads a manifest from disk, returning an empty one if it is missing or unreadable.
+        @path: Path of the manifest file
+        """
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if data.get("version") != MANIFEST_VERSION:
+            return cls()
+        pages = {key: PageEntry(**entry) for key, entry in data.get("pages", {}).items()}
+        fingerprints = {key: AssetEntry(**entry) for key, entry in data.get("fingerprints", {}).items()}
+        manifest = cls(data.get("basepath"), pages, data.get("assets", []), data.get("dependencies", {}),
+                       data.get("index_digest"), data.get("index_outputs", []), data.get("postprocess", []),
+                       data.get("optimized", {}), data.get("asset_urls", {}), fingerprints)
+        manifest.saved = manifest.settings()
+        return manifest
+
+    def settings(self) -> str:
+        """Returns every field but pages and dependencies as JSON.
+        These are small and assigned by several build steps, so save compares them instead of tracking them.
+        """
+        return json.dumps({
+            "basepath": self.basepath,
+            "assets": self.assets,
+            "index_digest": self.index_digest,
+            "index_outputs": self.index_outputs,
+            "postprocess": self.postprocess,
+            "optimized": dict(sorted(self.optimized.items())),
+            "asset_urls": dict(sorted(self.asset_urls.items())),
+            "fingerprints": {key: vars(entry) for key, entry in sorted(self.fingerprints.items())},
+        })
+
+    def save(self, path: Path) -> bool:
+        """Writes the manifest to disk, replacing the old file atomically.
+        Nothing is written when nothing changed since it was loaded or last saved.
+        Returns True if the file was written.
+        @path: Path of the manifest file
+        """
+        settings = self.settings()
+        if not self.dirty and settings == self.saved and path.exists():
+            return False
+        # Entries are plain dataclasses, their __dict__ is already the JSON object
+        data = json.loads(settings)
+        data["version"] = MANIFEST_VERSION
+        data["pages"] = {key: vars(entry) for key, entry in sorted(self.pages.items())}
+        data["dependencies"] = dict(sorted(self.dependencies.items()))
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            f.write(json.dumps(data, separators=(",", ":")))
+        tmp.replace(path)
+        self.dirty = False
+        self.saved = settings
+        return True
+
+    def check_settings(self, basepath: str, asset_urls: dict[str, str] | None = None) -> bool:
+        """Forgets every page if the basepath or any fingerprinted asset changed since the last build.
+        Returns True if previously rendered pages were invalidated.
+        @basepath: Current base path
+        @asset_urls: Current fingerprinted URL of each asset, root relative URL -> fingerprinted URL
+        """
+        asset_urls = asset_urls or {}
+        if self.basepath == basepath and self.asset_urls == asset_urls:
+            return False
+        invalidated = bool(self.pages)
+        self.dirty = True
+        self.basepath = basepath
+        self.asset_urls = dict(asset_urls)
+        self.pages.clear()
+        self.dependencies.clear()
+        return invalidated
+
+    def check_postprocess(self, options: list[str]) -> bool:
+        """Forgets every page, the generated indexes and rewritten static files if the
+        post-processing changed since the last build, so every output is processed again.
+        Returns True if the options changed.
+        @options: Current post-processing options
+        """
+        if self.postprocess == options:
+            return False
+        self.postprocess = list(options)
+        self.dirty = True
+        self.pages.clear()
+        self.dependencies.clear()
+        self.index_digest = None
+        self.optimized.clear()
+        return True
+
+    def check_dependencies(self) -> list[str]:
+        """Forgets the pages rendered with a template or partial that changed or disappeared.
+        Only files some page was rendered with are hashed, each once.
+        Returns the dependencies that changed.
+        """
+        changed = []
+        for path, digest in self.dependencies.items():
+            try:
+                current = hash_file(Path(path))
+            except FileNotFoundError:
+                current = None
+            if current != digest:
+                changed.append(path)
+        if changed:
+            self.dirty = True
+            stale = set(changed)
+            for key in [key for key, entry in self.pages.items() if stale.intersection(entry.dependencies)]:
+                del self.pages[key]
+            for path in changed:
+                del self.dependencies[path]
+        return changed
+
+    def stale_entry(self, key: str, src: Path | str, output: str,
+                    stat: os.stat_result | None = None) -> PageEntry | None:
+        """Returns a fresh PageEntry if src must be re-rendered, or None if it is up to date.
+        Size and mtime are compared first so unchanged files are never read.
+        @key: Source path relative to the content directory
+        @src: Path of the markdown source
+        @output: Output path relative to the destination directory
+        @stat: The source's stat if the caller already has it, e.g. from os.scandir
+        """
+        if stat is None:
+            stat = os.stat(src)
+        old = self.pages.get(key)
+        if old is not None and old.output == output and old.size == stat.st_size and old.mtime_ns == stat.st_mtime_ns:
+            return None
+        digest = hash_file(src)
+        if old is not None and old.output == output and old.digest == digest:
+            # Touched but not modified: remember the new stat so we skip hashing next time
+            old.size, old.mtime_ns = stat.st_size, stat.st_mtime_ns
+            self.dirty = True
+            return None
+        return PageEntry(digest, stat.st_size, stat.st_mtime_ns, output)
+
+    def record(self, key: str, entry: PageEntry, dependencies: dict[str, str] | None = None):
+        """Marks a page as rendered.
+        @key: Source path relative to the content directory
+        @entry: The entry returned by stale_entry
+        @dependencies: Templates and partials the page was rendered with, path -> sha256
+        """
+        if dependencies:
+            entry.dependencies = sorted(dependencies)
+            self.dependencies.update(dependencies)
+        self.pages[key] = entry
+        self.dirty = True
+
+    def prune(self, seen: set[str]) -> list[str]:
+        """Drops pages whose sources no longer exist.
+        Returns the output paths (relative to the destination directory) that should be deleted.
+        @seen: Keys of every source found in this build
+        """
+        return self.remove([key for key in self.pages if key not in seen])
+
+    def remove(self, keys: list[str]) -> list[str]:
+        """Drops the given pages, and the templates and partials no remaining page uses.
+        Returns the output paths (relative to the destination directory) that should be deleted.
+        @keys: Source paths relative to the content directory; unknown ones are ignored
+        """
+        outputs = [self.pages.pop(key).output for key in keys if key in self.pages]
+        used = {path for entry in self.pages.values() for path in entry.dependencies}
+        dependencies = {path: digest for path, digest in self.dependencies.items() if path in used}
+        if outputs or len(dependencies) != len(self.dependencies):
+            self.dependencies = dependencies
+            self.dirty = True
+        return outputs
@@ -1,6 +1,12 @@
 from enum import Enum
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterator
 import re
-from htmlnode import HtmlNode, ParentNode, LeafNode
+from htmlnode import HtmlNode, ParentNode, LeafNode, RawNode
+from highlight import HIGHLIGHTER, fence_language
+from template import rebase_urls
+from front_matter import FrontMatter, parse_front_matter
 from textnode import TextNode, TextType, text_node_to_html_node, split_nodes_delimiter, split_nodes_images, split_nodes_links, text_to_textnodes
 
 class BlockType(Enum):
@@ -10,107 +16,469 @@ class BlockType(Enum):
     QUOTE = "quote"
     UNORDERED_LIST = "unordered_list"
     ORDERED_LIST = "ordered_list"
+    TABLE = "table"
+
+@dataclass
+class Block:
+    """A markdown block as found by scan_blocks.
+    @block_type: The BlockType of the block
+    @lines: The block's lines, stripped. Code blocks keep their fences and the
+        indentation of their contents relative to the opening fence.
+    @children: The blocks inside a QUOTE, quotes nested in it among them, or None
+        if it holds only text. A nested quote's lines are the ones directly inside it.
+    """
+    block_type: BlockType
+    lines: list[str]
+    children: list["Block"] | None = None
+
+# First character of a block's first line -> (matcher for the rest of its prefix, BlockType).
+# A line starting with any other character is a paragraph after a single dict lookup.
+BLOCK_STARTS = {
+    "#": (re.compile(r"#{1,6} ").match, BlockType.HEADING),
+    "`": (re.compile(r"```[^`]*$").match, BlockType.CODE),
+    ">": (re.compile(r">").match, BlockType.QUOTE),
+    "-": (re.compile(r"- ").match, BlockType.UNORDERED_LIST),
+    "1": (re.compile(r"1\. ").match, BlockType.ORDERED_LIST),
+}
+
+# A GFM delimiter row, e.g. "| :--- | :-: | --: |", the second line of every table
+DELIMITER_ROW_PATTERN = re.compile(r"\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?")
+ESCAPED_PIPE_PATTERN = re.compile(r"(?<!\\)\|")
+ALIGNMENTS = {(True, False): "left", (True, True): "center", (False, True): "right"}
+ORDERED_ITEM_PATTERN = re.compile(r"\d+\. ")
+# A quote marker: optional indentation, > and an optional space
+QUOTE_MARKER_PATTERN = re.compile(r"[ \t]*> ?")
+LIST_TYPES = (BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST)
+
+def is_fence(line: str) -> bool:
+    """Checks whether a stripped line opens or closes a fenced code block
+    @line: The stripped line
+    """
+    return line.startswith("```") and "`" not in line[3:]
+
+def first_line_block_type(line: str) -> BlockType:
+    """Guesses the BlockType of a block from its first (stripped) line
+    @line: The stripped line
+    """
+    start = BLOCK_STARTS.get(line[:1])
+    if start is not None and start[0](line):
+        return start[1]
+    return BlockType.PARAGRAPH
+
+def scan_blocks(markdown_text: str) -> Iterator[Block]:
+    """Reads markdown line by line, yielding each block with its type as soon as it ends.
+    Blocks are separated by blank lines, except inside fenced code, which runs to its
+    closing fence (or the end of the document). Every line is looked at once.
+    @markdown_text: The markdown text to scan
+    """
+    return scan_lines(markdown_text.splitlines())
+
+def scan_lines(lines: list[str], start: int = 0) -> Iterator[Block]:
+    """Does the work of scan_blocks on a document already split into lines.
+    @lines: The document's lines, without line endings
+    @start: Index of the first line to scan, e.g. the one after the front matter
+    """
+    scanner = BlockScanner()
+    feed = scanner.feed
+    for i in range(start, len(lines)):
+        block = feed(lines[i])
+        if block is not None:
+            yield block
+    block = scanner.close()
+    if block is not None:
+        yield block
+
+class BlockScanner:
+    """Groups lines into blocks as they are fed one at a time.
+    A blank line ends the open block, a fence ends it and opens code, which runs to its closing
+    fence, and a line that doesn't continue a list or quote turns it into a paragraph. A table
+    also ends at any line that starts another block.
+    Quotes are scanned by a QuoteStack as their lines arrive, so nested content is never scanned twice.
+    """
+    __slots__ = ("block", "code_indent", "base", "items", "quote_stack")
+
+    def __init__(self):
+        self.block: Block | None = None
+        self.code_indent = -1  # Indentation of the open code block's fence, -1 outside code
+        self.base = 0  # Indentation of the open block's first line
+        self.items = 1  # Top level items of the open ordered list
+        self.quote_stack: QuoteStack | None = None
+
+    def feed(self, raw: str) -> Block | None:
+        """Adds a line, returning the block it ended, if any
+        @raw: The line, without its line ending
+        """
+        block = self.block
+        if self.code_indent >= 0:
+            if is_fence(raw.strip()):
+                block.lines.append("```")
+                self.block, self.code_indent = None, -1
+                return block
+            # Drop up to the fence's own indentation, keep the rest
+            block.lines.append(raw[min(self.code_indent, len(raw) - len(raw.lstrip())):])
+            return None
+        line = raw.strip()
+        if not line:
+            return self.close()
+        if block is not None and not is_fence(line):
+            # A table runs to a blank line or to a line that starts another block
+            if block.block_type != BlockType.TABLE or first_line_block_type(line) == BlockType.PARAGRAPH:
+                self.extend(raw, line)
+                return None
+        block = self.close()
+        block_type = first_line_block_type(line)
+        self.block = Block(block_type, [line])
+        self.base = len(raw) - len(raw.lstrip())
+        self.items = 1
+        if block_type == BlockType.CODE:
+            self.code_indent = self.base
+        elif block_type == BlockType.QUOTE:
+            self.block.children = []
+            self.quote_stack = QuoteStack(self.block)
+        return block
+
+    def extend(self, raw: str, line: str):
+        """Adds a line that continues the open block, or turns the block into a paragraph
+        @raw: The line
+        @line: The line, stripped
+        """
+        block = self.block
+        block_type = block.block_type
+        # A list or quote with a line that doesn't continue it is a paragraph
+        if block_type == BlockType.QUOTE:
+            if line.startswith(">"):
+                self.quote_stack.feed(line)
+            else:
+                block.block_type, block.children, self.quote_stack = BlockType.PARAGRAPH, None, None
+        elif block_type in LIST_TYPES:
+            depth = len(raw) - len(raw.lstrip()) - self.base
+            if depth > 0 and is_list_item(line):
+                # Nested items keep their indentation relative to the list for list_to_html_node
+                line = " " * depth + line
+            elif block_type == BlockType.UNORDERED_LIST and line.startswith("- "):
+                pass
+            elif block_type == BlockType.ORDERED_LIST and line.startswith(f"{self.items + 1}. "):
+                self.items += 1
+            else:
+                block.block_type = BlockType.PARAGRAPH
+                block.lines = [line.lstrip() for line in block.lines]
+        elif block_type == BlockType.PARAGRAPH and len(block.lines) == 1 and is_table_start(block.lines[0], line):
+            block.block_type = BlockType.TABLE
+        block.lines.append(line)
+
+    def close(self) -> Block | None:
+        """Ends the open block, returning it if there was one"""
+        block = self.block
+        if block is None:
+            return None
+        if self.code_indent >= 0:
+            block.lines.append("```")
+            self.code_indent = -1
+        elif self.quote_stack is not None:
+            self.quote_stack.close()
+            self.quote_stack = None
+        self.block = None
+        return block
+
+class QuoteStack:
+    """The quotes open inside a top level quote, outermost first, each scanning its own content.
+    Every line matches the markers of the open quotes in order and closes the quotes it has no
+    marker for. Where no block is open, further markers open quotes nested in the innermost one.
+    The rest of the line goes to the innermost quote's scanner, so each line is looked at once.
+    Those scanners never see a line starting with >, so they never open quotes of their own.
+    @quote: The top level QUOTE block, holding its first line
+    """
+    __slots__ = ("quotes", "scanners")
+
+    def __init__(self, quote: Block):
+        self.quotes = [quote]
+        self.scanners = [BlockScanner()]
+        self.feed(quote.lines[0])
+
+    def feed(self, line: str):
+        """Scans a line of the top level quote
+        @line: The stripped line, starting with >
+        """
+        quotes = self.quotes
+        marker = QUOTE_MARKER_PATTERN.match(line)
+        marked, pos, depth = 0, marker.end(), 1
+        while depth < len(quotes):
+            marker = QUOTE_MARKER_PATTERN.match(line, pos)
+            if marker is None:
+                break
+            marked, pos, depth = pos, marker.end(), depth + 1
+        while len(quotes) > depth:
+            self.close_innermost()
+        # New quotes open where a block could start, as at the top level
+        while self.scanners[-1].block is None:
+            marker = QUOTE_MARKER_PATTERN.match(line, pos)
+            if marker is None:
+                break
+            quote = Block(BlockType.QUOTE, [], [])
+            quotes.append(quote)
+            self.scanners.append(BlockScanner())
+            marked, pos = pos, marker.end()
+        if len(quotes) > 1:
+            quotes[-1].lines.append(line[marked:].lstrip())
+        block = self.scanners[-1].feed(line[pos:])
+        if block is not None:
+            quotes[-1].children.append(block)
+
+    def close_innermost(self):
+        """Ends the innermost quote and adds it to the one around it"""
+        quote = self.quotes.pop()
+        block = self.scanners.pop().close()
+        if block is not None:
+            quote.children.append(block)
+        if all(child.block_type == BlockType.PARAGRAPH for child in quote.children):
+            quote.children = None
+        if self.quotes:
+            self.quotes[-1].children.append(quote)
+
+    def close(self):
+        """Ends every open quote"""
+        while self.quotes:
+            self.close_innermost()
+
+def is_list_item(line: str) -> bool:
+    """Checks whether a stripped line is an unordered or ordered list item
+    @line: The stripped line
+    """
+    return line.startswith("- ") or ORDERED_ITEM_PATTERN.match(line) is not None
+
+def list_to_html_node(lines: list[str], inline) -> HtmlNode:
+    """Converts a list block's lines to nested lists in one pass, keeping a stack of the open lists.
+    A line indented deeper than the innermost open list starts a list inside its last item. A
+    shallower one closes the lists it isn't deeper than the parent of, so an item dedented to
+    between two lists joins the deeper one. A change between - and N. starts a new list next to the old one.
+    @lines: The block's lines, with nested items indented relative to the first
+    @inline: Converts inline markdown text to child nodes
+    """
+    stack = []  # (indent, list node) of every open list, outermost first
+    for line in lines:
+        text = line.lstrip()
+        indent = len(line) - len(text)
+        if text.startswith("- "):
+            tag, content = "ul", text[2:]
+        else:
+            tag, content = "ol", ORDER_PREFIX_PATTERN.sub("", text, count=1)
+        while len(stack) > 1 and indent <= stack[-2][0]:
+            stack.pop()
+        if not stack or indent > stack[-1][0]:
+            node = ParentNode(tag=tag, children=[])
+            if stack:
+                stack[-1][1].children[-1].children.append(node)
+            stack.append((indent, node))
+        elif tag != stack[-1][1].tag:
+            node = ParentNode(tag=tag, children=[])
+            stack[-2][1].children[-1].children.append(node)
+            stack[-1] = (indent, node)
+        stack[-1][1].children.append(ParentNode(tag="li", children=list(inline(content))))
+    return stack[0][1]
+
+def quote_to_html_node(block: Block, inline) -> HtmlNode:
+    """Converts a QUOTE block to a blockquote, and the quotes nested in it without recursing.
+    A quote made only of text keeps it inline, without paragraphs.
+    @block: The QUOTE block, as found by scan_blocks
+    @inline: Converts inline markdown text to child nodes
+    """
+    root = ParentNode(tag="blockquote", children=[])
+    stack = [(block, root)]
+    while stack:
+        quote, node = stack.pop()
+        if quote.children is None:
+            text = "\n".join((line[2:] if line.startswith("> ") else line[1:]).lstrip() for line in quote.lines)
+            node.children = inline(text) or [LeafNode(tag=None, value="")]
+            continue
+        for child in quote.children:
+            if child.block_type == BlockType.QUOTE:
+                nested = ParentNode(tag="blockquote", children=[])
+                node.children.append(nested)
+                stack.append((child, nested))
+            else:
+                node.children.append(block_to_html_node(child, inline))
+    return root
+
+def split_row(line: str) -> list[str]:
+    """Splits a stripped table row into its stripped cells, in one pass over the line.
+    Leading and trailing pipes are optional, and an escaped pipe (\\|) stays in its cell.
+    @line: The stripped row
+    """
+    if "\\|" in line:
+        cells = [cell.replace("\\|", "|") for cell in ESCAPED_PIPE_PATTERN.split(line)]
+    else:
+        cells = line.split("|")
+    if len(cells) > 1 and line.startswith("|"):
+        del cells[0]
+    if len(cells) > 1 and line.endswith("|") and not line.endswith("\\|"):
+        del cells[-1]
+    return [cell.strip() for cell in cells]
+
+def is_table_start(header: str, line: str) -> bool:
+    """Checks whether a paragraph's first two lines open a table: a header row with
+    pipes, then a delimiter row with as many cells
+    @header: The paragraph's first line, stripped
+    @line: Its second line, stripped
+    """
+    return "|" in header and "-" in line and DELIMITER_ROW_PATTERN.fullmatch(line) is not None \
+        and len(split_row(header)) == len(split_row(line))
+
+def column_alignments(delimiter_row: str) -> list[str | None]:
+    """Reads each column's alignment from a delimiter row: left, center, right or None
+    @delimiter_row: The table's second line, stripped
+    """
+    return [ALIGNMENTS.get((cell.startswith(":"), cell.endswith(":"))) for cell in split_row(delimiter_row)]
+
+def table_to_html_node(lines: list[str], inline) -> HtmlNode:
+    """Converts a TABLE block's lines to a table, looking at every row once.
+    Rows are cut or padded to the header's width, as GFM does.
+    @lines: The header row, the delimiter row, then the body rows, all stripped
+    @inline: Converts inline markdown text to child nodes
+    """
+    alignments = column_alignments(lines[1])
+    styles = [{"style": f"text-align: {alignment}"} if alignment else None for alignment in alignments]
+    width = len(alignments)
+
+    def row(line: str, tag: str) -> HtmlNode:
+        cells = split_row(line)[:width]
+        cells.extend([""] * (width - len(cells)))
+        children = []
+        for cell, props in zip(cells, styles):
+            content = inline(cell) if cell else None
+            if content:
+                children.append(ParentNode(tag=tag, children=content, props=props))
+            else:
+                children.append(LeafNode(tag=tag, value="", props=props))
+        return ParentNode(tag="tr", children=children)
+
+    sections = [ParentNode(tag="thead", children=[row(lines[0], "th")])]
+    if len(lines) > 2:
+        sections.append(ParentNode(tag="tbody", children=[row(line, "td") for line in lines[2:]]))
+    return ParentNode(tag="table", children=sections)
 
 def markdown_to_blocks(markdown_text: str) -> list[str]:
     """Converts markdown text into a list of "block strings"
     @markdown_text: The markdown text to convert
     """
-    blocks = markdown_text.split("\n\n")
-    to_remove = set()
-    for i, block in enumerate(blocks):
-        stripped = "\n".join([line.strip() for line in block.split("\n")]).strip()
-        if stripped == "":
-            to_remove.add(i)
-            continue
-        blocks[i] = stripped
-    # Remove empty blocks in reverse order to avoid index shifting
-    for i in sorted(to_remove, reverse=True):
-        del blocks[i]
-    return blocks
+    return ["\n".join(block.lines) for block in scan_blocks(markdown_text)]
 
 def block_to_block_type(block: str) -> BlockType:
     """Determines the BlockType of a given markdown block string
     @block: The markdown block string
     """
-    lines = block.split("\n")
-    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
-        return BlockType.HEADING
-    elif len(lines) > 1 and lines[0].startswith("```") and lines[-1].endswith("```"):
-        return BlockType.CODE
-    if block.startswith(">"):
-        if all(line.startswith(">") for line in lines):
-            return BlockType.QUOTE
-        else:
-            return BlockType.PARAGRAPH
-    if block.startswith(("- ")):
-        if all(line.startswith("- ") for line in lines):
-            return BlockType.UNORDERED_LIST
-        else:
-            return BlockType.PARAGRAPH
-    if block.startswith("1. "):
-        if all(line.lstrip().startswith(f"{i+1}. ") for i, line in enumerate(lines)):
-            return BlockType.ORDERED_LIST
-        else:
-            return BlockType.PARAGRAPH
-    return BlockType.PARAGRAPH
+    found = next(scan_blocks(block), None)
+    return found.block_type if found is not None else BlockType.PARAGRAPH
+
+ORDER_PREFIX_PATTERN = re.compile(r"^\s*\d+\.\s+")
+
+@dataclass
+class Page:
+    """A markdown document parsed in one pass by markdown_to_page.
+    @root: The document's HtmlNodes under a div
+    @title: The front matter title, else the text of the first heading, None if there is neither
+    @front_matter: The fields declared in the front matter
+    """
+    root: HtmlNode
+    title: str | None
+    front_matter: FrontMatter
+
+def heading_title(block: Block) -> str:
+    """Returns the markdown text of a heading block's first line, without the leading hashes
+    @block: A HEADING block
+    """
+    return block.lines[0][block.lines[0].index(" "):].strip()
+
+def markdown_to_page(markdown: str, inline_cache: "InlineCache | None" = None) -> Page:
+    """Parses a markdown document's front matter, blocks and title in a single pass over its lines
+    @markdown: The markdown document to convert
+    @inline_cache: Optional cache of rendered inline text. When given, inline
+        content becomes pre-rendered HTML leaves instead of per-element nodes
+    """
+    inline = inline_cache.children if inline_cache is not None else text_to_children
+    lines = markdown.splitlines()
+    fields, start = parse_front_matter(lines)
+    front_matter = FrontMatter.from_fields(fields)
+    title = front_matter.title
+    nodes = []
+    for block in scan_lines(lines, start):
+        if title is None and block.block_type == BlockType.HEADING:
+            title = heading_title(block)
+        nodes.append(block_to_html_node(block, inline))
+    # For simplicity, we will just wrap the entire markdown in a <div> tag
+    return Page(ParentNode(tag="div", children=nodes), title, front_matter)
 
-def markdown_to_html_node(markdown: str) -> HtmlNode:
+def require_title(title: str | None) -> str:
+    """Returns a page's title, raising ValueError if it has none"""
+    if title is None:
+        raise ValueError("No header 1 found in the provided markdown text.")
+    return title
+
+def page_title(markdown: str) -> str | None:
+    """Finds the title markdown_to_page would, scanning no further than the first heading
+    @markdown: The markdown document
+    """
+    lines = markdown.splitlines()
+    fields, start = parse_front_matter(lines)
+    if fields.get("title"):
+        return fields["title"]
+    for block in scan_lines(lines, start):
+        if block.block_type == BlockType.HEADING:
+            return heading_title(block)
+    return None
+
+def markdown_to_html_node(markdown: str, inline_cache: "InlineCache | None" = None) -> HtmlNode:
     """Converts a markdown string to HtmlNodes under a single ParentNode
     which is a div
     @markdown: The markdown string to convert
+    @inline_cache: Optional cache of rendered inline text. When given, inline
+        content becomes pre-rendered HTML leaves instead of per-element nodes
     """
-    blocks = markdown_to_blocks(markdown)
-    nodes = []
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        match block_type:
-            case BlockType.HEADING:
-                # Count leading '#' characters to determine heading level
-                hash_match = block.split(" ", 1)[0]
-                heading_number = len(hash_match)
-                # Extract the heading text after the leading hashes and space
-                heading_text = block[len(hash_match):].strip()
-                node = ParentNode(tag=f"h{heading_number}", children=text_to_children(heading_text))
-                nodes.append(node)
-
-            case BlockType.CODE: # Should not do inline markdown parsing of children
-                lines = block.splitlines()
-                code_content = "\n".join(lines[1:-1])  # Strip the ```
-                if not code_content.endswith("\n"):
-                    code_content = code_content + "\n"
-                node = ParentNode(tag="pre", children=[
+    return markdown_to_page(markdown, inline_cache).root
+
+def block_to_html_node(block: Block, inline=None) -> HtmlNode:
+    """Converts a single markdown block to an HtmlNode
+    @block: The block, as found by scan_blocks
+    @inline: Converts inline markdown text to child nodes, defaults to text_to_children
+    """
+    inline = inline or text_to_children
+    lines = block.lines
+    match block.block_type:
+        case BlockType.HEADING:
+            # Count leading '#' characters to determine heading level
+            heading_number = lines[0].index(" ")
+            # Extract the heading text after the leading hashes and space
+            heading_text = "\n".join(lines)[heading_number:].strip()
+            return ParentNode(tag=f"h{heading_number}", children=inline(heading_text))
+
+        case BlockType.CODE: # Should not do inline markdown parsing of children
+            code_content = "\n".join(lines[1:-1])  # Strip the ```
+            if not code_content.endswith("\n"):
+                code_content = code_content + "\n"
+            language = fence_language(lines[0])
+            if language is None:
+                return ParentNode(tag="pre", children=[
                     LeafNode(tag="code", value=code_content)
                 ])
-                nodes.append(node)
+            props = {"class": f"language-{language}"}
+            highlighted = HIGHLIGHTER.highlight(language, code_content)
+            if highlighted is None:
+                return ParentNode(tag="pre", children=[LeafNode(tag="code", value=code_content, props=props)])
+            return ParentNode(tag="pre", children=[
+                ParentNode(tag="code", children=[RawNode(value=highlighted)], props=props)
+            ])
 
-            case BlockType.QUOTE:
-                # Remove leading '> ' from each line for the quote content
-                quote_text = "\n".join([line[1:].lstrip() if line.startswith(">") else line for line in block.split("\n")])
-                node = ParentNode(tag="blockquote", children=text_to_children(quote_text))
-                nodes.append(node)
+        case BlockType.QUOTE:
+            return quote_to_html_node(block, inline)
 
-            case BlockType.UNORDERED_LIST:
-                node = ParentNode(tag="ul", children=[
-                    ParentNode(tag="li", children=text_to_children(line[2:])) for line in block.split("\n")
-                ])
-                nodes.append(node)
-            case BlockType.ORDERED_LIST:
-                # Remove the leading 'N. ' prefix from ordered list items
-                def strip_order_prefix(line: str) -> str:
-                    return re.sub(r"^\s*\d+\.\s+", "", line)
-
-                node = ParentNode(tag="ol", children=[
-                    ParentNode(tag="li", children=text_to_children(strip_order_prefix(line))) for line in block.split("\n")
-                ])
-                nodes.append(node)
+        case BlockType.UNORDERED_LIST | BlockType.ORDERED_LIST:
+            return list_to_html_node(lines, inline)
 
-            case BlockType.PARAGRAPH:
-                para_text = " ".join(line.strip() for line in block.split("\n") if line.strip() != "")
-                node = ParentNode(tag="p", children=text_to_children(para_text))
-                nodes.append(node)
+        case BlockType.TABLE:
+            return table_to_html_node(lines, inline)
 
-    # For simplicity, we will just wrap the entire markdown in a <div> tag
-    return ParentNode(tag="div", children=nodes)
+        case _:
+            para_text = " ".join(lines)
+            return ParentNode(tag="p", children=inline(para_text))
 
 def text_to_children(text: str) -> list[LeafNode]:
     """Converts a markdown text string into a list of TextNodes,
@@ -124,3 +492,51 @@ def text_to_children(text: str) -> list[LeafNode]:
     return leaves
 
 
+
+
+class InlineCache:
+    """Bounded LRU cache from raw inline markdown to its rendered HTML.
+    Nav lists, footers and repeated headings are parsed once per process instead of once per page.
+    Root relative URLs are rebased when a fragment is rendered, since the leaves it
+    replaces are no longer in the tree for rebase_urls to find.
+    @maxsize: Number of fragments to keep
+    @basepath: Base path the site is served from
+    @assets: Root relative URL -> fingerprinted URL
+    """
+    def __init__(self, maxsize: int = 4096, basepath: str = "/", assets: dict[str, str] | None = None):
+        self.basepath = basepath
+        self.assets = assets or {}
+        self.render = lru_cache(maxsize=maxsize)(self.render_uncached)
+
+    def render_uncached(self, text: str) -> str:
+        """Renders inline markdown to HTML without the cache.
+        @text: The markdown text to render
+        """
+        leaves = text_to_children(text)
+        if not leaves:
+            return ""
+        fragment = ParentNode(tag="span", children=leaves)
+        rebase_urls(fragment, self.basepath, self.assets)
+        return "".join(leaf.to_html() for leaf in leaves)
+
+    def children(self, text: str) -> list[LeafNode]:
+        """Drop-in replacement for text_to_children returning one pre-rendered leaf.
+        @text: The markdown text to convert
+        """
+        html = self.render(text)
+        return [RawNode(value=html)] if html else []
+
+    @property
+    def hits(self) -> int:
+        return self.render.cache_info().hits
+
+    @property
+    def misses(self) -> int:
+        return self.render.cache_info().misses
+
+    def info(self) -> str:
+        """Formats the counters for logs, e.g. when tuning maxsize."""
+        info = self.render.cache_info()
+        lookups = info.hits + info.misses
+        rate = info.hits / lookups if lookups else 0.0
+        return f"inline cache: {info.hits} hits, {info.misses} misses ({rate:.1%} hit rate), {info.currsize}/{info.maxsize} entries"
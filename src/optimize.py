@@ -0,0 +1,183 @@
+import gzip
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # Optional, only .gz siblings are written without it
+    brotli = None
+
+# Elements whose contents are left exactly as they are
+PROTECTED_PATTERN = re.compile(r"<(pre|code|textarea|script|style)\b[^>]*>.*?</\1\s*>", re.S | re.I)
+COMMENT_PATTERN = re.compile(r"<!--(?!\[if).*?-->", re.S)
+TAG_PATTERN = re.compile(r"(<[^>]*>)")
+TAG_NAME_PATTERN = re.compile(r"</?([A-Za-z][\w-]*)")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+# Whitespace next to these tags never renders, so it can be dropped rather than collapsed
+BLOCK_TAGS = frozenset((
+    "html", "head", "body", "title", "meta", "link", "base", "article", "aside", "blockquote", "div", "footer",
+    "header", "main", "nav", "section", "p", "pre", "ul", "ol", "li", "h1", "h2", "h3", "h4", "h5", "h6",
+    "table", "thead", "tbody", "tfoot", "tr", "td", "th", "br", "hr",
+))
+
+CSS_SKIP_PATTERN = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/""", re.S)
+CSS_PUNCTUATION_PATTERN = re.compile(r"\s*([{};,>])\s*|(:)\s+")
+
+COMPRESSIBLE = (".html", ".css", ".js", ".svg", ".xml", ".json", ".txt")
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+
+def is_block_tag(tag: str) -> bool:
+    """Checks whether whitespace next to a tag is insignificant. Doctypes count as block tags.
+    @tag: The whole tag, e.g. '<p class="x">'
+    """
+    match = TAG_NAME_PATTERN.match(tag)
+    return match is None or match.group(1).lower() in BLOCK_TAGS
+
+
+def minify_markup(html: str, before: str = "", after: str = "") -> str:
+    """Minifies HTML that contains no protected elements.
+    Comments are dropped, whitespace in text collapses to one space, and whitespace
+    between two tags goes entirely when either of them is a block tag.
+    @html: The HTML to minify
+    @before: The tag just before html, "" at the start of the page
+    @after: The tag just after html, "" at the end of the page
+    """
+    parts = [before] + TAG_PATTERN.split(COMMENT_PATTERN.sub("", html)) + [after]
+    # Between before and after, parts alternates text and tags, starting and ending with text
+    for i in range(1, len(parts) - 1, 2):
+        text = WHITESPACE_PATTERN.sub(" ", parts[i])
+        if text == " " and (is_block_tag(parts[i - 1]) or is_block_tag(parts[i + 1])):
+            text = ""
+        parts[i] = text
+    return "".join(parts[1:-1])
+
+
+def minify_html(html: str) -> str:
+    """Minifies an HTML page without changing how it renders.
+    The contents of pre, code, textarea and script elements are kept byte for byte,
+    and style elements have their CSS minified.
+    @html: The page to minify
+    """
+    pieces = []
+    position = 0
+    previous = ""
+    for match in PROTECTED_PATTERN.finditer(html):
+        element = match.group(0)
+        pieces.append(minify_markup(html[position:match.start()], previous, element[:element.index(">") + 1]))
+        previous = element[element.rindex("<"):]
+        if match.group(1).lower() == "style":
+            open_end, close_start = element.index(">") + 1, element.rindex("<")
+            element = element[:open_end] + minify_css(element[open_end:close_start]) + element[close_start:]
+        pieces.append(element)
+        position = match.end()
+    pieces.append(minify_markup(html[position:], previous))
+    return "".join(pieces).strip()
+
+
+def minify_css(css: str) -> str:
+    """Minifies a stylesheet: drops comments and whitespace that doesn't separate tokens.
+    Strings are kept as they are.
+    @css: The stylesheet to minify
+    """
+    # Strings go in and out untouched by swapping them for numbered markers
+    strings = []
+
+    def skip(match):
+        if match.group(1) is None:
+            return " "  # A comment still separates what is around it
+        strings.append(match.group(1))
+        return f"\0{len(strings) - 1}\0"
+
+    text = CSS_SKIP_PATTERN.sub(skip, css)
+    text = WHITESPACE_PATTERN.sub(" ", text)
+    # Whitespace before a colon stays, as in "a :hover" it is a descendant combinator
+    text = CSS_PUNCTUATION_PATTERN.sub(lambda match: match.group(1) or match.group(2), text)
+    text = text.replace(";}", "}")
+    return re.sub(r"\0(\d+)\0", lambda match: strings[int(match.group(1))], text).strip()
+
+
+MINIFIERS = {".html": minify_html, ".css": minify_css}
+# mtime=0 keeps a .gz identical between builds of the same file
+COMPRESSORS = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+if brotli is not None:
+    COMPRESSORS[".br"] = brotli.compress
+
+
+def postprocess_options(minify: bool, compress: bool) -> list[str]:
+    """Names the post-processing a build applies, for the manifest to notice when it changes.
+    @minify: Minify HTML and CSS files
+    @compress: Write precompressed siblings
+    """
+    options = ["minify"] if minify else []
+    if compress:
+        options += ["gzip", "brotli"] if brotli is not None else ["gzip"]
+    return options
+
+
+def write_bytes(path: Path, data: bytes):
+    """Replaces a file through a temporary file, so readers never see it half written.
+    @path: The file to write
+    @data: Its new contents
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+
+
+def optimize_file(path: Path, minify: bool = True, compress: bool = True) -> int:
+    """Minifies an HTML or CSS file in place and writes .gz (and .br) siblings of compressible files.
+    The file keeps its mtime, so incremental syncs still see it as placed from its source.
+    Without compress, siblings left by an earlier build are removed.
+    Returns the file's size afterwards.
+    @path: The output file
+    @minify: Minify HTML and CSS files
+    @compress: Write precompressed siblings
+    """
+    data = path.read_bytes()
+    minifier = MINIFIERS.get(path.suffix) if minify else None
+    if minifier is not None:
+        try:
+            minified = minifier(data.decode("utf-8")).encode("utf-8")
+        except UnicodeDecodeError:  # Not UTF-8, so leave it alone rather than guess
+            minified = data
+        if minified != data:
+            stat = path.stat()
+            write_bytes(path, minified)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            data = minified
+    for suffix in COMPRESSED_SUFFIXES:
+        sibling = path.with_name(path.name + suffix)
+        if compress and suffix in COMPRESSORS and path.suffix in COMPRESSIBLE:
+            write_bytes(sibling, COMPRESSORS[suffix](data))
+        else:
+            sibling.unlink(missing_ok=True)
+    return len(data)
+
+
+def optimize_files(paths: list[Path], minify: bool = True, compress: bool = True,
+                   jobs: int = 1) -> list[tuple[Path, int | None, Exception | None]]:
+    """Runs optimize_file on every path, across a process pool when jobs > 1.
+    Returns (path, size, error) for each path in order; size is None when it failed.
+    @paths: Files to optimize
+    @minify: Minify HTML and CSS files
+    @compress: Write precompressed siblings
+    @jobs: Number of worker processes
+    """
+    if jobs <= 1 or len(paths) <= 1:
+        results = []
+        for path in paths:
+            try:
+                results.append((path, optimize_file(path, minify, compress), None))
+            except OSError as e:
+                results.append((path, None, e))
+        return results
+    with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as pool:
+        futures = [pool.submit(optimize_file, path, minify, compress) for path in paths]
+        results = []
+        for path, future in zip(paths, futures):
+            error = future.exception()
+            results.append((path, future.result() if error is None else None, error))
+        return results
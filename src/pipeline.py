@@ -0,0 +1,69 @@
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Callable, Iterator, Sequence
+
+
+def completed(fn: Callable, *args) -> Future:
+    """Runs fn right away and returns its outcome as a finished Future.
+    Lets in-process rendering share the code path of a process pool.
+    @fn: Function to call
+    @args: Arguments for fn
+    """
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def failed(error: Exception) -> Future:
+    """Returns a finished Future holding error, to keep a failed item's place in line.
+    @error: The exception to hold
+    """
+    future = Future()
+    future.set_exception(error)
+    return future
+
+
+def pipelined(items: Sequence, read: Callable, render: Callable, write: Callable, io_threads: int = 4,
+              window: int | None = None, render_pool: Executor | None = None) -> Iterator[tuple[object, Exception | None]]:
+    """Reads, renders and writes items with the I/O overlapped with rendering.
+    Upcoming items are read ahead by io_threads threads and finished items are written
+    behind by as many more, while render runs in this thread (or in render_pool). At most
+    window items wait at each stage, so memory stays bounded however many items there are.
+    Yields one (result, error) pair per item, in order: what write returned once the item is
+    written, or None and the exception that stopped it.
+    @items: What to process
+    @read: read(item) returns the input for render
+    @render: render(item, data) returns the input for write; must be picklable for a process pool
+    @write: write(item, output) stores the output, and may return something for the caller
+    @io_threads: Threads for reading, and as many again for writing
+    @window: Items allowed to wait at each stage, defaults to 4 per I/O thread
+    @render_pool: Executor to render in; rendering happens in this thread when None
+    """
+    window = window or io_threads * 4
+    submit_render = render_pool.submit if render_pool is not None else completed
+    upcoming = iter(items)
+    reads, renders, writes = deque(), deque(), deque()
+    with ThreadPoolExecutor(io_threads, thread_name_prefix="read") as readers, \
+            ThreadPoolExecutor(io_threads, thread_name_prefix="write") as writers:
+        def read_ahead():
+            while len(reads) < window and (item := next(upcoming, None)) is not None:
+                reads.append((item, readers.submit(read, item)))
+
+        read_ahead()
+        while reads or renders or writes:
+            if reads and len(renders) < window:
+                item, future = reads.popleft()
+                read_ahead()
+                error = future.exception()
+                renders.append((item, failed(error) if error else submit_render(render, item, future.result())))
+            elif renders and len(writes) < window:
+                item, future = renders.popleft()
+                error = future.exception()
+                writes.append(failed(error) if error else writers.submit(write, item, future.result()))
+            else:
+                future = writes.popleft()
+                error = future.exception()
+                yield (future.result() if error is None else None), error
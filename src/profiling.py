@@ -0,0 +1,169 @@
+import cProfile
+import json
+import time
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from fnmatch import fnmatch
+from pathlib import Path
+
+STAGES = ("read", "parse", "render", "template", "write")
+
+
+@dataclass
+class PageTiming:
+    """Seconds spent on each stage of generating one page.
+    @src: Path of the markdown source
+    @cache_hits: Inline cache hits while parsing the page
+    @cache_misses: Inline cache misses while parsing the page
+    """
+    src: str
+    read: float = 0.0
+    parse: float = 0.0
+    render: float = 0.0
+    template: float = 0.0
+    write: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    @property
+    def total(self) -> float:
+        return self.read + self.parse + self.render + self.template + self.write
+
+
+class StageTimer:
+    """Fills in a PageTiming one stage at a time.
+    Each call to lap() charges the time since the previous lap to the given stage.
+    """
+    def __init__(self, src: Path):
+        self.timing = PageTiming(str(src))
+        self.last = time.perf_counter()
+
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        setattr(self.timing, stage, getattr(self.timing, stage) + now - self.last)
+        self.last = now
+
+
+@dataclass
+class BuildStats:
+    """Collects per-page timings for a build and decides which pages get profiled.
+    @profile: Glob patterns, matched against source paths relative to the content
+        directory, of the pages to run under cProfile
+    @profile_dir: Directory the .prof files are written to
+    @pages: Timings of every page rendered so far
+    """
+    profile: list[str] = field(default_factory=list)
+    profile_dir: Path = Path("profiles")
+    pages: list[PageTiming] = field(default_factory=list)
+
+    def profile_path(self, key: str) -> Path | None:
+        """Returns where to write the profile of a page, or None if it isn't profiled.
+        @key: Source path relative to the content directory
+        """
+        if not any(fnmatch(key, pattern) for pattern in self.profile):
+            return None
+        return self.profile_dir / (key.replace("/", "__") + ".prof")
+
+    def add(self, timing: PageTiming):
+        self.pages.append(timing)
+
+    def totals(self) -> dict[str, float]:
+        """Returns the seconds spent on each stage across every page."""
+        return {stage: sum(getattr(page, stage) for page in self.pages) for stage in STAGES}
+
+    def report(self, slowest: int = 10) -> str:
+        """Formats the aggregate timings and the slowest pages.
+        @slowest: Number of slow pages to list
+        """
+        totals = self.totals()
+        overall = sum(totals.values())
+        lines = [f"Build stats for {len(self.pages)} page(s), {overall:.3f}s in total:"]
+        for stage, seconds in totals.items():
+            share = seconds / overall if overall else 0.0
+            lines.append(f"  {stage:>8}: {seconds:8.3f}s ({share:5.1%})")
+        hits = sum(page.cache_hits for page in self.pages)
+        misses = sum(page.cache_misses for page in self.pages)
+        if hits + misses:
+            lines.append(f"  inline cache: {hits} hits, {misses} misses ({hits / (hits + misses):.1%} hit rate)")
+        lines.append("Slowest pages:")
+        for page in sorted(self.pages, key=lambda p: p.total, reverse=True)[:slowest]:
+            stages = " ".join(f"{stage}={getattr(page, stage) * 1000:.1f}ms" for stage in STAGES)
+            lines.append(f"  {page.total * 1000:8.1f}ms {page.src} ({stages})")
+        return "\n".join(lines)
+
+    def save(self, path: Path):
+        """Writes the aggregate and per-page timings as JSON.
+        @path: Path of the JSON file
+        """
+        data = {"totals": self.totals(), "pages": [asdict(page) for page in self.pages]}
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+
+
+@dataclass
+class LatencyStats:
+    """Request latencies of a long running render service, per method.
+    Only the latest window samples of each method are kept, so a service that runs for days stays small.
+    @window: Samples kept per method for the percentiles
+    @counts: Requests served per method since the start
+    @samples: The latest latencies in seconds, per method
+    """
+    window: int = 10000
+    counts: dict[str, int] = field(default_factory=dict)
+    samples: dict[str, deque] = field(default_factory=dict)
+
+    def add(self, method: str, seconds: float):
+        self.counts[method] = self.counts.get(method, 0) + 1
+        if method not in self.samples:
+            self.samples[method] = deque(maxlen=self.window)
+        self.samples[method].append(seconds)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Returns the request count and the mean, p50, p95, p99 and max latency in ms of each method."""
+        summary = {}
+        for method, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+
+            def percentile(q: float) -> float:
+                return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+
+            summary[method] = {
+                "count": self.counts[method],
+                "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+                "p50_ms": percentile(0.5),
+                "p95_ms": percentile(0.95),
+                "p99_ms": percentile(0.99),
+                "max_ms": round(ordered[-1] * 1000, 3),
+            }
+        return summary
+
+    def report(self) -> str:
+        """Formats the summary, one line per method."""
+        lines = [f"Served {sum(self.counts.values())} request(s):"]
+        for method, stats in self.summary().items():
+            lines.append(f"  {method:>6}: {stats['count']} requests, mean {stats['mean_ms']:.2f}ms, "
+                         f"p50 {stats['p50_ms']:.2f}ms, p95 {stats['p95_ms']:.2f}ms, max {stats['max_ms']:.2f}ms")
+        return "\n".join(lines)
+
+
+def start_profile(profile_path: Path | None) -> cProfile.Profile | None:
+    """Starts a cProfile session if profile_path is set.
+    @profile_path: Where the profile will be written, or None to skip profiling
+    """
+    if profile_path is None:
+        return None
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def stop_profile(profiler: cProfile.Profile | None, profile_path: Path | None):
+    """Stops a session from start_profile and writes it to profile_path.
+    @profiler: The running profiler, or None
+    @profile_path: Where to write the profile
+    """
+    if profiler is None:
+        return
+    profiler.disable()
+    profile_path.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(profile_path)
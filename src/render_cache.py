@@ -0,0 +1,117 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+try:
+    import pygments
+except ImportError:  # Optional, see highlight.py
+    pygments = None
+
+# Modules whose code decides the rendered article HTML. Their source is part of
+# every cache key, so changing the renderer never serves stale output.
+RENDERER_MODULES = ("htmlnode.py", "textnode.py", "extract_markdown.py", "markdown_to_html.py", "template.py",
+                    "front_matter.py", "highlight.py")
+
+
+def renderer_version() -> str:
+    """Returns a digest of the renderer's source code and of the highlighter's version."""
+    digest = hashlib.sha256()
+    if pygments is not None:
+        digest.update(f"pygments {pygments.__version__}".encode())
+    here = Path(__file__).parent
+    for name in RENDERER_MODULES:
+        digest.update(name.encode())
+        digest.update((here / name).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class RenderCache:
+    """Content-addressed directory of rendered article HTML, shared between builds and machines.
+    Entries are keyed by the markdown, the base path and the renderer version, and are
+    written atomically so any number of worker processes can read and fill it at once.
+    @directory: Where entries are stored
+    @version: Renderer version mixed into every key, defaults to renderer_version()
+    """
+    def __init__(self, directory: Path, version: str | None = None):
+        self.directory = Path(directory)
+        self.version = version if version is not None else renderer_version()
+
+    def key(self, markdown: str, basepath: str) -> str:
+        """Returns the cache key of a page.
+        @markdown: The page's markdown source
+        @basepath: Base path the page is rendered with, or Template.url_key when assets are fingerprinted
+        """
+        digest = hashlib.sha256(f"{self.version}\0{basepath}\0".encode())
+        digest.update(markdown.encode("utf-8"))
+        return digest.hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.html"
+
+    def get(self, markdown: str, basepath: str) -> str | None:
+        """Returns the cached article HTML of a page, or None on a miss.
+        A hit refreshes the entry's mtime, which eviction uses as its last use, when the cache
+        is writable; a read-only or foreign cache (e.g. restored on CI) is still used.
+        @markdown: The page's markdown source
+        @basepath: Base path the page is rendered with, or Template.url_key when assets are fingerprinted
+        """
+        path = self.path(self.key(markdown, basepath))
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                html = f.read()
+        except FileNotFoundError:  # Never cached, or evicted under our feet
+            return None
+        try:
+            os.utime(path)
+        except OSError:  # Read-only or someone else's, the entry just looks older to eviction
+            pass
+        return html
+
+    def put(self, markdown: str, basepath: str, html: str):
+        """Stores the article HTML of a page.
+        The entry is written to a private temporary file and renamed into place, so readers
+        never see a partial entry and concurrent writers of the same page just race to rename.
+        @markdown: The page's markdown source
+        @basepath: Base path the page was rendered with, or Template.url_key when assets are fingerprinted
+        @html: The rendered article HTML
+        """
+        path = self.path(self.key(markdown, basepath))
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        except OSError:  # A read-only cache is read from but not added to
+            return
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(html)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def evict(self, max_bytes: int) -> int:
+        """Deletes the least recently used entries until the cache fits in max_bytes.
+        Returns the number of entries deleted.
+        @max_bytes: Size limit of the cache directory
+        """
+        entries = []
+        total = 0
+        for path in self.directory.glob("*/*.html"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+            total += stat.st_size
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:  # Read-only, left for whoever owns it
+                continue
+            total -= size
+            evicted += 1
+        return evicted
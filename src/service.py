@@ -0,0 +1,163 @@
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import TextIO
+from htmlnode import escape_text
+from markdown_to_html import InlineCache, markdown_to_page, require_title
+from profiling import LatencyStats
+from template import TemplateLoader, rebase_urls
+from watch import file_state, snapshot
+
+METHODS = ("html", "page", "stats")
+
+
+class RenderService:
+    """Renders markdown on request for previews, keeping templates and caches warm between requests.
+    Requests and responses are JSON objects, the same over stdin/stdout and HTTP:
+        {"id": 1, "method": "page", "markdown": "# Title", "template": "post.html"}
+        {"id": 1, "html": "<!doctype html>...", "title": "Title", "ms": 0.41}
+    "html" renders just the article, "page" renders it through its template (the "template"
+    field, else the page's front matter, else the default) and "stats" returns the latency of
+    every method so far. A failed request answers with an "error" field instead.
+    @template_path: Path of the default template
+    @templates: Directory of the selectable templates and of all partials
+    @basepath: Base path the site is served from
+    @inline_cache_size: Number of inline fragments to cache across requests, 0 disables the cache
+    """
+    def __init__(self, template_path: Path, templates: Path = Path("templates"), basepath: str = "/",
+                 inline_cache_size: int = 0):
+        self.loader = TemplateLoader(template_path, templates, basepath)
+        self.inline_cache = InlineCache(inline_cache_size, basepath) if inline_cache_size > 0 else None
+        self.stats = LatencyStats()
+        self.layouts = self.layout_state()
+
+    def layout_state(self) -> tuple:
+        """Returns the mtime and size of the default template and of everything in the templates directory."""
+        return file_state(self.loader.default), snapshot(self.loader.directory)
+
+    def refresh(self):
+        """Drops the compiled templates when a template or partial changed on disk, so previews pick up edits."""
+        layouts = self.layout_state()
+        if layouts != self.layouts:
+            self.layouts = layouts
+            self.loader.clear()
+
+    def render_html(self, markdown: str) -> dict:
+        """Renders a document's article HTML, with its links rebased as in a built page.
+        @markdown: The markdown document
+        """
+        page = markdown_to_page(markdown, self.inline_cache)
+        rebase_urls(page.root, self.loader.basepath)
+        return {"html": page.root.to_html(), "title": page.title}
+
+    def render_page(self, markdown: str, template: str | None = None) -> dict:
+        """Renders a document to the complete page the build would write for it.
+        @markdown: The markdown document
+        @template: Name of the template to use instead of the front matter's
+        """
+        page = markdown_to_page(markdown, self.inline_cache)
+        title = require_title(page.title)
+        self.refresh()
+        compiled = self.loader.get(template if template is not None else page.front_matter.template)
+        rebase_urls(page.root, compiled.basepath, compiled.assets)
+        return {"html": compiled.render(Content=page.root.to_html(), Title=escape_text(title)), "title": title}
+
+    def handle(self, request: dict) -> dict:
+        """Answers one request and records its latency.
+        Errors are answered rather than raised, so one bad document never stops the service.
+        @request: The decoded request
+        """
+        started = time.perf_counter()
+        method = request.get("method", "page")
+        response = {"id": request["id"]} if "id" in request else {}
+        if method == "stats":
+            response["stats"] = self.stats.summary()
+            return response
+        try:
+            markdown = request.get("markdown")
+            if method not in METHODS:
+                raise ValueError(f"Unknown method: {method}")
+            if not isinstance(markdown, str):
+                raise ValueError("The request has no markdown")
+            if method == "html":
+                response.update(self.render_html(markdown))
+            else:
+                response.update(self.render_page(markdown, request.get("template")))
+        except Exception as e:
+            response["error"] = str(e)
+        elapsed = time.perf_counter() - started
+        self.stats.add(method if method in METHODS else "error", elapsed)
+        response["ms"] = round(elapsed * 1000, 3)
+        return response
+
+
+def decode_request(text: str) -> dict:
+    """Parses a request, raising ValueError if it isn't a JSON object.
+    @text: The request as received
+    """
+    request = json.loads(text)
+    if not isinstance(request, dict):
+        raise ValueError("A request must be a JSON object")
+    return request
+
+
+def serve_stdio(service: RenderService, stdin: TextIO = sys.stdin, stdout: TextIO = sys.stdout):
+    """Answers line-delimited JSON requests until stdin closes, one response line per request line, in order.
+    @service: The service answering requests
+    @stdin: Where requests are read from
+    @stdout: Where responses are written, flushed after each one
+    """
+    for line in stdin:
+        if not line.strip():
+            continue
+        try:
+            response = service.handle(decode_request(line))
+        except ValueError as e:
+            response = {"error": f"Invalid request: {e}"}
+        stdout.write(json.dumps(response) + "\n")
+        stdout.flush()
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    """POST / (or /html, /page) with a JSON request renders it, GET /stats returns the latencies."""
+    def send_json(self, status: int, data: dict):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = decode_request(self.rfile.read(length).decode("utf-8"))
+        except ValueError as e:
+            self.send_json(400, {"error": f"Invalid request: {e}"})
+            return
+        if self.path.strip("/"):
+            request.setdefault("method", self.path.strip("/"))
+        response = self.server.service.handle(request)
+        self.send_json(400 if "error" in response else 200, response)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            self.send_json(200, self.server.service.handle({"method": "stats"}))
+        else:
+            self.send_json(404, {"error": f"Not found: {self.path}"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(service: RenderService, port: int) -> HTTPServer:
+    """Creates an HTTP server for the service on localhost. Call serve_forever() on it to start answering.
+    Requests are answered one at a time, which keeps the caches simple and each preview's latency steady.
+    @service: The service answering requests
+    @port: Port to listen on, 0 picks a free one
+    """
+    server = HTTPServer(("127.0.0.1", port), RenderHandler)
+    server.service = service
+    return server
@@ -0,0 +1,202 @@
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TextIO
+from htmlnode import HtmlNode
+from manifest import hash_file
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{ (\w+) \}\}")
+INCLUDE_PATTERN = re.compile(r"\{\{> ([\w./-]+) \}\}")
+URL_PROPS = ("href", "src")
+URL_ATTRIBUTE_PATTERN = re.compile(r'\b(href|src)="(/[^"]*)"')
+
+
+def rebase_url(url: str, basepath: str, assets: dict[str, str] | None = None) -> str:
+    """Returns a root relative URL as it is served: swapped for its fingerprinted
+    name if it is a fingerprinted asset, then prefixed with basepath.
+    @url: A URL starting with /
+    @basepath: Base path the site is served from
+    @assets: Root relative URL -> fingerprinted URL
+    """
+    if assets:
+        path = url.split("?", 1)[0].split("#", 1)[0]
+        if path in assets:
+            url = assets[path] + url[len(path):]
+    return basepath + url[1:]
+
+
+def rebase_html(html: str, basepath: str, assets: dict[str, str] | None = None) -> str:
+    """Rewrites root relative href/src attributes in an HTML string with rebase_url.
+    @html: The HTML text to rewrite
+    @basepath: Base path the site is served from
+    @assets: Root relative URL -> fingerprinted URL
+    """
+    if basepath == "/" and not assets:
+        return html
+    return URL_ATTRIBUTE_PATTERN.sub(
+        lambda match: f'{match.group(1)}="{rebase_url(match.group(2), basepath, assets)}"', html)
+
+
+def rebase_urls(root: HtmlNode, basepath: str, assets: dict[str, str] | None = None):
+    """Rewrites root relative href/src props in an HtmlNode tree with rebase_url, in place.
+    @root: The root of the tree to rewrite
+    @basepath: Base path the site is served from
+    @assets: Root relative URL -> fingerprinted URL
+    """
+    if basepath == "/" and not assets:
+        return
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.props:
+            for prop in URL_PROPS:
+                url = node.props.get(prop)
+                if url is not None and url.startswith("/"):
+                    node.props[prop] = rebase_url(url, basepath, assets)
+        if node.children:
+            stack.extend(node.children)
+
+
+def check_inside(directory: Path, path: Path) -> Path:
+    """Returns path, raising ValueError if it resolves outside directory, e.g. a name like ../../etc/passwd.
+    Names come from page front matter and preview requests, so they must not reach other files.
+    @directory: Directory the path must stay in
+    @path: The path to check, directory joined with a name
+    """
+    if not path.resolve().is_relative_to(directory.resolve()):
+        raise ValueError(f"{path.as_posix()} is outside {directory.as_posix()}")
+    return path
+
+
+def expand_includes(path: Path, partials: Path, dependencies: dict[str, str], chain: tuple[Path, ...] = ()) -> str:
+    """Reads a template and replaces its {{> name }} includes with the named partials, recursively.
+    @path: The template or partial to read
+    @partials: Directory partial names are relative to
+    @dependencies: Every file read is added here as posix path -> sha256
+    @chain: Files currently being expanded, to catch include cycles
+    """
+    if path in chain:
+        raise ValueError(f"Partial includes itself: {' -> '.join(p.as_posix() for p in chain + (path,))}")
+    dependencies[path.as_posix()] = hash_file(path)
+    with path.open("r", encoding="utf-8") as f:
+        text = f.read()
+    return INCLUDE_PATTERN.sub(lambda match: expand_includes(check_inside(partials, partials / match.group(1)),
+                                                             partials, dependencies, chain + (path,)), text)
+
+
+@dataclass
+class Template:
+    """An HTML template split at its {{ Placeholder }}s once, so pages render with a single join.
+    @parts: Static text and placeholder names, alternating and starting with static text
+    @basepath: Base path already applied to the static text
+    @dependencies: Files the template was built from (itself and its partials), posix path -> sha256
+    @assets: Root relative URL -> fingerprinted URL, applied to the static text and to pages
+    """
+    parts: list[str]
+    basepath: str = "/"
+    dependencies: dict[str, str] = field(default_factory=dict)
+    assets: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def compile(cls, text: str, basepath: str = "/", assets: dict[str, str] | None = None) -> "Template":
+        """Splits template text at its placeholders and rebases the static parts.
+        @text: The template HTML
+        @basepath: Base path the site is served from
+        @assets: Root relative URL -> fingerprinted URL
+        """
+        # re.split with one group alternates static text and placeholder names
+        parts = PLACEHOLDER_PATTERN.split(text)
+        for i in range(0, len(parts), 2):
+            parts[i] = rebase_html(parts[i], basepath, assets)
+        return cls(parts, basepath, assets=dict(assets or {}))
+
+    @classmethod
+    def load(cls, path: Path, basepath: str = "/", partials: Path | None = None,
+             assets: dict[str, str] | None = None) -> "Template":
+        """Reads and compiles a template file, expanding its {{> name }} partials.
+        @path: Path to the template file
+        @basepath: Base path the site is served from
+        @partials: Directory partial names are relative to, defaults to the template's own directory
+        @assets: Root relative URL -> fingerprinted URL
+        """
+        dependencies = {}
+        text = expand_includes(path, partials if partials is not None else path.parent, dependencies)
+        template = cls.compile(text, basepath, assets)
+        template.dependencies = dependencies
+        return template
+
+    @property
+    def url_key(self) -> str:
+        """What the URLs in a rendered page depend on, for cache keys: the base path and the asset map."""
+        if not self.assets:
+            return self.basepath
+        return f"{self.basepath}\0{json.dumps(self.assets, sort_keys=True)}"
+
+    def render(self, **values: str) -> str:
+        """Fills in the placeholders. Unknown placeholders are left as they were.
+        @values: Placeholder name to text, e.g. Content="<div>...</div>", Title="Home"
+        """
+        pieces = self.parts.copy()
+        for i in range(1, len(pieces), 2):
+            name = pieces[i]
+            pieces[i] = values[name] if name in values else f"{{{{ {name} }}}}"
+        return "".join(pieces)
+
+    def write(self, stream: TextIO, **values: "str | HtmlNode"):
+        """Streams the filled in template to a file-like object.
+        HtmlNode values are written with write_html, so the page is never held as one string.
+        @stream: Where to write the page
+        @values: Placeholder name to text or HtmlNode
+        """
+        for i, part in enumerate(self.parts):
+            if i % 2 == 0:
+                stream.write(part)
+                continue
+            value = values.get(part)
+            if value is None:
+                stream.write(f"{{{{ {part} }}}}")
+            elif isinstance(value, HtmlNode):
+                value.write_html(stream)
+            else:
+                stream.write(value)
+
+
+class TemplateLoader:
+    """Compiles each template a build uses once, however many pages pick it.
+    Pages pick a template by name in their front matter; names and partials are
+    looked up in directory, and pages without one use the default template.
+    @default: Path of the default template
+    @directory: Directory of the selectable templates and of all partials
+    @basepath: Base path the site is served from
+    @assets: Root relative URL -> fingerprinted URL
+    """
+    def __init__(self, default: Path, directory: Path, basepath: str = "/", assets: dict[str, str] | None = None):
+        self.default = default
+        self.directory = directory
+        self.basepath = basepath
+        self.assets = assets or {}
+        self.templates: dict[Path, Template] = {}
+
+    def path(self, name: str | None = None) -> Path:
+        """Returns the file of the template called name, or of the default template.
+        @name: Template name from a page's front matter
+        """
+        return self.default if not name else self.directory / name
+
+    def get(self, name: str | None = None) -> Template:
+        """Returns the compiled template called name, loading it on first use.
+        Raises ValueError for a name outside directory.
+        @name: Template name from a page's front matter
+        """
+        path = self.path(name)
+        template = self.templates.get(path)
+        if template is None:
+            if name:
+                check_inside(self.directory, path)
+            template = self.templates[path] = Template.load(path, self.basepath, self.directory, self.assets)
+        return template
+
+    def clear(self):
+        """Forgets the compiled templates so edited files are read again."""
+        self.templates.clear()
@@ -0,0 +1,89 @@
+import sys
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+# Ensure local src directory is importable
+sys.path.insert(0, os.path.dirname(__file__))
+
+from assets import sync_files
+
+
+class TestSyncFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.src, self.dest = root / "static", root / "docs"
+        (self.src / "images").mkdir(parents=True)
+        (self.src / "index.css").write_text("body {}")
+        (self.src / "images" / "a.png").write_bytes(b"png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_first_sync_copies_everything(self):
+        result = sync_files(self.src, self.dest)
+        self.assertEqual(result.files, ["index.css", "images/a.png"])
+        self.assertEqual(result.copied, result.files)
+        self.assertEqual((self.dest / "images" / "a.png").read_bytes(), b"png")
+
+    def test_second_sync_skips_unchanged(self):
+        sync_files(self.src, self.dest)
+        result = sync_files(self.src, self.dest)
+        self.assertEqual(result.copied, [])
+        self.assertEqual(result.unchanged, 2)
+
+    def test_changed_file_is_copied(self):
+        sync_files(self.src, self.dest)
+        (self.src / "index.css").write_text("body { color: red }")
+        result = sync_files(self.src, self.dest)
+        self.assertEqual(result.copied, ["index.css"])
+        self.assertEqual((self.dest / "index.css").read_text(), "body { color: red }")
+
+    def test_checksum_skips_touched_files(self):
+        sync_files(self.src, self.dest)
+        stat = (self.src / "index.css").stat()
+        os.utime(self.src / "index.css", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(sync_files(self.src, self.dest, checksum=True).copied, [])
+        self.assertEqual(sync_files(self.src, self.dest).copied, [])
+
+    def test_rewritten_files_are_kept_by_size(self):
+        sync_files(self.src, self.dest)
+        stat = (self.src / "index.css").stat()
+        (self.dest / "index.css").write_text("body{}")
+        os.utime(self.dest / "index.css", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(sync_files(self.src, self.dest, sizes={"index.css": 6}).copied, [])
+        self.assertEqual(sync_files(self.src, self.dest).copied, ["index.css"])
+
+    def test_removal_takes_compressed_siblings(self):
+        first = sync_files(self.src, self.dest)
+        (self.dest / "index.css.gz").write_bytes(b"gz")
+        (self.src / "index.css").unlink()
+        sync_files(self.src, self.dest, first.files)
+        self.assertFalse((self.dest / "index.css.gz").exists())
+
+    def test_prunes_only_previously_synced_files(self):
+        first = sync_files(self.src, self.dest)
+        (self.dest / "index.html").write_text("generated page")
+        (self.src / "images" / "a.png").unlink()
+        result = sync_files(self.src, self.dest, first.files)
+        self.assertEqual(result.removed, ["images/a.png"])
+        self.assertFalse((self.dest / "images").exists())
+        self.assertTrue((self.dest / "index.html").exists())
+
+    def test_link_modes(self):
+        for link in ("hardlink", "reflink"):
+            dest = self.dest / link
+            result = sync_files(self.src, dest, link=link)
+            self.assertEqual(len(result.copied), 2)
+            self.assertEqual((dest / "index.css").read_text(), "body {}")
+            self.assertEqual(sync_files(self.src, dest, link=link).copied, [])
+
+    def test_unknown_link_mode(self):
+        with self.assertRaises(ValueError):
+            sync_files(self.src, self.dest, link="symlink")
+
+
+if __name__ == "__main__":
+    unittest.main()
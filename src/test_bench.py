@@ -0,0 +1,74 @@
+import sys
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+# Ensure local src directory is importable
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench import (CorpusConfig, generate_corpus, run_benchmark, run_microbenchmarks, compare, measure_memory,
+                   startswith_block_type, STAGES)
+from markdown_to_html import first_line_block_type, markdown_to_html_node
+from template import Template
+
+
+class TestBench(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_generated_corpus_parses(self):
+        config = CorpusConfig(pages=5, blocks=30, inline_density=0.5, nesting_depth=3, pages_per_dir=2)
+        paths = generate_corpus(self.root / "content", config)
+        self.assertEqual(len(paths), 5)
+        self.assertEqual(len(list((self.root / "content").iterdir())), 3)
+        for path in paths:
+            markdown_to_html_node(path.read_text(encoding="utf-8")).to_html()
+
+    def test_generate_corpus_is_reproducible(self):
+        a = generate_corpus(self.root / "a", CorpusConfig(pages=2, seed=7))
+        b = generate_corpus(self.root / "b", CorpusConfig(pages=2, seed=7))
+        self.assertEqual([p.read_text() for p in a], [p.read_text() for p in b])
+
+    def test_run_benchmark_times_every_stage(self):
+        paths = generate_corpus(self.root / "content", CorpusConfig(pages=2, blocks=5))
+        out = self.root / "docs"
+        out.mkdir()
+        result = run_benchmark(paths, Template.compile("{{ Title }}{{ Content }}"), out, repeat=1)
+        self.assertEqual(result["pages"], 2)
+        self.assertEqual(tuple(result["stages"]), STAGES)
+        self.assertTrue(all(t["seconds"] >= 0 for t in result["stages"].values()))
+
+    def test_microbenchmarks_agree(self):
+        paths = generate_corpus(self.root / "content", CorpusConfig(pages=2, blocks=20, inline_density=0.5))
+        result = run_microbenchmarks(paths, repeat=1)
+        self.assertEqual(list(result["classify"]), ["startswith", "dispatch"])
+        self.assertEqual(list(result["extract"]), ["raw_pattern", "compiled"])
+        self.assertGreater(result["classify"]["dispatch"]["items"], 0)
+
+    def test_dispatch_matches_startswith_chain(self):
+        lines = ["# a", "###### a", "####### a", "#a", "```", "```py", "```a`b", "> a", ">a", "- a", "-a",
+                 "1. a", "1.a", "2. a", "10. a", "plain", "*a*", ""]
+        for line in lines:
+            self.assertEqual(first_line_block_type(line), startswith_block_type(line), line)
+
+    def test_measure_memory(self):
+        memory = measure_memory("# Title\n\nSome **bold** text\n\n- a\n- b")
+        self.assertGreater(memory["retained_bytes"], 0)
+        self.assertGreaterEqual(memory["peak_bytes"], memory["retained_bytes"])
+        self.assertGreater(memory["live_allocations"], 0)
+
+    def test_compare_reports_slower_stages(self):
+        baseline = {"stages": {"parse": {"us_per_page": 100.0}, "write": {"us_per_page": 100.0}}}
+        result = {"stages": {"parse": {"us_per_page": 150.0}, "write": {"us_per_page": 105.0}}}
+        regressions = compare(result, baseline, 0.1)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("parse"))
+
+
+if __name__ == "__main__":
+    unittest.main()
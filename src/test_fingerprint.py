@@ -0,0 +1,89 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+# Ensure local src directory is importable
+sys.path.insert(0, os.path.dirname(__file__))
+
+from assets import sync_files
+from fingerprint import ASSET_MAP_NAME, asset_urls, fingerprint_assets, fingerprint_name
+from manifest import hash_file
+
+
+class TestFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.static, self.dest = root / "static", root / "docs"
+        (self.static / "images").mkdir(parents=True)
+        (self.static / "index.css").write_text("body {}")
+        (self.static / "images" / "a.png").write_bytes(b"png")
+        (self.static / "robots.txt").write_text("User-agent: *")
+        self.files = sync_files(self.static, self.dest).files
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hardlinked_sync_gets_separate_copies(self):
+        dest = self.dest.parent / "linked"
+        files = sync_files(self.static, dest, link="hardlink").files
+        entries, _ = fingerprint_assets(self.static, dest, files, {}, link="hardlink")
+        css = dest / entries["index.css"].name
+        self.assertTrue((dest / "index.css").samefile(self.static / "index.css"))
+        self.assertFalse(css.samefile(self.static / "index.css"))
+        self.assertEqual(css.read_text(), "body {}")
+        os.unlink(css)
+        os.link(self.static / "index.css", css)
+        self.assertEqual(fingerprint_assets(self.static, dest, files, entries, link="hardlink")[1], [css.name])
+        self.assertFalse(css.samefile(self.static / "index.css"))
+        # Published copies of a plain sync still share the inode, which is safe there
+        entries, _ = fingerprint_assets(self.static, self.dest, self.files, {})
+        self.assertTrue((self.dest / entries["index.css"].name).samefile(self.dest / "index.css"))
+
+    def test_fingerprint_name(self):
+        self.assertEqual(fingerprint_name("images/a.b.png", "0123456789abcdef"), "images/a.b.0123456789.png")
+
+    def test_publishes_hashed_copies_and_map(self):
+        entries, placed = fingerprint_assets(self.static, self.dest, self.files, {})
+        css = fingerprint_name("index.css", hash_file(self.static / "index.css"))
+        self.assertEqual(sorted(placed), sorted([css, entries["images/a.png"].name]))
+        self.assertNotIn("robots.txt", entries)
+        self.assertEqual((self.dest / css).read_text(), "body {}")
+        self.assertTrue((self.dest / "index.css").exists())
+        urls = json.loads((self.dest / ASSET_MAP_NAME).read_text())
+        self.assertEqual(urls, asset_urls(entries))
+        self.assertEqual(urls["/index.css"], "/" + css)
+
+    def test_unchanged_sources_are_not_placed_again(self):
+        entries, _ = fingerprint_assets(self.static, self.dest, self.files, {})
+        again, placed = fingerprint_assets(self.static, self.dest, self.files, entries)
+        self.assertEqual((again, placed), (entries, []))
+
+    def test_changed_source_replaces_its_copy(self):
+        entries, _ = fingerprint_assets(self.static, self.dest, self.files, {})
+        (self.static / "index.css").write_text("body { color: red }")
+        sync_files(self.static, self.dest, self.files)
+        new, placed = fingerprint_assets(self.static, self.dest, self.files, entries)
+        self.assertEqual(placed, [new["index.css"].name])
+        self.assertFalse((self.dest / entries["index.css"].name).exists())
+        self.assertEqual((self.dest / new["index.css"].name).read_text(), "body { color: red }")
+
+    def test_salt_only_renames_minified_files(self):
+        entries, _ = fingerprint_assets(self.static, self.dest, self.files, {})
+        salted, placed = fingerprint_assets(self.static, self.dest, self.files, entries, "minify")
+        self.assertEqual(placed, [salted["index.css"].name])
+        self.assertEqual(salted["images/a.png"], entries["images/a.png"])
+
+    def test_turning_off_removes_everything(self):
+        entries, _ = fingerprint_assets(self.static, self.dest, self.files, {})
+        self.assertEqual(fingerprint_assets(self.static, self.dest, [], entries), ({}, []))
+        self.assertFalse((self.dest / ASSET_MAP_NAME).exists())
+        self.assertFalse((self.dest / entries["index.css"].name).exists())
+        self.assertTrue((self.dest / "index.css").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import sys
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+# Ensure local src directory is importable
+sys.path.insert(0, os.path.dirname(__file__))
+
+from datetime import datetime
+from front_matter import FrontMatter, parse_front_matter, read_front_matter, split_front_matter
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_split(self):
+        markdown = "---\ntemplate: post.html\nTitle: \"Tom: a post\"\n\n# note\n---\n# Heading\n\nBody"
+        fields, body = split_front_matter(markdown)
+        self.assertEqual(fields, {"template": "post.html", "title": "Tom: a post"})
+        self.assertEqual(body, "# Heading\n\nBody")
+
+    def test_without_front_matter(self):
+        self.assertEqual(split_front_matter("# Heading\n---\n"), ({}, "# Heading\n---\n"))
+        self.assertEqual(split_front_matter(""), ({}, ""))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            split_front_matter("---\ntemplate: post.html\n# Heading\n")
+        with self.assertRaises(ValueError):
+            split_front_matter("---\nnot a field\n---\n")
+
+    def test_read_stops_at_fence(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "index.md"
+            path.write_bytes(b"---\ntemplate: post.html\n---\n# Heading\n\xff\xfe")
+            # The body isn't valid UTF-8, but it is never decoded
+            self.assertEqual(read_front_matter(path).template, "post.html")
+
+    def test_line_count(self):
+        self.assertEqual(parse_front_matter(["---", "a: 1", "---", "# Heading"]), ({"a": "1"}, 3))
+        self.assertEqual(split_front_matter("---\na: 1\n---"), ({"a": "1"}, ""))
+
+    def test_known_fields(self):
+        front_matter = FrontMatter.from_fields({"title": "Tom", "date": "2024-05-01", "tags": "[tolkien, 'poems']",
+                                                "draft": "yes", "template": "post.html", "author": "me"})
+        self.assertEqual(front_matter.title, "Tom")
+        self.assertEqual(front_matter.date, datetime(2024, 5, 1))
+        self.assertEqual(front_matter.tags, ["tolkien", "poems"])
+        self.assertTrue(front_matter.draft)
+        self.assertEqual(front_matter.template, "post.html")
+        self.assertEqual(front_matter.fields["author"], "me")
+        self.assertEqual(FrontMatter.from_fields({}), FrontMatter())
+        self.assertEqual(FrontMatter.from_fields({"tags": "a,b ,"}).tags, ["a", "b"])
+
+    def test_invalid_fields(self):
+        with self.assertRaises(ValueError):
+            FrontMatter.from_fields({"date": "May 1st"})
+        with self.assertRaises(ValueError):
+            FrontMatter.from_fields({"draft": "maybe"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import sys
+import os
+import unittest
+
+# Ensure local src directory is importable
+sys.path.insert(0, os.path.dirname(__file__))
+
+import highlight
+from highlight import Highlighter, fence_language
+
+
+class TestFenceLanguage(unittest.TestCase):
+    def test_info_string(self):
+        self.assertEqual(fence_language("```py"), "py")
+        self.assertEqual(fence_language('```Python title="x.py"'), "python")
+        self.assertIsNone(fence_language("```"))
+        self.assertIsNone(fence_language("```   "))
+
+
+@unittest.skipIf(highlight.get_lexer_by_name is None, "Pygments is not installed")
+class TestHighlighter(unittest.TestCase):
+    def test_tokens_are_spans(self):
+        html = Highlighter().highlight("py", "def f():\n    return '<a>'\n")
+        self.assertIn('<span class="k">def</span>', html)
+        self.assertIn("&lt;a&gt;", html)
+        self.assertTrue(html.endswith("\n"))
+
+    def test_unknown_language(self):
+        highlighter = Highlighter()
+        self.assertIsNone(highlighter.highlight("not-a-language", "x"))
+        self.assertEqual(highlighter.misses, 0)
+
+    def test_lexers_and_snippets_are_reused(self):
+        highlighter = Highlighter(maxsize=2)
+        first = highlighter.highlight("py", "a = 1\n")
+        lexer = highlighter.lexer("py")
+        self.assertIs(highlighter.highlight("py", "a = 1\n"), first)
+        self.assertIs(highlighter.lexer("py"), lexer)
+        self.assertEqual((highlighter.hits, highlighter.misses), (1, 1))
+        # The same code in another language is another snippet
+        highlighter.highlight("js", "a = 1\n")
+        highlighter.highlight("py", "b = 2\n")
+        self.assertEqual(len(highlighter.snippets), 2)
+        highlighter.highlight("py", "a = 1\n")
+        self.assertEqual(highlighter.misses, 4)
+
+    def test_leading_blank_lines_are_kept(self):
+        self.assertTrue(Highlighter().highlight("py", "\n\nx\n").startswith("\n\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -28,6 +28,13 @@ class TestHtmlNode(unittest.TestCase):
 		self.assertIn('src="img.png"', html)
 		self.assertIn('alt="pic"', html)
 
+	def test_props_values_are_escaped(self):
+		node = HtmlNode(tag="a", props={"href": '/search?q="x"&y=<z>', "title": "it's"})
+		self.assertEqual(node.props_to_html(), 'href="/search?q=&quot;x&quot;&amp;y=&lt;z&gt;" title="it&#x27;s"')
+		# Serialized once per distinct set of props, and never stale after a change
+		node.props["href"] = "/"
+		self.assertEqual(node.props_to_html(), 'href="/" title="it&#x27;s"')
+
 	def test_to_html_raises(self):
 		# Base class should raise NotImplementedError for to_html
 		with self.assertRaises(NotImplementedError):
@@ -0,0 +1,99 @@
+import sys
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+# Ensure local src directory is importable
+sys.path.insert(0, os.path.dirname(__file__))
+
+from indexes import SiteIndex, generate_indexes, page_url, render_indexes, tag_slug
+from manifest import BuildManifest, PageEntry
+from template import Template
+
+
+def entry(output: str, title: str, date: str | None = None, tags: list[str] = (), draft: bool = False) -> PageEntry:
+    return PageEntry("digest", 1, 10**18, output, title=title, date=date, tags=list(tags), draft=draft)
+
+
+class TestIndexes(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = Path(self.tmp.name)
+        self.template = Template.compile("<title>{{ Title }}</title>{{ Content }}", "/ssg/")
+        self.manifest = BuildManifest(pages={
+            "index.md": entry("index.html", "Fan Club"),
+            "blog/old/index.md": entry("blog/old/index.html", "Old", "2023-01-01", ["Middle Earth"]),
+            "blog/new/index.md": entry("blog/new/index.html", "New & shiny", "2024-05-01T09:30", ["elves", "Middle Earth"]),
+            "blog/wip/index.md": entry("blog/wip/index.html", "Draft", "2025-01-01", ["elves"], draft=True),
+        })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_page_url_and_tag_slug(self):
+        self.assertEqual(page_url("index.html"), "/")
+        self.assertEqual(page_url("blog/tom/index.html"), "/blog/tom/")
+        self.assertEqual(page_url("about.html"), "/about.html")
+        self.assertEqual(tag_slug("Middle Earth!"), "middle-earth")
+        self.assertEqual(tag_slug("?"), "tag")
+
+    def test_collect_skips_drafts_and_orders_posts(self):
+        index = SiteIndex.collect(self.manifest)
+        self.assertEqual(index.title, "Fan Club")
+        self.assertEqual([post.title for post in index.posts], ["New & shiny", "Old"])
+        self.assertEqual(len(index.pages), 3)
+        self.assertEqual(list(index.tags()), ["elves", "Middle Earth"])
+        self.assertEqual([post.title for post in index.tags()["Middle Earth"]], ["New & shiny", "Old"])
+
+    def test_render_indexes(self):
+        outputs = render_indexes(SiteIndex.collect(self.manifest), self.template, "https://example.com")
+        self.assertEqual(sorted(outputs), ["atom.xml", "blog/index.html", "rss.xml", "sitemap.xml", "tags/elves/index.html",
+                                           "tags/index.html", "tags/middle-earth/index.html"])
+        listing = outputs["blog/index.html"]
+        self.assertIn('<a href="/ssg/blog/new/">New &amp; shiny</a> <time datetime="2024-05-01T09:30">2024-05-01</time>', listing)
+        self.assertLess(listing.index("New"), listing.index("Old"))
+        self.assertIn("<loc>https://example.com/ssg/blog/old/</loc><lastmod>2023-01-01</lastmod>", outputs["sitemap.xml"])
+        self.assertIn("<updated>2024-05-01T09:30:00+00:00</updated>", outputs["atom.xml"])
+        self.assertIn("<pubDate>Wed, 01 May 2024 09:30:00 +0000</pubDate>", outputs["rss.xml"])
+        self.assertNotIn("Draft", "".join(outputs.values()))
+        self.assertEqual(sorted(render_indexes(SiteIndex.collect(self.manifest), self.template)),
+                         ["blog/index.html", "tags/elves/index.html", "tags/index.html", "tags/middle-earth/index.html"])
+
+    def test_generate_is_incremental(self):
+        written = generate_indexes(self.dest, self.manifest, self.template)
+        self.assertIn("tags/elves/index.html", written)
+        self.assertEqual(generate_indexes(self.dest, self.manifest, self.template), [])
+        # Once only the draft has the tag, its page goes
+        self.manifest.pages["blog/new/index.md"].tags = ["Middle Earth"]
+        written = generate_indexes(self.dest, self.manifest, self.template)
+        self.assertNotIn("tags/elves/index.html", written)
+        self.assertFalse((self.dest / "tags" / "elves").exists())
+        (self.dest / "blog" / "index.html").unlink()
+        self.assertIn("blog/index.html", generate_indexes(self.dest, self.manifest, self.template))
+
+    def test_mtimes_only_matter_with_feeds(self):
+        self.manifest.pages["blog/undated/index.md"] = entry("blog/undated/index.html", "Undated")
+        generate_indexes(self.dest, self.manifest, self.template)
+        # An edited page that the listings show the same way rebuilds nothing
+        for key in ("index.md", "blog/old/index.md", "blog/undated/index.md"):
+            self.manifest.pages[key].mtime_ns += 10**9
+        self.assertEqual(generate_indexes(self.dest, self.manifest, self.template), [])
+        # Unless it moves an undated post in the order
+        self.manifest.pages["blog/undated/index.md"].mtime_ns = 18 * 10**17
+        self.assertIn("blog/index.html", generate_indexes(self.dest, self.manifest, self.template))
+        # The feeds and sitemap show every mtime
+        site_url = "https://example.com"
+        generate_indexes(self.dest, self.manifest, self.template, site_url)
+        self.manifest.pages["index.md"].mtime_ns += 10**9
+        self.assertIn("sitemap.xml", generate_indexes(self.dest, self.manifest, self.template, site_url))
+
+    def test_content_page_takes_precedence(self):
+        self.manifest.pages["blog/index.md"] = entry("blog/index.html", "My blog")
+        written = generate_indexes(self.dest, self.manifest, self.template)
+        self.assertNotIn("blog/index.html", written)
+        self.assertNotIn("blog/index.html", self.manifest.index_outputs)
+
+
+if __name__ == "__main__":
+    unittest.main()
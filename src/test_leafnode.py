@@ -5,7 +5,7 @@ import unittest
 # Ensure local src directory is importable
 sys.path.insert(0, os.path.dirname(__file__))
 
-from htmlnode import LeafNode
+from htmlnode import LeafNode, RawNode
 
 class TestLeafNode(unittest.TestCase):
     def test_leaf_to_html_p(self):
@@ -32,4 +32,11 @@ class TestLeafNode(unittest.TestCase):
         p = LeafNode("p", "para")
         img = LeafNode("img", "alt-text")
         self.assertIn("<p>", p.to_html())
-        self.assertIn("<img>", img.to_html())
\ No newline at end of file
+        self.assertIn("<img>", img.to_html())
+
+    def test_value_is_escaped(self):
+        self.assertEqual(LeafNode("code", "if a < b && c > d").to_html(), "<code>if a &lt; b &amp;&amp; c &gt; d</code>")
+        self.assertEqual(LeafNode(None, 'say "hi"').to_html(), 'say "hi"')
+
+    def test_raw_node_is_not_escaped(self):
+        self.assertEqual(RawNode(value="<b>x</b> &amp;").to_html(), "<b>x</b> &amp;")
@@ -0,0 +1,240 @@
+import sys
+import os
+import io
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+# Ensure local src directory is importable
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main
+from manifest import BuildManifest
+from template import Template
+
+BAD_PAGE = "# Bad\n\n- ``"
+
+
+class TestRenderPage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.template = Template.compile("<title>{{ Title }}</title><main>{{ Content }}</main>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_failed_page_leaves_no_temporary_file(self):
+        src = self.root / "bad.md"
+        src.write_text(BAD_PAGE, encoding="utf-8")
+        for timed in (False, True):
+            with self.assertRaises(ValueError):
+                main.render_page(src, self.template, self.root / "bad.html", timed=timed)
+            self.assertEqual(list(self.root.rglob("*.tmp")), [])
+            self.assertFalse((self.root / "bad.html").exists())
+
+    def test_renders_page(self):
+        src = self.root / "index.md"
+        src.write_text("# Home & away\n\ntext", encoding="utf-8")
+        title, timing, counts = main.render_page(src, self.template, self.root / "index.html")
+        self.assertEqual(title, "Home & away")
+        self.assertIsNone(timing)
+        self.assertEqual(counts, (0, 0))
+        self.assertEqual((self.root / "index.html").read_text(encoding="utf-8"),
+                         "<title>Home &amp; away</title><main><div><h1>Home &amp; away</h1><p>text</p></div></main>")
+
+
+class TestBuild(unittest.TestCase):
+    """Builds a small content tree with one page that fails to render."""
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content, self.dest = self.root / "content", self.root / "docs"
+        self.template_path = self.root / "template.html"
+        self.template_path.write_text("<title>{{ Title }}</title>{{ Content }}", encoding="utf-8")
+        for name in ("a", "b", "c", "d"):
+            self.write_page(f"{name}.md", f"# Page {name}\n\ntext")
+        self.write_page("sub/bad.md", BAD_PAGE)
+        self.dest.mkdir()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_page(self, name: str, text: str):
+        path = self.content / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+    def build(self, manifest: BuildManifest, **options) -> tuple[list, list[str]]:
+        """Runs the page build, returning its failures and the pages it logged, in order."""
+        out = io.StringIO()
+        with redirect_stdout(out):
+            failures = main.generate_page_recursive(self.content, self.template_path, self.dest, manifest=manifest,
+                                                    templates=self.root / "templates", **options)
+        logged = [line.split(" ")[3] for line in out.getvalue().splitlines() if line.startswith("Generating page")]
+        return failures, [Path(path).relative_to(self.content).as_posix() for path in logged]
+
+    def test_find_sources_in_sorted_path_order(self):
+        for name in ("a-b/x.md", "sub.md", "sub/z/y.md", "notes.txt"):
+            self.write_page(name, "# Page")
+        found = main.find_sources(self.content)
+        self.assertEqual([key for key, _ in found],
+                         [path.relative_to(self.content).as_posix() for path in sorted(self.content.rglob("*.md"))])
+        self.assertEqual(found[0][1].st_size, (self.content / "a-b/x.md").stat().st_size)
+        self.assertEqual(main.find_sources(self.root / "missing"), [])
+
+    def test_render_pages_in_pool(self):
+        template = Template.compile("{{ Content }}")
+        names = ["a", "sub/bad", "b", "c"]
+        tasks = [(self.content / f"{name}.md", template, self.dest / f"{name.replace('/', '-')}.html") for name in names]
+        results = list(main.render_pages(tasks, jobs=2))
+        self.assertEqual([result[0] if result else None for result, _ in results], ["Page a", None, "Page b", "Page c"])
+        self.assertEqual([type(error) for _, error in results], [type(None), ValueError, type(None), type(None)])
+        self.assertFalse((self.dest / "sub-bad.html").exists())
+        self.assertEqual(list(self.dest.rglob("*.tmp")), [])
+
+    def test_failed_page_is_reported_and_retried(self):
+        for options in ({"jobs": 2}, {"jobs": 2, "io_threads": 2}):
+            with self.subTest(**options):
+                manifest = BuildManifest()
+                failures, logged = self.build(manifest, **options)
+                # Logged in source order whichever worker finished first
+                self.assertEqual(logged, ["a.md", "b.md", "c.md", "d.md", "sub/bad.md"])
+                self.assertEqual([(path, type(error)) for path, error in failures],
+                                 [(self.content / "sub/bad.md", ValueError)])
+                self.assertFalse((self.dest / "sub/bad.html").exists())
+                self.assertEqual(list(self.dest.rglob("*.tmp")), [])
+                self.assertNotIn("sub/bad.md", manifest.pages)
+                # Left out of the manifest, so the next build retries it and only it
+                failures, logged = self.build(manifest, **options)
+                self.assertEqual((len(failures), logged), (1, ["sub/bad.md"]))
+                self.write_page("sub/bad.md", "# Fixed")
+                failures, logged = self.build(manifest, **options)
+                self.assertEqual((failures, logged), ([], ["sub/bad.md"]))
+                self.assertIn("<h1>Fixed</h1>", (self.dest / "sub/bad.html").read_text(encoding="utf-8"))
+                self.write_page("sub/bad.md", BAD_PAGE)
+                shutil.rmtree(self.dest)
+                self.dest.mkdir()
+
+    def test_inline_cache_counts_include_workers(self):
+        (self.content / "sub/bad.md").unlink()
+        main.setup_worker(inline_cache_size=64)
+        self.addCleanup(main.setup_worker)
+        for options in ({"jobs": 1}, {"jobs": 2}, {"jobs": 2, "io_threads": 2}):
+            with self.subTest(**options):
+                counts = Counter()
+                with redirect_stdout(io.StringIO()):
+                    main.generate_page_recursive(self.content, self.template_path, self.dest,
+                                                 templates=self.root / "templates", cache_counts=counts, **options)
+                # A heading and a paragraph per page, "text" repeating across pages
+                self.assertEqual(counts["hits"] + counts["misses"], 8)
+                self.assertGreater(counts["hits"], 0)
+
+    def test_incremental_build(self):
+        (self.content / "sub/bad.md").unlink()
+        manifest_path = self.dest / main.MANIFEST_NAME
+        manifest = BuildManifest()
+        self.assertEqual(self.build(manifest)[1], ["a.md", "b.md", "c.md", "d.md"])
+        manifest.save(manifest_path)
+        # Nothing changed: nothing is rendered, even for a touched file
+        os.utime(self.content / "a.md")
+        manifest = BuildManifest.load(manifest_path)
+        self.assertEqual(self.build(manifest), ([], []))
+        manifest.save(manifest_path)
+        # An edited page is rendered again, a deleted one loses its output and manifest entry
+        self.write_page("b.md", "# Page b edited")
+        (self.content / "c.md").unlink()
+        manifest = BuildManifest.load(manifest_path)
+        with redirect_stdout(io.StringIO()) as out:
+            failures = main.generate_page_recursive(self.content, self.template_path, self.dest, manifest=manifest,
+                                                    templates=self.root / "templates")
+        self.assertEqual(failures, [])
+        self.assertIn(f"Generating page from {self.content / 'b.md'}", out.getvalue())
+        self.assertNotIn("a.md", out.getvalue())
+        self.assertIn("<h1>Page b edited</h1>", (self.dest / "b.html").read_text(encoding="utf-8"))
+        self.assertFalse((self.dest / "c.html").exists())
+        self.assertNotIn("c.md", manifest.pages)
+        self.assertEqual(sorted(manifest.pages), ["a.md", "b.md", "d.md"])
+        # An output deleted by hand is rendered again
+        (self.dest / "d.html").unlink()
+        self.assertEqual(self.build(manifest)[1], ["d.md"])
+
+
+class TestSiteWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content, self.static, self.dest = self.root / "content", self.root / "static", self.root / "docs"
+        self.templates = self.root / "templates"
+        for directory in (self.content, self.static, self.dest, self.templates):
+            directory.mkdir()
+        self.template_path = self.root / "template.html"
+        self.template_path.write_text("{{ Content }}", encoding="utf-8")
+        (self.templates / "post.html").write_text("<article>{{ Content }}</article>", encoding="utf-8")
+        (self.content / "index.md").write_text("# Home", encoding="utf-8")
+        (self.content / "post.md").write_text("---\ntemplate: post.html\n---\n# Post", encoding="utf-8")
+        (self.static / "site.css").write_text("a {}", encoding="utf-8")
+        self.manifest = BuildManifest()
+        with redirect_stdout(io.StringIO()):
+            main.generate_page_recursive(self.content, self.template_path, self.dest, manifest=self.manifest,
+                                         templates=self.templates)
+            self.watcher = main.SiteWatcher(self.content, self.static, self.template_path, self.dest, "/",
+                                            self.manifest, templates=self.templates)
+
+    def tearDown(self):
+        self.watcher.close()
+        self.tmp.cleanup()
+
+    def step(self) -> tuple[bool, str]:
+        with redirect_stdout(io.StringIO()) as out:
+            rebuilt = self.watcher.step()
+        return rebuilt, out.getvalue()
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.step(), (False, ""))
+
+    def test_edits_rebuild_what_changed(self):
+        (self.content / "index.md").write_text("# Home again", encoding="utf-8")
+        (self.static / "site.css").write_text("a { color: red }", encoding="utf-8")
+        rebuilt, log = self.step()
+        self.assertTrue(rebuilt)
+        self.assertIn("<h1>Home again</h1>", (self.dest / "index.html").read_text(encoding="utf-8"))
+        self.assertEqual((self.dest / "site.css").read_text(encoding="utf-8"), "a { color: red }")
+        self.assertNotIn("post.md", log)
+        self.assertTrue((self.dest / main.MANIFEST_NAME).exists())
+
+    def test_deleted_page_drops_its_templates(self):
+        post_template = (self.templates / "post.html").as_posix()
+        self.assertIn(post_template, self.manifest.dependencies)
+        (self.content / "post.md").unlink()
+        self.assertTrue(self.step()[0])
+        self.assertFalse((self.dest / "post.html").exists())
+        self.assertNotIn("post.md", self.manifest.pages)
+        self.assertNotIn(post_template, self.manifest.dependencies)
+        # Only the deleted page used the template, so editing it rebuilds nothing
+        (self.templates / "post.html").write_text("<main>{{ Content }}</main>", encoding="utf-8")
+        self.assertEqual(self.step(), (False, ""))
+
+    def test_template_edit_rebuilds_its_pages(self):
+        (self.templates / "post.html").write_text("<main>{{ Content }}</main>", encoding="utf-8")
+        rebuilt, log = self.step()
+        self.assertTrue(rebuilt)
+        self.assertIn("<main>", (self.dest / "post.html").read_text(encoding="utf-8"))
+        self.assertNotIn("index.md", log)
+
+    def test_failed_step_keeps_watching(self):
+        with mock.patch.object(main.SiteWatcher, "step", side_effect=[OSError("gone"), False, KeyboardInterrupt]) as step, \
+                redirect_stdout(io.StringIO()) as out:
+            main.watch_site(self.content, self.static, self.template_path, self.dest, "/", self.manifest,
+                            port=0, interval=0, templates=self.templates)
+        self.assertEqual(step.call_count, 3)
+        self.assertIn("Rebuild failed: gone", out.getvalue())
+        self.assertIn("Stopping server", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
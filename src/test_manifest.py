@@ -0,0 +1,152 @@
+import sys
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+# Ensure local src directory is importable
+sys.path.insert(0, os.path.dirname(__file__))
+
+from manifest import AssetEntry, BuildManifest, PageEntry, hash_file
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.src = self.root / "index.md"
+        self.src.write_text("# Title\n\nBody", encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_new_page_is_stale(self):
+        manifest = BuildManifest()
+        entry = manifest.stale_entry("index.md", self.src, "index.html")
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.digest, hash_file(self.src))
+
+    def test_recorded_page_is_fresh(self):
+        manifest = BuildManifest()
+        manifest.record("index.md", manifest.stale_entry("index.md", self.src, "index.html"))
+        self.assertIsNone(manifest.stale_entry("index.md", self.src, "index.html"))
+
+    def test_touched_but_unchanged_is_fresh(self):
+        manifest = BuildManifest()
+        manifest.record("index.md", manifest.stale_entry("index.md", self.src, "index.html"))
+        stat = self.src.stat()
+        os.utime(self.src, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertIsNone(manifest.stale_entry("index.md", self.src, "index.html"))
+        self.assertEqual(manifest.pages["index.md"].mtime_ns, self.src.stat().st_mtime_ns)
+
+    def test_modified_page_is_stale(self):
+        manifest = BuildManifest()
+        manifest.record("index.md", manifest.stale_entry("index.md", self.src, "index.html"))
+        self.src.write_text("# Title\n\nNew body", encoding="utf-8")
+        self.assertIsNotNone(manifest.stale_entry("index.md", self.src, "index.html"))
+
+    def test_settings_change_invalidates_pages(self):
+        manifest = BuildManifest()
+        self.assertFalse(manifest.check_settings("/"))
+        manifest.record("index.md", manifest.stale_entry("index.md", self.src, "index.html"))
+        self.assertFalse(manifest.check_settings("/"))
+        self.assertEqual(len(manifest.pages), 1)
+        self.assertTrue(manifest.check_settings("/ssg/"))
+        self.assertEqual(manifest.pages, {})
+        manifest.record("index.md", manifest.stale_entry("index.md", self.src, "index.html"))
+        self.assertFalse(manifest.check_settings("/ssg/", {}))
+        self.assertTrue(manifest.check_settings("/ssg/", {"/index.css": "/index.3f2a9c0b1d.css"}))
+        self.assertEqual(manifest.pages, {})
+
+    def test_dependency_change_invalidates_dependent_pages(self):
+        layout, partial = self.root / "layout.html", self.root / "nav.html"
+        layout.write_text("{{ Content }}", encoding="utf-8")
+        partial.write_text("<nav></nav>", encoding="utf-8")
+        other = self.root / "other.md"
+        other.write_text("# Other", encoding="utf-8")
+        manifest = BuildManifest()
+        manifest.record("index.md", manifest.stale_entry("index.md", self.src, "index.html"),
+                        {layout.as_posix(): hash_file(layout), partial.as_posix(): hash_file(partial)})
+        manifest.record("other.md", manifest.stale_entry("other.md", other, "other.html"),
+                        {layout.as_posix(): hash_file(layout)})
+        self.assertEqual(manifest.check_dependencies(), [])
+        partial.write_text("<nav>Home</nav>", encoding="utf-8")
+        self.assertEqual(manifest.check_dependencies(), [partial.as_posix()])
+        self.assertEqual(list(manifest.pages), ["other.md"])
+        self.assertEqual(list(manifest.dependencies), [layout.as_posix()])
+        layout.unlink()
+        self.assertEqual(manifest.check_dependencies(), [layout.as_posix()])
+        self.assertEqual(manifest.pages, {})
+
+    def test_prune_forgets_unused_dependencies(self):
+        manifest = BuildManifest(pages={"a.md": PageEntry("1", 1, 1, "a.html", ["a.html"])},
+                                 dependencies={"a.html": "1", "b.html": "2"})
+        manifest.prune({"a.md"})
+        self.assertEqual(manifest.dependencies, {"a.html": "1"})
+
+    def test_prune_returns_removed_outputs(self):
+        manifest = BuildManifest(pages={
+            "a.md": PageEntry("1", 1, 1, "a.html"),
+            "b/index.md": PageEntry("2", 2, 2, "b/index.html"),
+        })
+        self.assertEqual(manifest.prune({"a.md"}), ["b/index.html"])
+        self.assertEqual(list(manifest.pages), ["a.md"])
+
+    def test_remove_drops_pages_and_their_dependencies(self):
+        manifest = BuildManifest(pages={
+            "a.md": PageEntry("1", 1, 1, "a.html", ["t.html"]),
+            "b.md": PageEntry("2", 2, 2, "b.html", ["t.html", "post.html"]),
+        }, dependencies={"t.html": "1", "post.html": "2"})
+        self.assertEqual(manifest.remove(["b.md", "missing.md"]), ["b.html"])
+        self.assertEqual(list(manifest.pages), ["a.md"])
+        self.assertEqual(manifest.dependencies, {"t.html": "1"})
+
+    def test_postprocess_change_invalidates_outputs(self):
+        manifest = BuildManifest(index_digest="abc", optimized={"index.css": 6})
+        manifest.record("index.md", manifest.stale_entry("index.md", self.src, "index.html"))
+        self.assertFalse(manifest.check_postprocess([]))
+        self.assertEqual(len(manifest.pages), 1)
+        self.assertTrue(manifest.check_postprocess(["minify"]))
+        self.assertEqual((manifest.pages, manifest.index_digest, manifest.optimized), ({}, None, {}))
+        self.assertFalse(manifest.check_postprocess(["minify"]))
+
+    def test_save_and_load_round_trip(self):
+        manifest = BuildManifest("/ssg/", postprocess=["minify"], optimized={"index.css": 6},
+                                 fingerprints={"index.css": AssetEntry("abc", 6, 1, "index.abc.css")})
+        manifest.record("index.md", manifest.stale_entry("index.md", self.src, "index.html"), {"t.html": "abc"})
+        path = self.root / ".manifest.json"
+        manifest.save(path)
+        self.assertEqual(BuildManifest.load(path), manifest)
+
+    def test_save_skips_unchanged_manifest(self):
+        path = self.root / ".manifest.json"
+        manifest = BuildManifest("/")
+        manifest.record("index.md", manifest.stale_entry("index.md", self.src, "index.html"))
+        self.assertTrue(manifest.save(path))
+        manifest = BuildManifest.load(path)
+        self.assertIsNone(manifest.stale_entry("index.md", self.src, "index.html"))
+        self.assertFalse(manifest.check_settings("/"))
+        self.assertFalse(manifest.save(path))
+        # Fields set outside the manifest's own methods are compared instead of tracked
+        manifest.index_digest = "abc"
+        self.assertTrue(manifest.save(path))
+        self.assertFalse(manifest.save(path))
+        # A refreshed stat is worth keeping, so the next build doesn't hash the file again
+        stat = self.src.stat()
+        os.utime(self.src, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertIsNone(manifest.stale_entry("index.md", self.src, "index.html"))
+        self.assertTrue(manifest.save(path))
+        self.assertEqual(BuildManifest.load(path).pages["index.md"].mtime_ns, stat.st_mtime_ns + 10**9)
+        # A deleted file is written again
+        path.unlink()
+        self.assertTrue(manifest.save(path))
+
+    def test_load_missing_or_corrupt(self):
+        path = self.root / ".manifest.json"
+        self.assertEqual(BuildManifest.load(path), BuildManifest())
+        path.write_text("{not json", encoding="utf-8")
+        self.assertEqual(BuildManifest.load(path), BuildManifest())
+
+
+if __name__ == "__main__":
+    unittest.main()
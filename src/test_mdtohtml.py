@@ -5,7 +5,8 @@ import unittest
 # Ensure local src directory is importable
 sys.path.insert(0, os.path.dirname(__file__))
 
-from markdown_to_html import markdown_to_blocks, block_to_block_type, BlockType, markdown_to_html_node
+import highlight
+from markdown_to_html import markdown_to_blocks, block_to_block_type, BlockType, markdown_to_html_node, scan_blocks, InlineCache, markdown_to_page, page_title, split_row
 
 class TestMarkdownToHtml(unittest.TestCase):
         def test_markdown_to_blocks(self):
@@ -54,8 +55,21 @@ class TestMarkdownToHtml(unittest.TestCase):
             End
             """
             blocks = markdown_to_blocks(md)
-            # Current implementation strips leading indentation from lines
-            self.assertEqual(blocks, ["Here is code:", "```py\ndef f():\nreturn 1\n```", "End"])
+            # Indentation inside the fence is kept relative to the fence itself
+            self.assertEqual(blocks, ["Here is code:", "```py\ndef f():\n    return 1\n```", "End"])
+
+        def test_markdown_code_fence_with_blank_lines(self):
+            md = "```\na = 1\n\n\nb = 2\n```\nafter"
+            blocks = markdown_to_blocks(md)
+            self.assertEqual(blocks, ["```\na = 1\n\n\nb = 2\n```", "after"])
+
+        def test_scan_blocks_types(self):
+            md = "# Title\n\n> quote\n> more\n\n- a\n- b\n\n1. one\n2. two\n\n1. one\n3. three\n\ntext\n```\ncode\n```"
+            types = [block.block_type for block in scan_blocks(md)]
+            self.assertEqual(types, [
+                BlockType.HEADING, BlockType.QUOTE, BlockType.UNORDERED_LIST,
+                BlockType.ORDERED_LIST, BlockType.PARAGRAPH, BlockType.PARAGRAPH, BlockType.CODE,
+            ])
 
         def test_markdown_empty_input(self):
             self.assertEqual(markdown_to_blocks(""), [])
@@ -127,6 +141,146 @@ class TestMarkdownToHtml(unittest.TestCase):
             "<div><p>This is <b>bolded</b> paragraph text in a p tag here</p><p>This is another paragraph with <i>italic</i> text and <code>code</code> here</p></div>",
             )
         
+        def test_inline_cache_same_html(self):
+            md = "# Title\n\n- [home](/) and **bold**\n- [home](/) and **bold**\n\n> quote _it_\n\nplain"
+            cache = InlineCache(maxsize=16)
+            self.assertEqual(markdown_to_html_node(md, cache).to_html(), markdown_to_html_node(md).to_html())
+            self.assertEqual(cache.hits, 1)
+            self.assertEqual(cache.misses, 4)
+            self.assertIn("1 hits, 4 misses", cache.info())
+
+        def test_inline_cache_rebases_urls(self):
+            cache = InlineCache(basepath="/ssg/")
+            html = markdown_to_html_node("[home](/) ![x](/x.png)", cache).to_html()
+            self.assertEqual(html, '<div><p><a href="/ssg/">home</a> <img src="/ssg/x.png" alt="x"></img></p></div>')
+
+        def test_inline_cache_is_bounded(self):
+            cache = InlineCache(maxsize=2)
+            for text in ["a", "b", "c", "a"]:
+                cache.children(text)
+            self.assertEqual(cache.misses, 4)
+            self.assertEqual(cache.render.cache_info().currsize, 2)
+
+        def test_page_single_pass(self):
+            md = "---\ntags: a, b\n---\n```\n# not a heading\n```\n\n## Sub _title_\n\n# Main"
+            page = markdown_to_page(md)
+            self.assertEqual(page.title, "Sub _title_")
+            self.assertEqual(page.front_matter.tags, ["a", "b"])
+            self.assertEqual(page.root.to_html(), markdown_to_html_node(md.split("---\n", 2)[2]).to_html())
+            self.assertEqual(page_title(md), page.title)
+
+        def test_page_title_from_front_matter(self):
+            md = "---\ntitle: Front\n---\n# Heading"
+            self.assertEqual(markdown_to_page(md).title, "Front")
+            self.assertEqual(page_title(md), "Front")
+            self.assertIsNone(markdown_to_page("just text").title)
+            self.assertIsNone(page_title("just text"))
+
+        def test_table_with_alignment(self):
+            md = "| Name | Age | Note |\n|:--|:-:|--:|\n| **Tom** | 10 |\n| Sam | 3 | x | extra |"
+            self.assertEqual(block_to_block_type(md), BlockType.TABLE)
+            html = markdown_to_html_node(md).to_html()
+            self.assertEqual(html, '<div><table><thead><tr><th style="text-align: left">Name</th>'
+                                   '<th style="text-align: center">Age</th><th style="text-align: right">Note</th></tr></thead>'
+                                   '<tbody><tr><td style="text-align: left"><b>Tom</b></td><td style="text-align: center">10</td>'
+                                   '<td style="text-align: right"></td></tr><tr><td style="text-align: left">Sam</td>'
+                                   '<td style="text-align: center">3</td><td style="text-align: right">x</td></tr></tbody></table></div>')
+
+        def test_table_without_outer_pipes_or_body(self):
+            html = markdown_to_html_node("a | b\n--|--").to_html()
+            self.assertEqual(html, "<div><table><thead><tr><th>a</th><th>b</th></tr></thead></table></div>")
+
+        def test_table_ends_where_another_block_starts(self):
+            for line, tag in (("- x", "<ul>"), ("> q", "<blockquote>"), ("# h", "<h1>"), ("1. x", "<ol>"), ("```", "<pre>")):
+                html = markdown_to_html_node(f"| a |\n| - |\n| 1 |\n{line}").to_html()
+                self.assertTrue(html.startswith("<div><table><thead><tr><th>a</th></tr></thead>"
+                                                "<tbody><tr><td>1</td></tr></tbody></table>" + tag), html)
+            html = markdown_to_html_node("| a |\n| - |\nplain row").to_html()
+            self.assertIn("<td>plain row</td>", html)
+
+        def test_not_a_table(self):
+            for md in ("a | b\n-|-|-", "a | b\nc | d", "| a |", "a\n---"):
+                self.assertEqual(block_to_block_type(md), BlockType.PARAGRAPH, md)
+
+        def test_split_row(self):
+            self.assertEqual(split_row("| a | `b \\| c` |"), ["a", "`b | c`"])
+            self.assertEqual(split_row("a|b\\|"), ["a", "b|"])
+            self.assertEqual(split_row("|"), [""])
+
+        def test_large_table(self):
+            rows = "".join(f"| {i} | [p](/p/{i}) |\n" for i in range(5000))
+            root = markdown_to_html_node("| n | link |\n|---|---|\n" + rows)
+            body = root.children[0].children[1]
+            self.assertEqual(len(body.children), 5000)
+            self.assertEqual(body.children[-1].to_html(), '<tr><td>4999</td><td><a href="/p/4999">p</a></td></tr>')
+
+        def test_nested_lists(self):
+            md = "- a\n  - b\n    1. c\n    2. d\n  - e\n- f\n  1. g\n  - h"
+            self.assertEqual(markdown_to_html_node(md).to_html(),
+                             "<div><ul><li>a<ul><li>b<ol><li>c</li><li>d</li></ol></li><li>e</li></ul></li>"
+                             "<li>f<ol><li>g</li></ol><ul><li>h</li></ul></li></ul></div>")
+
+        def test_nested_list_in_ordered_list(self):
+            md = "1. a\n   - x\n2. b"
+            self.assertEqual(markdown_to_html_node(md).to_html(),
+                             "<div><ol><li>a<ul><li>x</li></ul></li><li>b</li></ol></div>")
+
+        def test_dedent_between_levels_stays_in_the_deeper_list(self):
+            md = "- a\n    - b\n  - c\n- d"
+            self.assertEqual(markdown_to_html_node(md).to_html(),
+                             "<div><ul><li>a<ul><li>b</li><li>c</li></ul></li><li>d</li></ul></div>")
+
+        def test_list_with_plain_line_is_paragraph(self):
+            self.assertEqual(markdown_to_html_node("- a\n  text").to_html(), "<div><p>- a text</p></div>")
+
+        def test_quote_with_list_and_code(self):
+            md = "> intro\n>\n> - one\n>   - two\n>\n> ```\n> def f():\n>     return 1\n> ```\n> > nested"
+            self.assertEqual(markdown_to_html_node(md).to_html(),
+                             "<div><blockquote><p>intro</p><ul><li>one<ul><li>two</li></ul></li></ul>"
+                             "<pre><code>def f():\n    return 1\n</code></pre>"
+                             "<blockquote>nested</blockquote></blockquote></div>")
+
+        def test_nested_quotes_close_and_keep_code(self):
+            md = "> > a\n> > b\n> c\n\n> > ```\n> > > not a quote\n> > ```"
+            self.assertEqual(markdown_to_html_node(md).to_html(),
+                             "<div><blockquote><blockquote>a\nb</blockquote><p>c</p></blockquote>"
+                             "<blockquote><blockquote><pre><code>&gt; not a quote\n</code></pre></blockquote></blockquote></div>")
+            self.assertEqual(markdown_to_blocks("> a\n> > b\n\ntext"), ["> a\n> > b", "text"])
+
+        def test_deeply_nested_quotes(self):
+            # Far deeper than the recursion limit, and every line is scanned once however deep it is
+            depth = sys.getrecursionlimit() * 5
+            html = markdown_to_html_node(">" * depth + " deep").to_html()
+            self.assertEqual(html, "<div>" + "<blockquote>" * depth + "deep" + "</blockquote>" * depth + "</div>")
+            md = "\n".join("> " * i + "x\n" + "> " * i for i in range(1, 301))
+            self.assertEqual(markdown_to_html_node(md).to_html().count("<blockquote>"), 300)
+
+        def test_text_quote_stays_inline(self):
+            md = '> "quote"\n>\n> -- me'
+            self.assertEqual(markdown_to_html_node(md).to_html(), '<div><blockquote>"quote"\n\n-- me</blockquote></div>')
+
+        def test_html_is_escaped(self):
+            md = '[< Back](/?a=1&b="2") and `<br>`\n\n```\nif a < b:\n```'
+            self.assertEqual(markdown_to_html_node(md).to_html(),
+                             '<div><p><a href="/?a=1&amp;b=&quot;2&quot;">&lt; Back</a> and <code>&lt;br&gt;</code></p>'
+                             "<pre><code>if a &lt; b:\n</code></pre></div>")
+            cache = InlineCache()
+            self.assertEqual(markdown_to_html_node("a < `b`", cache).to_html(), "<div><p>a &lt; <code>b</code></p></div>")
+
+        def test_codeblock_keeps_indentation(self):
+            md = "```text\ndef f():\n    return 1\n```"
+            html = markdown_to_html_node(md).to_html()
+            self.assertEqual(html, '<div><pre><code class="language-text">def f():\n    return 1\n</code></pre></div>')
+
+        def test_codeblock_highlighting(self):
+            html = markdown_to_html_node("```py\nx = '<'\n```").to_html()
+            self.assertTrue(html.startswith('<div><pre><code class="language-py">'))
+            self.assertIn("&lt;", html)
+            if highlight.get_lexer_by_name is not None:
+                self.assertIn('<span class="n">x</span>', html)
+            html = markdown_to_html_node("```no-such-language\na < b\n```").to_html()
+            self.assertEqual(html, '<div><pre><code class="language-no-such-language">a &lt; b\n</code></pre></div>')
+
         def test_codeblock(self):
             md = """
             ```
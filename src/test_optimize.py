@@ -0,0 +1,97 @@
+import sys
+import os
+import gzip
+import tempfile
+import unittest
+from pathlib import Path
+
+# Ensure local src directory is importable
+sys.path.insert(0, os.path.dirname(__file__))
+
+import optimize
+from optimize import minify_css, minify_html, optimize_file, optimize_files, postprocess_options
+
+
+class TestMinify(unittest.TestCase):
+    def test_html_whitespace(self):
+        html = "<!DOCTYPE html>\n<html>\n  <head>\n    <title> Tolkien  Fan Club </title>\n  </head>\n" \
+               "  <body>\n    <p>Some <b>bold</b> <i>and</i>\n   italic</p>\n  </body>\n</html>\n"
+        self.assertEqual(minify_html(html), "<!DOCTYPE html><html><head><title> Tolkien Fan Club </title></head>"
+                                            "<body><p>Some <b>bold</b> <i>and</i> italic</p></body></html>")
+
+    def test_protected_elements_are_untouched(self):
+        code = "<pre><code>def f():\n    return  1\n</code></pre>"
+        inline = "<code>a  b</code>"
+        script = "<script>\nlet a  =  '<p>  x';\n</script>"
+        html = f"<div>\n  {code}\n  <p>x  {inline}  y</p>\n{script}\n<textarea>\n  keep </textarea>\n</div>"
+        self.assertEqual(minify_html(html), f"<div>{code}<p>x {inline} y</p>{script} <textarea>\n  keep </textarea></div>")
+
+    def test_comments_and_attributes(self):
+        html = '<p title="a  b">x<!-- note -->y</p><!--[if IE]>ie<![endif]-->'
+        self.assertEqual(minify_html(html), '<p title="a  b">xy</p><!--[if IE]>ie<![endif]-->')
+
+    def test_css(self):
+        css = "/* site */\nbody ,\nhtml {\n  color : red;\n  font-family: \"Open  Sans\", serif;\n}\n" \
+              "a :hover > b { content: '/* not a comment */'; }\n"
+        self.assertEqual(minify_css(css), 'body,html{color :red;font-family:"Open  Sans",serif}'
+                                          "a :hover>b{content:'/* not a comment */'}")
+
+    def test_style_element_is_minified(self):
+        self.assertEqual(minify_html("<style>\n  p {\n    margin: 0;\n  }\n</style>"), "<style>p{margin:0}</style>")
+
+
+class TestOptimizeFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_minifies_and_compresses_keeping_mtime(self):
+        path = self.root / "index.html"
+        path.write_text("<p>\n  hello\n</p>\n", encoding="utf-8")
+        os.utime(path, ns=(1, 10**18))
+        self.assertEqual(optimize_file(path), len("<p> hello </p>"))
+        self.assertEqual(path.read_text(encoding="utf-8"), "<p> hello </p>")
+        self.assertEqual(path.stat().st_mtime_ns, 10**18)
+        self.assertEqual(gzip.decompress((self.root / "index.html.gz").read_bytes()), b"<p> hello </p>")
+        # Reproducible, so unchanged outputs don't churn
+        first = (self.root / "index.html.gz").read_bytes()
+        optimize_file(path)
+        self.assertEqual((self.root / "index.html.gz").read_bytes(), first)
+        self.assertEqual((self.root / "index.html.br").exists(), optimize.brotli is not None)
+
+    def test_without_compress_siblings_are_removed(self):
+        path = self.root / "site.css"
+        path.write_text("a { b: c; }", encoding="utf-8")
+        optimize_file(path, minify=False)
+        self.assertEqual(path.read_text(encoding="utf-8"), "a { b: c; }")
+        self.assertTrue((self.root / "site.css.gz").exists())
+        optimize_file(path, compress=False)
+        self.assertEqual(path.read_text(encoding="utf-8"), "a{b:c}")
+        self.assertFalse((self.root / "site.css.gz").exists())
+
+    def test_binary_files_are_left_alone(self):
+        path = self.root / "photo.png"
+        path.write_bytes(b"\x89PNG")
+        optimize_file(path)
+        self.assertEqual(path.read_bytes(), b"\x89PNG")
+        self.assertFalse((self.root / "photo.png.gz").exists())
+
+    def test_optimize_files_in_pool(self):
+        paths = [self.root / f"{i}.html" for i in range(3)]
+        for path in paths:
+            path.write_text("<div>\n</div>", encoding="utf-8")
+        results = optimize_files(paths + [self.root / "missing.html"], jobs=2)
+        self.assertEqual([size for _, size, _ in results[:3]], [11, 11, 11])
+        self.assertIsInstance(results[3][2], FileNotFoundError)
+
+    def test_postprocess_options(self):
+        self.assertEqual(postprocess_options(False, False), [])
+        self.assertEqual(postprocess_options(True, False), ["minify"])
+        self.assertEqual(postprocess_options(False, True)[0], "gzip")
+
+
+if __name__ == "__main__":
+    unittest.main()
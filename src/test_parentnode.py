@@ -1,5 +1,6 @@
 import sys
 import os
+import io
 import unittest
 
 # Ensure local src directory is importable
@@ -43,6 +44,33 @@ class TestParentNode(unittest.TestCase):
         with self.assertRaises(ValueError):
             parent.to_html()
 
+    def test_write_html_streams_same_output(self):
+        tree = ParentNode("div", children=[
+            ParentNode("p", children=[LeafNode(None, "a "), LeafNode("b", "bold")]),
+            ParentNode("ul", children=[ParentNode("li", children=[LeafNode(None, "item")])], props={"class": "l"}),
+        ])
+        stream = io.StringIO()
+        tree.write_html(stream)
+        self.assertEqual(stream.getvalue(), tree.to_html())
+        self.assertEqual(stream.getvalue(), '<div><p>a <b>bold</b></p><ul class="l"><li>item</li></ul></div>')
+
+    def test_iter_html_yields_pieces(self):
+        parent = ParentNode("div", children=[LeafNode("span", "x")])
+        self.assertEqual(list(parent.iter_html()), ["<div>", "<span>x</span>", "</div>"])
+
+    def test_nested_missing_children_raises(self):
+        parent = ParentNode("div", children=[ParentNode("p", children=[])])
+        with self.assertRaises(ValueError):
+            parent.to_html()
+
+    def test_deep_tree_renders(self):
+        node = LeafNode(None, "x")
+        for _ in range(5000):
+            node = ParentNode("span", children=[node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(len(html), 1 + 5000 * len("<span></span>"))
+
     def test_repr_includes_children(self):
         child = LeafNode("em", "x")
         parent = ParentNode("div", children=[child])
@@ -0,0 +1,77 @@
+import sys
+import os
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+# Ensure local src directory is importable
+sys.path.insert(0, os.path.dirname(__file__))
+
+from pipeline import completed, failed, pipelined
+
+
+class TestPipeline(unittest.TestCase):
+    def test_writes_every_item_in_order(self):
+        written = {}
+        results = list(pipelined(range(50), lambda i: i * 2, lambda i, data: data + 1,
+                                 lambda i, out: written.__setitem__(i, out) or -i, io_threads=3))
+        self.assertEqual(results, [(-i, None) for i in range(50)])
+        self.assertEqual(written, {i: i * 2 + 1 for i in range(50)})
+
+    def test_errors_keep_their_place(self):
+        def read(i):
+            if i == 1:
+                raise OSError("unreadable")
+            return i
+
+        def render(i, data):
+            if i == 3:
+                raise ValueError("bad markdown")
+            return data
+
+        errors = [error for _, error in pipelined(range(5), read, render, lambda i, out: None, io_threads=2)]
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], OSError)
+        self.assertIsNone(errors[2])
+        self.assertIsInstance(errors[3], ValueError)
+        self.assertIsNone(errors[4])
+
+    def test_write_errors_are_reported(self):
+        def write(i, out):
+            raise PermissionError(i)
+        results = list(pipelined([0, 1], lambda i: i, lambda i, data: data, write, io_threads=1))
+        self.assertTrue(all(result is None and isinstance(error, PermissionError) for result, error in results))
+
+    def test_reads_are_bounded(self):
+        lock = threading.Lock()
+        reads = []
+
+        def read(i):
+            with lock:
+                reads.append(i)
+            return i
+
+        items = pipelined(range(100), read, lambda i, data: data, lambda i, out: None, io_threads=1, window=2)
+        next(items)
+        time.sleep(0.05)
+        # Two waiting at each stage, plus one being written, is all that can be read so far
+        self.assertLessEqual(len(reads), 7)
+        self.assertEqual(len(list(items)), 99)
+
+    def test_renders_in_pool(self):
+        with ThreadPoolExecutor(2) as pool:
+            written = []
+            results = list(pipelined(["a", "b"], str.upper, lambda i, data: data * 2,
+                                     lambda i, out: written.append(out), io_threads=1, render_pool=pool))
+        self.assertEqual(results, [(None, None), (None, None)])
+        self.assertEqual(sorted(written), ["AA", "BB"])
+
+    def test_completed_and_failed(self):
+        self.assertEqual(completed(max, 1, 2).result(), 2)
+        self.assertIsInstance(completed(int, "x").exception(), ValueError)
+        self.assertIsInstance(failed(KeyError("k")).exception(), KeyError)
+
+
+if __name__ == "__main__":
+    unittest.main()
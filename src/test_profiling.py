@@ -0,0 +1,59 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+# Ensure local src directory is importable
+sys.path.insert(0, os.path.dirname(__file__))
+
+from profiling import BuildStats, LatencyStats, PageTiming, StageTimer, STAGES
+
+
+class TestProfiling(unittest.TestCase):
+    def test_stage_timer_charges_laps(self):
+        timer = StageTimer(Path("a.md"))
+        timer.lap("read")
+        timer.lap("parse")
+        self.assertEqual(timer.timing.src, "a.md")
+        self.assertGreaterEqual(timer.timing.read, 0)
+        self.assertEqual(timer.timing.total, timer.timing.read + timer.timing.parse)
+
+    def test_profile_path_matches_globs(self):
+        stats = BuildStats(profile=["blog/*"], profile_dir=Path("p"))
+        self.assertEqual(stats.profile_path("blog/tom/index.md"), Path("p/blog__tom__index.md.prof"))
+        self.assertIsNone(stats.profile_path("index.md"))
+        self.assertIsNone(BuildStats().profile_path("index.md"))
+
+    def test_totals_and_report(self):
+        stats = BuildStats()
+        stats.add(PageTiming("fast.md", read=0.001, parse=0.001))
+        stats.add(PageTiming("slow.md", parse=0.5, write=0.25))
+        self.assertAlmostEqual(stats.totals()["parse"], 0.501)
+        report = stats.report(slowest=1)
+        self.assertIn("slow.md", report)
+        self.assertNotIn("fast.md", report)
+
+    def test_save(self):
+        stats = BuildStats()
+        stats.add(PageTiming("a.md", render=0.1))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "stats.json"
+            stats.save(path)
+            data = json.loads(path.read_text())
+        self.assertEqual(list(data["totals"]), list(STAGES))
+        self.assertEqual(data["pages"][0]["src"], "a.md")
+
+    def test_latency_stats_keep_a_window(self):
+        stats = LatencyStats(window=100)
+        for ms in range(1, 201):
+            stats.add("page", ms / 1000)
+        summary = stats.summary()["page"]
+        self.assertEqual(summary["count"], 200)
+        self.assertEqual((summary["p50_ms"], summary["p95_ms"], summary["max_ms"]), (151.0, 196.0, 200.0))
+        self.assertIn("page: 200 requests", stats.report())
+
+
+if __name__ == "__main__":
+    unittest.main()
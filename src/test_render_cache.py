@@ -0,0 +1,78 @@
+import sys
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Ensure local src directory is importable
+sys.path.insert(0, os.path.dirname(__file__))
+
+from render_cache import RenderCache, renderer_version
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = RenderCache(Path(self.tmp.name), version="v1")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_miss_then_hit(self):
+        self.assertIsNone(self.cache.get("# Title", "/"))
+        self.cache.put("# Title", "/", "<div><h1>Title</h1></div>")
+        self.assertEqual(self.cache.get("# Title", "/"), "<div><h1>Title</h1></div>")
+
+    def test_key_depends_on_basepath_and_version(self):
+        self.cache.put("# Title", "/", "<h1>Title</h1>")
+        self.assertIsNone(self.cache.get("# Title", "/ssg/"))
+        self.assertIsNone(RenderCache(self.cache.directory, version="v2").get("# Title", "/"))
+
+    def test_renderer_version_is_stable(self):
+        self.assertEqual(renderer_version(), renderer_version())
+        self.assertEqual(RenderCache(self.cache.directory).version, renderer_version())
+
+    def test_evict_least_recently_used(self):
+        for i in range(4):
+            self.cache.put(f"page {i}", "/", "x" * 100)
+            os.utime(self.cache.path(self.cache.key(f"page {i}", "/")), ns=(i * 10**9, i * 10**9))
+        self.assertEqual(self.cache.evict(250), 2)
+        self.assertIsNone(self.cache.get("page 0", "/"))
+        self.assertIsNone(self.cache.get("page 1", "/"))
+        self.assertEqual(self.cache.get("page 3", "/"), "x" * 100)
+
+    @unittest.skipIf(os.name != "posix" or os.geteuid() == 0, "needs a user that permissions apply to")
+    def test_read_only_cache_is_used(self):
+        self.cache.put("# Title", "/", "<h1>Title</h1>")
+        shard = self.cache.path(self.cache.key("# Title", "/")).parent
+        for path in (shard, self.cache.directory):
+            os.chmod(path, 0o555)
+        try:
+            self.assertEqual(self.cache.get("# Title", "/"), "<h1>Title</h1>")
+            self.cache.put("# Other", "/", "<h1>Other</h1>")
+            self.assertIsNone(self.cache.get("# Other", "/"))
+            self.assertEqual(self.cache.evict(0), 0)
+        finally:
+            for path in (shard, self.cache.directory):
+                os.chmod(path, 0o755)
+
+    def test_failed_utime_still_hits(self):
+        self.cache.put("# Title", "/", "<h1>Title</h1>")
+        with mock.patch("render_cache.os.utime", side_effect=PermissionError("read-only")):
+            self.assertEqual(self.cache.get("# Title", "/"), "<h1>Title</h1>")
+
+    def test_concurrent_writers(self):
+        html = "<p>" + "y" * 100000 + "</p>"
+        threads = [threading.Thread(target=self.cache.put, args=("same", "/", html)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get("same", "/"), html)
+        self.assertEqual(list(self.cache.directory.glob("*/*.tmp")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
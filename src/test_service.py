@@ -0,0 +1,91 @@
+import sys
+import os
+import io
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+# Ensure local src directory is importable
+sys.path.insert(0, os.path.dirname(__file__))
+
+from service import RenderService, make_server, serve_stdio
+
+
+class TestRenderService(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.default = root / "template.html"
+        self.default.write_text('<link href="/index.css" /><title>{{ Title }}</title>{{ Content }}', encoding="utf-8")
+        self.templates = root / "templates"
+        self.templates.mkdir()
+        (self.templates / "post.html").write_text("<main>{{ Content }}</main>", encoding="utf-8")
+        self.service = RenderService(self.default, self.templates, "/ssg/", inline_cache_size=16)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_html(self):
+        response = self.service.handle({"id": 7, "method": "html", "markdown": "# Hi\n\n[home](/)"})
+        self.assertEqual(response["id"], 7)
+        self.assertEqual(response["html"], '<div><h1>Hi</h1><p><a href="/ssg/">home</a></p></div>')
+        self.assertEqual(response["title"], "Hi")
+        self.assertGreaterEqual(response["ms"], 0)
+
+    def test_page_picks_template(self):
+        page = self.service.handle({"markdown": "# Hi"})["html"]
+        self.assertEqual(page, '<link href="/ssg/index.css" /><title>Hi</title><div><h1>Hi</h1></div>')
+        front_matter = "---\ntemplate: post.html\n---\n# Hi"
+        self.assertEqual(self.service.handle({"markdown": front_matter})["html"], "<main><div><h1>Hi</h1></div></main>")
+        self.assertEqual(self.service.handle({"markdown": "# Hi", "template": "post.html"})["html"],
+                         "<main><div><h1>Hi</h1></div></main>")
+
+    def test_template_edits_are_picked_up(self):
+        self.service.handle({"markdown": "# Hi"})
+        self.default.write_text("<body>{{ Content }}</body>", encoding="utf-8")
+        self.assertEqual(self.service.handle({"markdown": "# Hi"})["html"], "<body><div><h1>Hi</h1></div></body>")
+
+    def test_errors_are_answered(self):
+        self.assertIn("No header 1", self.service.handle({"markdown": "text"})["error"])
+        self.assertIn("no markdown", self.service.handle({"method": "page"})["error"])
+        self.assertIn("Unknown method", self.service.handle({"method": "build", "markdown": ""})["error"])
+        self.assertIn("error", self.service.handle({"markdown": "# Hi", "template": "missing.html"}))
+        self.assertIn("is outside", self.service.handle({"markdown": "# Hi", "template": "../template.html"})["error"])
+        stats = self.service.handle({"method": "stats"})["stats"]
+        self.assertEqual((stats["page"]["count"], stats["error"]["count"]), (4, 1))
+
+    def test_stdio(self):
+        stdin = io.StringIO('{"id": 1, "method": "html", "markdown": "# A"}\n\n[1]\n{"id": 2, "markdown": "# B"}\n')
+        stdout = io.StringIO()
+        serve_stdio(self.service, stdin, stdout)
+        responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual(len(responses), 3)
+        self.assertEqual(responses[0]["html"], "<div><h1>A</h1></div>")
+        self.assertIn("Invalid request", responses[1]["error"])
+        self.assertEqual(responses[2]["title"], "B")
+
+    def test_http(self):
+        server = make_server(self.service, 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}"
+        try:
+            body = json.dumps({"markdown": "# A"}).encode("utf-8")
+            with urlopen(Request(url + "/html", data=body)) as response:
+                self.assertEqual(json.load(response)["html"], "<div><h1>A</h1></div>")
+            with urlopen(url + "/stats") as response:
+                self.assertEqual(json.load(response)["stats"]["html"]["count"], 1)
+            with self.assertRaises(HTTPError) as caught:
+                urlopen(Request(url + "/page", data=b'{"markdown": "no title"}'))
+            self.assertEqual(caught.exception.code, 400)
+            caught.exception.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import sys
+import os
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+# Ensure local src directory is importable
+sys.path.insert(0, os.path.dirname(__file__))
+
+from htmlnode import LeafNode, ParentNode
+from manifest import hash_file
+from template import Template, TemplateLoader, rebase_urls
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile_splits_placeholders(self):
+        template = Template.compile("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.assertEqual(template.parts, ["<title>", "Title", "</title><main>", "Content", "</main>"])
+
+    def test_render(self):
+        template = Template.compile("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        html = template.render(Content="<p>hi</p>", Title="Home")
+        self.assertEqual(html, "<title>Home</title><main><p>hi</p></main>")
+
+    def test_write_streams_nodes(self):
+        template = Template.compile("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        stream = io.StringIO()
+        template.write(stream, Content=ParentNode("p", children=[LeafNode(None, "hi")]), Title="Home")
+        self.assertEqual(stream.getvalue(), "<title>Home</title><main><p>hi</p></main>")
+
+    def test_render_leaves_unknown_placeholders(self):
+        template = Template.compile("<p>{{ Other }}</p>")
+        self.assertEqual(template.render(Content="x"), "<p>{{ Other }}</p>")
+
+    def test_basepath_applied_to_static_parts_only(self):
+        template = Template.compile('<link href="/index.css" /><img src="/a.png" />{{ Content }}', "/ssg/")
+        html = template.render(Content='<code>href="/raw"</code>')
+        self.assertEqual(html, '<link href="/ssg/index.css" /><img src="/ssg/a.png" /><code>href="/raw"</code>')
+
+    def test_rebase_urls(self):
+        link = LeafNode("a", "home", props={"href": "/"})
+        external = LeafNode("a", "ext", props={"href": "https://example.com/"})
+        image = LeafNode("img", "", props={"src": "/images/tom.png", "alt": "/not-a-url"})
+        root = ParentNode("div", children=[ParentNode("p", children=[link, external]), image])
+        rebase_urls(root, "/ssg/")
+        self.assertEqual(link.props["href"], "/ssg/")
+        self.assertEqual(external.props["href"], "https://example.com/")
+        self.assertEqual(image.props, {"src": "/ssg/images/tom.png", "alt": "/not-a-url"})
+
+    def test_fingerprinted_assets(self):
+        assets = {"/index.css": "/index.3f2a9c0b1d.css", "/images/tom.png": "/images/tom.0011223344.png"}
+        template = Template.compile('<link href="/index.css" /><a href="/index.css.html">x</a>{{ Content }}', "/", assets)
+        self.assertEqual(template.parts[0], '<link href="/index.3f2a9c0b1d.css" /><a href="/index.css.html">x</a>')
+        self.assertNotEqual(template.url_key, Template.compile("", "/").url_key)
+        image = LeafNode("img", "", props={"src": "/images/tom.png?v=1#top"})
+        link = LeafNode("a", "tom", props={"href": "/images/"})
+        rebase_urls(ParentNode("p", children=[image, link]), "/ssg/", assets)
+        self.assertEqual(image.props["src"], "/ssg/images/tom.0011223344.png?v=1#top")
+        self.assertEqual(link.props["href"], "/ssg/images/")
+
+
+class TestTemplateLoader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.templates = self.root / "templates"
+        (self.templates / "partials").mkdir(parents=True)
+        (self.root / "template.html").write_text("{{> partials/nav.html }}<main>{{ Content }}</main>")
+        (self.templates / "post.html").write_text("<article>{{ Content }}</article>{{> partials/footer.html }}")
+        (self.templates / "partials" / "nav.html").write_text('<a href="/">Home</a>')
+        (self.templates / "partials" / "footer.html").write_text("<footer>{{> partials/nav.html }}</footer>")
+        self.loader = TemplateLoader(self.root / "template.html", self.templates, "/ssg/")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_default_template_expands_partials(self):
+        template = self.loader.get()
+        self.assertEqual(template.render(Content="x"), '<a href="/ssg/">Home</a><main>x</main>')
+        nav = self.templates / "partials" / "nav.html"
+        self.assertEqual(template.dependencies, {
+            (self.root / "template.html").as_posix(): hash_file(self.root / "template.html"),
+            nav.as_posix(): hash_file(nav),
+        })
+
+    def test_named_template_and_nested_partials(self):
+        template = self.loader.get("post.html")
+        self.assertEqual(template.render(Content="x"), '<article>x</article><footer><a href="/ssg/">Home</a></footer>')
+        self.assertEqual(len(template.dependencies), 3)
+        self.assertIs(self.loader.get("post.html"), template)
+        self.loader.clear()
+        self.assertIsNot(self.loader.get("post.html"), template)
+
+    def test_include_cycle(self):
+        (self.templates / "partials" / "nav.html").write_text("{{> partials/footer.html }}")
+        with self.assertRaises(ValueError):
+            self.loader.get("post.html")
+
+    def test_names_outside_templates_are_rejected(self):
+        (self.root / "secret.html").write_text("secret")
+        for name in ("../secret.html", "partials/../../secret.html", (self.root / "secret.html").as_posix()):
+            with self.subTest(name=name), self.assertRaises(ValueError):
+                self.loader.get(name)
+        (self.templates / "post.html").write_text("{{> ../secret.html }}")
+        with self.assertRaises(ValueError):
+            self.loader.get("post.html")
+        # Names that only pass through a parent are fine
+        (self.templates / "post.html").write_text("{{> partials/../partials/nav.html }}")
+        self.assertEqual(self.loader.get("partials/../post.html").render(), '<a href="/ssg/">Home</a>')
+
+    def test_missing_template(self):
+        with self.assertRaises(FileNotFoundError):
+            self.loader.get("missing.html")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -221,5 +221,34 @@ class TestTextNode(unittest.TestCase):
         # Current implementation returns an empty list for empty input
         self.assertEqual(text_to_textnodes("") , [])
 
+    def test_text_to_textnodes_nested_emphasis(self):
+        nodes = text_to_textnodes("_italic with **bold** inside_")
+        inner = [
+            TextNode("italic with ", TextType.PLAIN),
+            TextNode("bold", TextType.BOLD),
+            TextNode(" inside", TextType.PLAIN),
+        ]
+        self.assertEqual(nodes, [TextNode("italic with **bold** inside", TextType.ITALIC, children=inner)])
+        html = text_node_to_html_node(nodes[0]).to_html()
+        self.assertEqual(html, "<i>italic with <b>bold</b> inside</i>")
+
+    def test_text_to_textnodes_delimiter_inside_span_is_literal(self):
+        self.assertEqual(text_to_textnodes("**a_b**"), [TextNode("a_b", TextType.BOLD)])
+        self.assertEqual(text_to_textnodes("`a_b**c`"), [TextNode("a_b**c", TextType.CODE_TEXT)])
+
+    def test_text_to_textnodes_link_url_not_split(self):
+        nodes = text_to_textnodes("see [docs](/snake_case_page) now")
+        self.assertEqual(nodes, [
+            TextNode("see ", TextType.PLAIN),
+            TextNode("docs", TextType.LINK, "/snake_case_page"),
+            TextNode(" now", TextType.PLAIN),
+        ])
+
+    def test_text_to_textnodes_unmatched_raises(self):
+        with self.assertRaises(Exception):
+            text_to_textnodes("this has `unmatched")
+        with self.assertRaises(Exception):
+            text_to_textnodes("open **bold")
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
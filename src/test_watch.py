@@ -0,0 +1,113 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+import urllib.request
+from pathlib import Path
+
+# Ensure local src directory is importable
+sys.path.insert(0, os.path.dirname(__file__))
+
+import watch
+from watch import TreeWatcher, changes, file_state, serve, snapshot
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        (self.root / "blog").mkdir()
+        (self.root / "index.md").write_text("# Home")
+        (self.root / "blog" / "post.md").write_text("# Post")
+        (self.root / "blog" / "image.png").write_bytes(b"png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_snapshot_filters_suffix(self):
+        self.assertEqual(sorted(snapshot(self.root, ".md")), ["blog/post.md", "index.md"])
+        self.assertEqual(len(snapshot(self.root)), 3)
+        self.assertEqual(snapshot(self.root / "missing"), {})
+
+    def test_changes(self):
+        before = snapshot(self.root)
+        (self.root / "index.md").write_text("# Home, edited")
+        (self.root / "blog" / "image.png").unlink()
+        (self.root / "new.md").write_text("# New")
+        changed, removed = changes(before, snapshot(self.root))
+        self.assertEqual(changed, ["index.md", "new.md"])
+        self.assertEqual(removed, ["blog/image.png"])
+
+    def test_file_state(self):
+        self.assertEqual(file_state(self.root / "index.md")[1], len("# Home"))
+        self.assertIsNone(file_state(self.root / "missing.html"))
+
+    def test_serve(self):
+        server = serve(self.root, 0)
+        try:
+            port = server.server_address[1]
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/index.md") as response:
+                self.assertEqual(response.read(), b"# Home")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class TestTreeWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        (self.root / "blog").mkdir()
+        (self.root / "index.md").write_text("# Home")
+        (self.root / "blog" / "post.md").write_text("# Post")
+        (self.root / "blog" / "image.png").write_bytes(b"png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def check_tree(self, inotify: bool):
+        tree = TreeWatcher(self.root, ".md", inotify=inotify)
+        self.addCleanup(tree.close)
+        self.assertEqual(tree.files, snapshot(self.root, ".md"))
+        self.assertEqual(tree.poll(), ([], []))
+        (self.root / "index.md").write_text("# Home, edited")
+        (self.root / "blog" / "image.png").write_bytes(b"png, edited")
+        (self.root / "blog" / "post.md").unlink()
+        self.assertEqual(tree.poll(), (["index.md"], ["blog/post.md"]))
+        # New, moved and deleted directories
+        (self.root / "drafts" / "deep").mkdir(parents=True)
+        (self.root / "drafts" / "deep" / "a.md").write_text("# A")
+        self.assertEqual(tree.poll(), (["drafts/deep/a.md"], []))
+        (self.root / "drafts").rename(self.root / "published")
+        self.assertEqual(tree.poll(), (["published/deep/a.md"], ["drafts/deep/a.md"]))
+        (self.root / "published" / "deep" / "b.md").write_text("# B")
+        self.assertEqual(tree.poll(), (["published/deep/b.md"], []))
+        shutil.rmtree(self.root / "published")
+        self.assertEqual(tree.poll(), ([], ["published/deep/a.md", "published/deep/b.md"]))
+        # Deleted and written again between two polls
+        (self.root / "index.md").unlink()
+        (self.root / "index.md").write_text("# Home, again")
+        self.assertEqual(tree.poll(), (["index.md"], []))
+        self.assertEqual(tree.files, snapshot(self.root, ".md"))
+        return tree
+
+    def test_polling(self):
+        self.assertIsNone(self.check_tree(inotify=False).fd)
+
+    @unittest.skipIf(watch.LIBC is None, "inotify is not available")
+    def test_inotify(self):
+        tree = self.check_tree(inotify=True)
+        self.assertIsNotNone(tree.fd)
+        self.assertEqual(sorted(tree.watches.values()), ["", "blog/"])
+
+    def test_missing_root_is_polled(self):
+        tree = TreeWatcher(self.root / "missing", ".md")
+        self.assertEqual((tree.fd, tree.files), (None, {}))
+        (self.root / "missing").mkdir()
+        (self.root / "missing" / "a.md").write_text("# A")
+        self.assertEqual(tree.poll(), (["a.md"], []))
+
+
+if __name__ == "__main__":
+    unittest.main()
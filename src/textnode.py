@@ -1,7 +1,8 @@
+import re
 from enum import Enum
 from dataclasses import dataclass
-from htmlnode import LeafNode
-from extract_markdown import extract_markdown_links, extract_markdown_images
+from htmlnode import HtmlNode, LeafNode, ParentNode
+from extract_markdown import extract_markdown_links, extract_markdown_images, IMAGE_PATTERN, LINK_PATTERN
 
 
 class TextType(Enum):
@@ -14,28 +15,37 @@ class TextType(Enum):
 
 
 
-@dataclass
+@dataclass(slots=True)
 class TextNode:
     """Representation of a piece of text with a type and optional URL.
     @text: The text content or alt text
     @text_type: The type of text (from TextType).
     @url: Optional URL associated with the text (for links/images).
+    @children: Inline nodes nested inside bold/italic text, e.g. a link inside bold.
+        When set, text holds the raw markdown between the delimiters.
     """
     text: str
     text_type: TextType
     url: str = None
+    children: list["TextNode"] | None = None
 
     def __repr__(self):
+        if self.children is not None:
+            return f"TextNode({self.text!r}, {self.text_type.value!r}, {self.url!r}, {self.children!r})"
         return f"TextNode({self.text!r}, {self.text_type.value!r}, {self.url!r})"
 
-# Convert a TextNode to an HtmlNode (LeafNode)
-def text_node_to_html_node(text_node: TextNode) -> LeafNode:
+# Convert a TextNode to an HtmlNode (a LeafNode, or a ParentNode for nested emphasis)
+def text_node_to_html_node(text_node: TextNode) -> HtmlNode:
     match text_node.text_type:
         case TextType.PLAIN:
             return LeafNode(tag=None, value=text_node.text)
         case TextType.BOLD:
+            if text_node.children:
+                return ParentNode(tag="b", children=[text_node_to_html_node(child) for child in text_node.children])
             return LeafNode(tag="b", value=text_node.text)
         case TextType.ITALIC:
+            if text_node.children:
+                return ParentNode(tag="i", children=[text_node_to_html_node(child) for child in text_node.children])
             return LeafNode(tag="i", value=text_node.text)
         case TextType.CODE_TEXT:
             return LeafNode(tag="code", value=text_node.text)
@@ -134,14 +144,73 @@ def split_nodes_links(old_nodes: list[TextNode]) -> list[TextNode]:
             new_nodes.append(TextNode(tail, TextType.PLAIN))
     return new_nodes
 
+# Emphasis delimiters, and every token that can start inline markup, for the single pass scanner
+EMPHASIS_DELIMITERS = {"**": TextType.BOLD, "_": TextType.ITALIC}
+INLINE_TOKEN_PATTERN = re.compile(r"\*\*|_|`|!\[|\[")
+
 def text_to_textnodes(text: str) -> list[TextNode]:
-    """Converts a markdown text string into a list of TextNodes, handling images and links.
+    """Converts a markdown text string into a list of TextNodes in one left to right scan.
+    Code spans, links and images are taken as soon as they start, so their contents are never
+    split on emphasis delimiters. Bold and italic can nest; the inner nodes end up in children.
+    An emphasis delimiter left open inside another span is kept as literal text, while one left
+    open at the top level raises, as the split_nodes_delimiter passes did.
     @text: The input text string.
     """
-    initial_node = TextNode(text, TextType.PLAIN)
-    nodes = split_nodes_delimiter([initial_node], '**', TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, '_', TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, '`', TextType.CODE_TEXT)
-    nodes = split_nodes_links(nodes)
-    nodes = split_nodes_images(nodes)
-    return nodes
+    root = []
+    nodes = root
+    stack = []  # Open emphasis spans: (delimiter, start of their content, their nodes)
+    plain_start = pos = 0
+    while (token := INLINE_TOKEN_PATTERN.search(text, pos)) is not None:
+        start = token.start()
+        delimiter = token.group()
+        if delimiter == "`":
+            end = text.find("`", start + 1)
+            if end == -1:
+                if not stack:
+                    raise Exception(f"Unmatched delimiter ` in text: {text}")
+                pos = start + 1
+                continue
+            if start > plain_start:
+                nodes.append(TextNode(text[plain_start:start], TextType.PLAIN))
+            if end > start + 1:
+                nodes.append(TextNode(text[start + 1:end], TextType.CODE_TEXT))
+            pos = plain_start = end + 1
+        elif delimiter in EMPHASIS_DELIMITERS:
+            if start > plain_start:
+                nodes.append(TextNode(text[plain_start:start], TextType.PLAIN))
+            pos = plain_start = start + len(delimiter)
+            depth = next((i for i in range(len(stack) - 1, -1, -1) if stack[i][0] == delimiter), None)
+            if depth is None:
+                stack.append((delimiter, pos, []))
+                nodes = stack[-1][2]
+                continue
+            # Spans opened after the one being closed were never closed: fold them back as text
+            while len(stack) > depth + 1:
+                inner_delimiter, _, inner_nodes = stack.pop()
+                outer = stack[-1][2]
+                outer.append(TextNode(inner_delimiter, TextType.PLAIN))
+                outer.extend(inner_nodes)
+            _, content_start, inner = stack.pop()
+            nodes = stack[-1][2] if stack else root
+            if not inner:
+                continue
+            text_type = EMPHASIS_DELIMITERS[delimiter]
+            if all(node.text_type == TextType.PLAIN for node in inner):
+                nodes.append(TextNode("".join(node.text for node in inner), text_type))
+            else:
+                nodes.append(TextNode(text[content_start:start], text_type, children=inner))
+        else:
+            is_image = delimiter == "!["
+            match = (IMAGE_PATTERN if is_image else LINK_PATTERN).match(text, start)
+            if match is None:
+                pos = start + len(delimiter)
+                continue
+            if start > plain_start:
+                nodes.append(TextNode(text[plain_start:start], TextType.PLAIN))
+            nodes.append(TextNode(match.group(1), TextType.IMAGE if is_image else TextType.LINK, url=match.group(2)))
+            pos = plain_start = match.end()
+    if stack:
+        raise Exception(f"Unmatched delimiter {stack[-1][0]} in text: {text}")
+    if len(text) > plain_start:
+        root.append(TextNode(text[plain_start:], TextType.PLAIN))
+    return root
@@ -0,0 +1,251 @@
+import ctypes
+import errno
+import os
+import struct
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from pathlib import Path
+
+# Relative posix path -> (mtime_ns, size)
+Snapshot = dict[str, tuple[int, int]]
+
+try:
+    LIBC = ctypes.CDLL(None, use_errno=True)
+    LIBC.inotify_init1.argtypes = [ctypes.c_int]
+    LIBC.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    LIBC.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+except (OSError, AttributeError, TypeError):  # Not Linux, trees are polled instead
+    LIBC = None
+
+# From <sys/inotify.h>
+IN_MODIFY, IN_ATTRIB, IN_CLOSE_WRITE = 0x2, 0x4, 0x8
+IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x40, 0x80, 0x100, 0x200
+IN_Q_OVERFLOW, IN_IGNORED, IN_ONLYDIR, IN_ISDIR = 0x4000, 0x8000, 0x1000000, 0x40000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+# struct inotify_event: wd, mask, cookie, len, then len bytes of NUL padded name
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+def snapshot(root: Path, suffix: str | None = None) -> Snapshot:
+    """Records the mtime and size of every file under root.
+    Uses os.scandir so each file costs one stat call and nothing is read.
+    @root: Directory to scan
+    @suffix: Only record files ending with this suffix, e.g. ".md"
+    """
+    found = {}
+    stack = [(root, "")]
+    while stack:
+        directory, prefix = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append((entry.path, prefix + entry.name + "/"))
+                elif suffix is None or entry.name.endswith(suffix):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:  # Deleted while we were scanning
+                        continue
+                    found[prefix + entry.name] = (stat.st_mtime_ns, stat.st_size)
+    return found
+
+
+def file_state(path: Path) -> tuple[int, int] | None:
+    """Returns (mtime_ns, size) of a single file, or None if it doesn't exist.
+    @path: File to check
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def changes(old: Snapshot, new: Snapshot) -> tuple[list[str], list[str]]:
+    """Compares two snapshots.
+    Returns the sorted paths that were added or modified, and those that were removed.
+    @old: The earlier snapshot
+    @new: The later snapshot
+    """
+    changed = sorted(path for path, state in new.items() if old.get(path) != state)
+    removed = sorted(path for path in old if path not in new)
+    return changed, removed
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Serves files without logging every request, so rebuild messages stay readable."""
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(directory: Path, port: int) -> ThreadingHTTPServer:
+    """Starts an HTTP server for directory in a background thread.
+    Call shutdown() on the returned server to stop it.
+    @directory: Directory to serve
+    @port: Port to listen on (localhost only)
+    """
+    handler = partial(QuietHandler, directory=str(directory))
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class TreeWatcher:
+    """Keeps a Snapshot of a directory tree current and reports what changed between polls.
+    On Linux every directory is watched with inotify (through ctypes), so a poll only stats
+    the files the kernel reported; elsewhere, or when the kernel runs out of watches, each
+    poll takes a new snapshot.
+    @root: Directory to watch
+    @suffix: Only track files ending with this suffix, e.g. ".md"
+    @inotify: Whether to use inotify where it is available
+    """
+    def __init__(self, root: Path, suffix: str | None = None, inotify: bool = True):
+        self.root = root
+        self.suffix = suffix
+        self.inotify = inotify and LIBC is not None
+        self.fd: int | None = None
+        self.watches: dict[int, str] = {}  # Watch descriptor -> prefix of its directory
+        self.files: Snapshot = {}
+        self.start()
+
+    def start(self):
+        """Takes a full snapshot, watching every directory when inotify is in use."""
+        self.close()
+        self.files = {}
+        if self.inotify:
+            fd = LIBC.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd >= 0:
+                self.fd = fd
+                self.add_tree(os.fspath(self.root), "")
+        if self.fd is None:
+            self.files = snapshot(self.root, self.suffix)
+
+    def close(self):
+        """Stops watching. Polls take full snapshots until start is called again."""
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        self.watches.clear()
+
+    def matches(self, name: str) -> bool:
+        return self.suffix is None or name.endswith(self.suffix)
+
+    def add_tree(self, directory: str, prefix: str):
+        """Watches a directory and every directory below it, recording their files.
+        Each directory is watched before it is listed, so files created meanwhile are not missed.
+        @directory: Path of the directory
+        @prefix: Its path relative to root with a trailing /, "" for root
+        """
+        stack = [(directory, prefix)]
+        while stack:
+            directory, prefix = stack.pop()
+            wd = LIBC.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                if prefix and ctypes.get_errno() in (errno.ENOENT, errno.ENOTDIR):
+                    continue  # Deleted already, its parent reports that
+                # No root yet, or out of watches (ENOSPC): fall back to polling
+                self.close()
+                self.files = snapshot(self.root, self.suffix)
+                return
+            self.watches[wd] = prefix
+            try:
+                entries = os.scandir(directory)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        stack.append((entry.path, prefix + entry.name + "/"))
+                    elif self.matches(entry.name):
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        self.files[prefix + entry.name] = (stat.st_mtime_ns, stat.st_size)
+
+    def drop_tree(self, prefix: str):
+        """Forgets the files and watches below a directory that was deleted or moved away.
+        @prefix: The directory's path relative to root with a trailing /
+        """
+        for path in [path for path in self.files if path.startswith(prefix)]:
+            del self.files[path]
+        for wd in [wd for wd, watched in self.watches.items() if watched.startswith(prefix)]:
+            # Fails harmlessly for a deleted directory, whose watch the kernel already removed
+            LIBC.inotify_rm_watch(self.fd, wd)
+            del self.watches[wd]
+
+    def read_events(self) -> set[tuple[str, bool]] | None:
+        """Returns the paths the queued events name and whether each is a directory,
+        or None if the kernel dropped events because its queue overflowed.
+        """
+        touched = set()
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return touched
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                name = data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length].rstrip(b"\0")
+                offset += INOTIFY_EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    return None
+                if mask & IN_IGNORED:
+                    self.watches.pop(wd, None)
+                    continue
+                prefix = self.watches.get(wd)
+                if prefix is not None and name:
+                    touched.add((prefix + os.fsdecode(name), bool(mask & IN_ISDIR)))
+
+    def poll(self) -> tuple[list[str], list[str]]:
+        """Updates files with what changed since the last poll.
+        Returns the sorted paths that were added or modified, and those that were removed.
+        """
+        old = self.files
+        if self.fd is None:
+            self.files = snapshot(self.root, self.suffix)
+            return changes(old, self.files)
+        touched = self.read_events()
+        if touched is None:
+            self.start()
+            return changes(old, self.files)
+        changed, removed = set(), set()
+        for relative, is_dir in touched:
+            if is_dir:
+                # Created, deleted or moved: list the whole subtree again
+                prefix = relative + "/"
+                before = {path: state for path, state in self.files.items() if path.startswith(prefix)}
+                self.drop_tree(prefix)
+                if os.path.isdir(self.root / relative):
+                    self.add_tree(os.fspath(self.root / relative), prefix)
+                if self.fd is None:
+                    # Out of watches: files is a full snapshot now, old has this poll's updates so far
+                    sub_changed, sub_removed = changes(old, self.files)
+                    changed.update(sub_changed)
+                    removed.update(sub_removed)
+                    break
+                after = {path: state for path, state in self.files.items() if path.startswith(prefix)}
+                sub_changed, sub_removed = changes(before, after)
+                changed.update(sub_changed)
+                removed.update(sub_removed)
+                continue
+            if not self.matches(relative):
+                continue
+            try:
+                stat = os.stat(self.root / relative)
+            except (FileNotFoundError, NotADirectoryError):
+                if self.files.pop(relative, None) is not None:
+                    removed.add(relative)
+                continue
+            state = (stat.st_mtime_ns, stat.st_size)
+            if self.files.get(relative) != state:
+                self.files[relative] = state
+                changed.add(relative)
+        # A path can be touched more than once, e.g. deleted and created again; what is there now decides
+        return (sorted(path for path in changed if path in self.files),
+                sorted(path for path in removed if path not in self.files))